@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+DocAmy message archival job
+Moves the messages of finished conversations to the on-disk archive and
+maintains the monthly messages partitions; run it on a schedule (e.g. daily)
+from a single place
+"""
+
+import sys
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive messages of finished conversations")
+    parser.add_argument("--older-than-days", type=int, default=None, help="Default: ARCHIVE_AFTER_DAYS")
+    parser.add_argument("--limit", type=int, default=None, help="Archive at most this many conversations")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the conversations that would be archived")
+    args = parser.parse_args()
+    
+    from config import settings
+    from database import close_db, drop_empty_message_partitions, engine, ensure_message_partitions
+    from services.message_archive import MessageArchive, MessageArchiver
+    
+    days = settings.ARCHIVE_AFTER_DAYS if args.older_than_days is None else args.older_than_days
+    archiver = MessageArchiver(
+        MessageArchive(settings.ARCHIVE_DIR),
+        older_than=timedelta(days=days),
+        batch_size=settings.ARCHIVE_BATCH_SIZE,
+        delete_chunk=settings.ARCHIVE_DELETE_CHUNK
+    )
+    
+    async def run():
+        try:
+            if args.dry_run:
+                return {"candidates": await archiver.count_candidates()}
+            return await archiver.run(limit=args.limit)
+        finally:
+            await close_db()
+    
+    try:
+        result = asyncio.run(run())
+        if args.dry_run:
+            print(f"🔍 {result['candidates']} conversations older than {days} days would be archived")
+            return
+        print(f"📦 Archived {result['messages']} messages of {result['conversations']} conversations to {settings.ARCHIVE_DIR}")
+        
+        # Partitions for the coming months; months that ended before the
+        # archive cutoff and are now empty are dropped
+        with engine.begin() as connection:
+            created = ensure_message_partitions(connection, settings.MESSAGES_PARTITION_MONTHS_AHEAD)
+            cutoff = (datetime.utcnow() - timedelta(days=days)).date().replace(day=1)
+            dropped = drop_empty_message_partitions(connection, cutoff)
+        if created:
+            print(f"✅ Created partitions: {', '.join(created)}")
+        if dropped:
+            print(f"🗑️  Dropped empty partitions: {', '.join(dropped)}")
+        
+        if result["errors"]:
+            print(f"❌ {result['errors']} conversations could not be archived, see the log")
+            sys.exit(1)
+    except Exception as e:
+        print(f"❌ Archival failed: {e}")
+        sys.exit(1)
+    finally:
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
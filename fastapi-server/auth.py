@@ -1,21 +1,30 @@
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, Depends, status
+from fastapi import HTTPException, Depends, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, or_
+import asyncio
 import hashlib
+import hmac
+import logging
 import secrets
+import time
+import uuid
 
 from config import settings
-from database import get_db, User, APIKey
+from database import get_db, db_session, DBSession, User, APIKey
+from metrics import timed_task
+
+logger = logging.getLogger(__name__)
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # Security
 security = HTTPBearer()
+ADMIN_TOKEN_HEADER = "x-admin-token"
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -56,33 +65,223 @@ def hash_api_key(api_key: str) -> str:
     """Hash an API key for storage"""
     return hashlib.sha256(api_key.encode()).hexdigest()
 
-async def verify_api_key(api_key: str, db: Session) -> Optional[User]:
-    """Verify API key and return associated user"""
+def _user_principal(user: User) -> Dict[str, Any]:
+    """Public representation of the authenticated user"""
+    return {
+        "id": str(user.id),
+        "email": user.email,
+        "full_name": user.full_name,
+        "is_active": user.is_active
+    }
+
+class PrincipalCache:
+    """Short-TTL, per-worker cache of API key principals keyed by key hash
+    
+    Entries never outlive the key's expires_at. Revocations are published
+    over Redis pub/sub so every worker drops the key at once; if Redis is
+    unavailable other workers pick them up once the entry's TTL lapses.
+    """
+    
+    def __init__(self, ttl: float, channel: str = "docamy:auth:principals:invalidate"):
+        self.ttl = ttl
+        self.channel = channel
+        self.redis = None
+        self._entries: Dict[str, Tuple[float, uuid.UUID, Dict[str, Any]]] = {}
+        self._listener: Optional[asyncio.Task] = None
+    
+    async def start(self, redis_client):
+        """Listen for revocations published by other workers"""
+        self.redis = redis_client
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen_invalidations())
+    
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+    
+    def get(self, key_hash: str) -> Optional[Tuple[uuid.UUID, Dict[str, Any]]]:
+        entry = self._entries.get(key_hash)
+        if entry is None:
+            return None
+        valid_until, api_key_id, principal = entry
+        if time.monotonic() >= valid_until:
+            self._entries.pop(key_hash, None)
+            return None
+        return api_key_id, principal
+    
+    def set(
+        self,
+        key_hash: str,
+        api_key_id: uuid.UUID,
+        principal: Dict[str, Any],
+        expires_at: Optional[datetime] = None
+    ):
+        lifetime = self.ttl
+        if expires_at is not None:
+            lifetime = min(lifetime, (expires_at - datetime.utcnow()).total_seconds())
+        if lifetime > 0:
+            self._entries[key_hash] = (time.monotonic() + lifetime, api_key_id, principal)
+    
+    def invalidate(self, key_hash: Optional[str] = None):
+        if key_hash is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key_hash, None)
+    
+    async def revoke(self, key_hash: str):
+        """Drop a key here and on every other worker"""
+        self.invalidate(key_hash)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.publish(self.channel, key_hash)
+        except Exception as e:
+            logger.error(f"Error publishing API key revocation, other workers drop it within {self.ttl}s: {e}")
+    
+    async def _listen_invalidations(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    key_hash = message["data"]
+                    if isinstance(key_hash, bytes):
+                        key_hash = key_hash.decode()
+                    self.invalidate(key_hash)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"API key revocation listener failed: {e}")
+                await asyncio.sleep(5)
+            finally:
+                await pubsub.close()
+
+class LastUsedBuffer:
+    """Buffers API key last_used timestamps and flushes them in batched UPDATEs"""
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._pending: Dict[uuid.UUID, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def touch(self, api_key_id: uuid.UUID):
+        self._pending[api_key_id] = datetime.utcnow()
+    
+    @timed_task("api_key_last_used_flush")
+    async def flush(self) -> int:
+        """Write all buffered timestamps in one transaction"""
+        if not self._pending:
+            return 0
+        
+        pending, self._pending = self._pending, {}
+        try:
+            async with db_session() as db:
+                await db.execute(
+                    update(APIKey),
+                    [{"id": key_id, "last_used": used_at} for key_id, used_at in pending.items()]
+                )
+                await db.commit()
+            return len(pending)
+        except Exception as e:
+            logger.error(f"Error flushing API key last_used timestamps: {e}")
+            # Keep the newest timestamp for the next attempt
+            for key_id, used_at in pending.items():
+                if key_id not in self._pending:
+                    self._pending[key_id] = used_at
+            return 0
+    
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+principal_cache = PrincipalCache(ttl=settings.API_KEY_CACHE_TTL)
+api_key_usage = LastUsedBuffer(interval=settings.API_KEY_LAST_USED_FLUSH_INTERVAL)
+
+async def verify_api_key(api_key: str, db: DBSession) -> Optional[Dict[str, Any]]:
+    """Verify API key and return the associated user principal"""
     try:
         key_hash = hash_api_key(api_key)
         
-        api_key_record = db.query(APIKey).filter(
-            APIKey.key_hash == key_hash,
-            APIKey.is_active == True
-        ).first()
+        cached = principal_cache.get(key_hash)
+        if cached:
+            api_key_id, principal = cached
+            api_key_usage.touch(api_key_id)
+            return principal
         
-        if not api_key_record:
+        now = datetime.utcnow()
+        result = await db.execute(
+            select(APIKey.id, APIKey.expires_at, User).join(
+                User, User.id == APIKey.user_id
+            ).where(
+                APIKey.key_hash == key_hash,
+                APIKey.is_active == True,
+                or_(APIKey.expires_at.is_(None), APIKey.expires_at > now)
+            )
+        )
+        row = result.first()
+        
+        if not row:
             return None
         
-        # Update last used timestamp
-        api_key_record.last_used = datetime.utcnow()
-        db.commit()
+        api_key_id, expires_at, user = row
+        principal = _user_principal(user)
+        principal_cache.set(key_hash, api_key_id, principal, expires_at)
         
-        # Get associated user
-        user = db.query(User).filter(User.id == api_key_record.user_id).first()
-        return user
+        # last_used is written behind, off the request path
+        api_key_usage.touch(api_key_id)
+        return principal
         
-    except Exception:
+    except Exception as e:
+        logger.error(f"Error verifying API key: {e}")
         return None
 
+async def revoke_api_key(db: DBSession, api_key_id: str, user_id: str) -> bool:
+    """Deactivate an API key and drop it from the principal cache of every worker"""
+    try:
+        api_key_uuid = uuid.UUID(str(api_key_id))
+    except ValueError:
+        return False
+    result = await db.execute(
+        select(APIKey).where(
+            APIKey.id == api_key_uuid,
+            APIKey.user_id == uuid.UUID(str(user_id))
+        )
+    )
+    api_key_record = result.scalars().first()
+    if not api_key_record:
+        return False
+    
+    api_key_record.is_active = False
+    await db.commit()
+    await principal_cache.revoke(api_key_record.key_hash)
+    return True
+
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: DBSession = Depends(get_db)
 ) -> Dict[str, Any]:
     """Get current user from JWT token or API key"""
     
@@ -97,25 +296,18 @@ async def get_current_user(
     # Try JWT token first
     token_data = verify_token(token)
     if token_data:
-        user = db.query(User).filter(User.email == token_data["email"]).first()
+        result = await db.execute(select(User).where(User.email == token_data["email"]))
+        user = result.scalars().first()
         if user and user.is_active:
-            return {
-                "id": str(user.id),
-                "email": user.email,
-                "full_name": user.full_name,
-                "is_active": user.is_active
-            }
+            request.state.user_id = str(user.id)
+            return _user_principal(user)
     
     # Try API key
     if token.startswith("docamy_"):
-        user = await verify_api_key(token, db)
-        if user and user.is_active:
-            return {
-                "id": str(user.id),
-                "email": user.email,
-                "full_name": user.full_name,
-                "is_active": user.is_active
-            }
+        principal = await verify_api_key(token, db)
+        if principal and principal["is_active"]:
+            request.state.user_id = principal["id"]
+            return principal
     
     raise credentials_exception
 
@@ -127,7 +319,15 @@ async def get_current_active_user(
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def create_user(db: Session, email: str, password: str, full_name: Optional[str] = None) -> User:
+def require_admin(request: Request):
+    """Operator endpoints (system stats, shared caches) are only served with the admin token"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    token = request.headers.get(ADMIN_TOKEN_HEADER)
+    if not token or not hmac.compare_digest(token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+async def create_user(db: DBSession, email: str, password: str, full_name: Optional[str] = None) -> User:
     """Create a new user"""
     hashed_password = get_password_hash(password)
     
@@ -139,22 +339,23 @@ def create_user(db: Session, email: str, password: str, full_name: Optional[str]
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     return user
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(db: DBSession, email: str, password: str) -> Optional[User]:
     """Authenticate user with email and password"""
-    user = db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
     if not user:
         return None
     if not verify_password(password, user.hashed_password):
         return None
     return user
 
-def create_user_api_key(
-    db: Session,
+async def create_user_api_key(
+    db: DBSession,
     user_id: str,
     name: str,
     expires_at: Optional[datetime] = None
@@ -172,7 +373,7 @@ def create_user_api_key(
     )
     
     db.add(api_key_record)
-    db.commit()
-    db.refresh(api_key_record)
+    await db.commit()
+    await db.refresh(api_key_record)
     
     return api_key, api_key_record
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""Local stand-in for the Tavus API, for load tests and benchmarks
+
+Serves the endpoints TavusService calls with a configurable latency
+distribution and error rate. Point the app at it with TAVUS_API_BASE.
+
+    python benchmarks/fake_tavus.py --port 8100 --latency-ms 80 --latency-sigma 0.5 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+import uuid
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+class FakeTavus:
+    """In-memory Tavus API with lognormal latency and injected failures
+
+    Latencies are drawn from a lognormal distribution with the given median
+    and shape (``sigma`` 0 means a fixed latency). A ``slow_rate`` fraction of
+    requests additionally takes ``slow_ms`` to model a long tail, and an
+    ``error_rate`` fraction fails with a 503.
+    """
+    
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        latency_sigma: float = 0.0,
+        send_latency_ms: float = 200.0,
+        error_rate: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_ms: float = 2000.0,
+        complete_after: float = 30.0,
+        seed: int = None
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.send_latency_ms = send_latency_ms
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.complete_after = complete_after
+        self.random = random.Random(seed)
+        
+        self.conversations = {}
+        self.requests = 0
+        self.errors = 0
+    
+    def latency(self, median_ms: float) -> float:
+        """Seconds to wait for one request"""
+        ms = median_ms
+        if self.latency_sigma > 0:
+            ms = self.random.lognormvariate(math.log(max(median_ms, 0.001)), self.latency_sigma)
+        if self.slow_rate and self.random.random() < self.slow_rate:
+            ms += self.slow_ms
+        return ms / 1000
+    
+    async def respond(self, median_ms: float, body=None, status_code: int = 200):
+        self.requests += 1
+        await asyncio.sleep(self.latency(median_ms))
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            return JSONResponse({"message": "Injected failure"}, status_code=503)
+        if body is None:
+            return Response(status_code=status_code)
+        return JSONResponse(body, status_code=status_code)
+    
+    async def replicas(self, request: Request):
+        return await self.respond(self.latency_ms, {"data": [{"replica_id": "r-bench", "replica_name": "Bench"}]})
+    
+    async def personas(self, request: Request):
+        return await self.respond(self.latency_ms, {"data": [{"persona_id": "p-bench", "persona_name": "Bench"}]})
+    
+    async def create_conversation(self, request: Request):
+        await request.body()
+        conversation_id = f"c{uuid.uuid4().hex[:12]}"
+        response = await self.respond(self.latency_ms, {
+            "conversation_id": conversation_id,
+            "status": "active",
+            "conversation_url": f"https://tavus.example/{conversation_id}"
+        })
+        if response.status_code == 200:
+            self.conversations[conversation_id] = time.monotonic()
+        return response
+    
+    async def conversation(self, request: Request):
+        conversation_id = request.path_params["conversation_id"]
+        if request.method == "POST":
+            await request.body()
+            return await self.respond(self.send_latency_ms, {"response_text": "Benchmark reply", "status": "processing"})
+        if request.method == "DELETE":
+            self.conversations.pop(conversation_id, None)
+            return await self.respond(self.latency_ms, status_code=204)
+        
+        created = self.conversations.get(conversation_id)
+        completed = created is not None and time.monotonic() - created >= self.complete_after
+        return await self.respond(self.latency_ms, {
+            "conversation_id": conversation_id,
+            "status": "completed" if completed else "active",
+            "video_url": f"https://videos.tavus.example/{conversation_id}.mp4" if completed else None
+        })
+    
+    async def stats(self, request: Request):
+        return JSONResponse({
+            "requests": self.requests,
+            "errors": self.errors,
+            "conversations": len(self.conversations)
+        })
+    
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/replicas", self.replicas),
+            Route("/personas", self.personas),
+            Route("/conversations", self.create_conversation, methods=["POST"]),
+            Route("/conversations/{conversation_id}", self.conversation, methods=["GET", "POST", "DELETE"]),
+            Route("/_stats", self.stats)
+        ])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Median latency of most calls")
+    parser.add_argument("--latency-sigma", type=float, default=0.0, help="Lognormal shape; 0 for fixed latency")
+    parser.add_argument("--send-latency-ms", type=float, default=200.0, help="Median latency of message sends")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 503")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of requests taking --slow-ms extra")
+    parser.add_argument("--slow-ms", type=float, default=2000.0)
+    parser.add_argument("--complete-after", type=float, default=30.0, help="Seconds until a conversation reports completed")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    
+    fake = FakeTavus(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        send_latency_ms=args.send_latency_ms,
+        error_rate=args.error_rate,
+        slow_rate=args.slow_rate,
+        slow_ms=args.slow_ms,
+        complete_after=args.complete_after,
+        seed=args.seed
+    )
+    uvicorn.run(fake.app(), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,423 @@
+"""Load test the API at a target request rate
+
+Drives a weighted mix of conversation creation, message sends, conversation
+listing and Tavus webhook deliveries at a fixed rate. The load is open loop:
+requests start on schedule whether or not earlier ones have finished, so a
+slow server shows up as latency rather than as a lower offered rate. Reports
+throughput and p50/p95/p99 latency per operation and saves the results as
+JSON for comparison with later runs.
+
+    # Start a fake Tavus and the app locally (needs Redis), 50 rps for 60s
+    python benchmarks/loadtest.py --spawn --rps 50 --duration 60
+
+    # Same run, compared with a saved baseline; exits 1 on a regression
+    python benchmarks/loadtest.py --spawn --rps 50 --compare benchmarks/results/baseline.json
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(APP_DIR, "benchmarks", "results")
+sys.path.insert(0, APP_DIR)
+
+import httpx
+
+OPERATIONS = ("create", "message", "list", "webhook")
+BENCH_EMAIL = "loadtest@docamy.local"
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse ``create=1,message=3,...`` into operation weights"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}', expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def summarize(samples: List[tuple], elapsed: float) -> Dict[str, Any]:
+    """Throughput, error rate and latency percentiles (ms) of (latency, ok) samples"""
+    latencies = sorted(latency * 1000 for latency, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round((len(samples) - errors) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": _round(percentile(latencies, 50)),
+        "p95_ms": _round(percentile(latencies, 95)),
+        "p99_ms": _round(percentile(latencies, 99)),
+        "max_ms": _round(latencies[-1] if latencies else None)
+    }
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 2)
+
+class LoadTest:
+    def __init__(
+        self,
+        base_url: str,
+        token: str,
+        rps: float,
+        duration: float,
+        warmup: float,
+        mix: Dict[str, float],
+        max_in_flight: int,
+        webhook_secret: Optional[str] = None
+    ):
+        self.base_url = base_url
+        self.rps = rps
+        self.duration = duration
+        self.warmup = warmup
+        self.max_in_flight = max_in_flight
+        self.webhook_secret = webhook_secret
+        
+        if not webhook_secret:
+            mix = {name: weight for name, weight in mix.items() if name != "webhook"}
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+        )
+        # (app conversation id, Tavus conversation id) pairs to send messages and webhooks to
+        self.conversations: List[tuple] = []
+        self.samples: Dict[str, List[tuple]] = {name: [] for name in self.operations}
+        self.status_codes: Dict[str, Dict[int, int]] = {name: {} for name in self.operations}
+        self.dropped = 0
+        self.in_flight = 0
+    
+    async def create(self) -> httpx.Response:
+        response = await self.client.post("/api/v2/conversations", json={
+            "replica_id": "r-bench",
+            "persona_id": "p-bench",
+            "name": "Load test"
+        })
+        if response.status_code == 200:
+            body = response.json()
+            self.conversations.append((body["id"], body["tavus_conversation_id"]))
+        return response
+    
+    async def message(self) -> httpx.Response:
+        conversation_id, _ = random.choice(self.conversations)
+        return await self.client.post(
+            f"/api/v2/conversations/{conversation_id}/messages",
+            json={"text": "How is the benchmark going?"}
+        )
+    
+    async def list(self) -> httpx.Response:
+        return await self.client.get("/api/v2/conversations", params={"limit": 20})
+    
+    async def webhook(self) -> httpx.Response:
+        _, tavus_conversation_id = random.choice(self.conversations)
+        # The timestamp keeps payloads, and therefore event ids, unique
+        payload = json.dumps({
+            "event_type": "conversation.video_generated",
+            "conversation_id": tavus_conversation_id,
+            "data": {"status": "active", "video_url": f"https://videos.tavus.example/{tavus_conversation_id}.mp4"},
+            "timestamp": datetime.utcnow().isoformat()
+        }).encode()
+        signature = hmac.new(self.webhook_secret.encode(), payload, hashlib.sha256).hexdigest()
+        return await self.client.post(
+            "/api/v2/webhooks/tavus",
+            content=payload,
+            headers={"Content-Type": "application/json", "X-Tavus-Signature": f"sha256={signature}"}
+        )
+    
+    async def setup(self, conversations: int):
+        """Create the conversations messages and webhooks are spread over"""
+        for _ in range(conversations):
+            response = await self.create()
+            if response.status_code != 200:
+                raise RuntimeError(f"Could not create a conversation: {response.status_code} {response.text}")
+    
+    async def _run_one(self, name: str, record: bool):
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = await getattr(self, name)()
+            status, ok = response.status_code, response.status_code < 400
+        except httpx.HTTPError:
+            status, ok = 0, False
+        finally:
+            self.in_flight -= 1
+        if record:
+            self.samples[name].append((time.perf_counter() - started, ok))
+            codes = self.status_codes[name]
+            codes[status] = codes.get(status, 0) + 1
+    
+    async def run(self) -> Dict[str, Any]:
+        interval = 1 / self.rps
+        tasks = []
+        started = time.perf_counter()
+        measure_from = started + self.warmup
+        deadline = measure_from + self.duration
+        next_at = started
+        
+        while next_at < deadline:
+            now = time.perf_counter()
+            if next_at > now:
+                await asyncio.sleep(next_at - now)
+            record = next_at >= measure_from
+            if self.in_flight >= self.max_in_flight:
+                # Open loop: a request that can't start on time is counted, not delayed
+                if record:
+                    self.dropped += 1
+            else:
+                name = random.choices(self.operations, self.weights)[0]
+                tasks.append(asyncio.create_task(self._run_one(name, record)))
+            next_at += interval
+        
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - measure_from
+        await self.client.aclose()
+        
+        all_samples = [sample for samples in self.samples.values() for sample in samples]
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "offered_rps": self.rps,
+            "dropped": self.dropped,
+            "overall": summarize(all_samples, elapsed),
+            "operations": {
+                name: dict(summarize(samples, elapsed), status_codes=self.status_codes[name])
+                for name, samples in self.samples.items()
+            }
+        }
+
+def bootstrap_token(env: Dict[str, str]) -> str:
+    """Create (or reuse) the load test user directly in the database and sign a JWT for it"""
+    os.environ.update(env)
+    from sqlalchemy import select
+    import auth
+    import database
+    
+    async def get_user():
+        await database.init_db()
+        async with database.db_session() as db:
+            user = (await db.execute(select(database.User).where(database.User.email == BENCH_EMAIL))).scalar_one_or_none()
+            if user is None:
+                user = await auth.create_user(db, BENCH_EMAIL, "loadtest-password", "Load Test")
+        await database.close_db()
+        return user
+    
+    user = asyncio.run(get_user())
+    return auth.create_access_token({"sub": BENCH_EMAIL, "user_id": str(user.id)})
+
+def stack_env(args) -> Dict[str, str]:
+    """Environment for a local app wired to the fake Tavus"""
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": args.database_url,
+        "REDIS_URL": args.redis_url,
+        "TAVUS_API_BASE": f"http://127.0.0.1:{args.tavus_port}",
+        "TAVUS_API_KEY": "loadtest",
+        "TAVUS_WEBHOOK_SECRET": args.webhook_secret,
+        "SECRET_KEY": env.get("SECRET_KEY", "loadtest-secret-key"),
+        "ADMIN_TOKEN": env.get("ADMIN_TOKEN") or "loadtest-admin-token",
+        "ALLOWED_HOSTS": '["127.0.0.1", "localhost"]',
+        "RATE_LIMIT_ENABLED": "true" if args.rate_limits else "false",
+        "DEBUG": "false"
+    })
+    return env
+
+def start_fake_tavus(args, env: Dict[str, str]) -> subprocess.Popen:
+    command = [
+        sys.executable, os.path.join(APP_DIR, "benchmarks", "fake_tavus.py"),
+        "--port", str(args.tavus_port),
+        "--latency-ms", str(args.tavus_latency_ms),
+        "--latency-sigma", str(args.tavus_latency_sigma),
+        "--send-latency-ms", str(args.tavus_send_latency_ms),
+        "--error-rate", str(args.tavus_error_rate),
+        "--slow-rate", str(args.tavus_slow_rate)
+    ]
+    return subprocess.Popen(command, cwd=APP_DIR, env=env)
+
+def migrate(env: Dict[str, str]):
+    """Create the schema of the benchmark database"""
+    subprocess.run([sys.executable, "migrate.py"], cwd=APP_DIR, env=env, check=True)
+
+def spawn_stack(args) -> tuple:
+    """Start the fake Tavus and the app as subprocesses; returns (env, processes)"""
+    env = stack_env(args)
+    migrate(env)
+    app = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(args.port),
+        "--workers", str(args.workers), "--log-level", "warning"
+    ]
+    processes = [
+        start_fake_tavus(args, env),
+        subprocess.Popen(app, cwd=APP_DIR, env=env)
+    ]
+    return env, processes
+
+def wait_until_live(base_url: str, processes: List[subprocess.Popen], timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if any(process.poll() is not None for process in processes):
+            raise RuntimeError("A spawned process exited during startup")
+        try:
+            if httpx.get(f"{base_url}/health/live", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"{base_url} did not come up within {timeout}s")
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print per-operation deltas and return the regressions beyond ``tolerance`` percent"""
+    regressions = []
+    print(f"\nCompared with {baseline.get('label') or baseline.get('timestamp')} ({baseline.get('git_commit') or 'unknown commit'}):")
+    print(f"{'operation':<10}{'metric':>16}{'baseline':>12}{'current':>12}{'change':>10}")
+    names = ["overall"] + [name for name in current["operations"] if name in baseline["operations"]]
+    for name in names:
+        before = baseline["overall"] if name == "overall" else baseline["operations"][name]
+        after = current["overall"] if name == "overall" else current["operations"][name]
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            old, new = before.get(metric), after.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            print(f"{name:<10}{metric:>16}{old:>12}{new:>12}{change:>+9.1f}%")
+            # p99 is too noisy over short runs to gate on
+            if metric == "p95_ms" and change > tolerance:
+                regressions.append(f"{name} p95 {old}ms -> {new}ms ({change:+.1f}%)")
+            elif metric == "throughput_rps" and -change > tolerance:
+                regressions.append(f"{name} throughput {old} -> {new} rps ({change:+.1f}%)")
+        if after["error_rate"] > before["error_rate"] + 0.01:
+            regressions.append(f"{name} error rate {before['error_rate']} -> {after['error_rate']}")
+    return regressions
+
+def print_report(results: Dict[str, Any]):
+    print(f"Offered {results['offered_rps']} rps for {results['elapsed_s']}s, dropped {results['dropped']}")
+    print(f"{'operation':<10}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    rows = [("overall", results["overall"])] + list(results["operations"].items())
+    for name, row in rows:
+        print(
+            f"{name:<10}{row['requests']:>10}{row['errors']:>8}{row['throughput_rps']:>10}"
+            f"{str(row['p50_ms']):>10}{str(row['p95_ms']):>10}{str(row['p99_ms']):>10}{str(row['max_ms']):>10}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default=None, help="Target an already running server instead of --spawn")
+    parser.add_argument("--token", default=os.getenv("LOADTEST_TOKEN"), help="JWT for --base-url targets")
+    parser.add_argument("--webhook-secret", default=os.getenv("TAVUS_WEBHOOK_SECRET", "loadtest-webhook-secret"))
+    parser.add_argument("--rps", type=float, default=20.0, help="Target request rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before --duration")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("create=1,message=3,list=4,webhook=2"))
+    parser.add_argument("--conversations", type=int, default=10, help="Conversations created before the run")
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--label", default=None, help="Name stored with the results")
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/loadtest-<time>.json)")
+    parser.add_argument("--compare", default=None, help="Baseline results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Allowed p95/throughput regression in percent")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    
+    spawn = parser.add_argument_group("local stack (--spawn)")
+    spawn.add_argument("--spawn", action="store_true", help="Start a fake Tavus and the app locally")
+    spawn.add_argument("--port", type=int, default=8200)
+    spawn.add_argument("--workers", type=int, default=1)
+    spawn.add_argument("--database-url", default=f"sqlite:///{os.path.join(RESULTS_DIR, 'loadtest.db')}")
+    spawn.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379"))
+    spawn.add_argument("--rate-limits", action="store_true", help="Keep rate limiting on (off by default)")
+    spawn.add_argument("--tavus-port", type=int, default=8100)
+    spawn.add_argument("--tavus-latency-ms", type=float, default=50.0)
+    spawn.add_argument("--tavus-latency-sigma", type=float, default=0.5)
+    spawn.add_argument("--tavus-send-latency-ms", type=float, default=200.0)
+    spawn.add_argument("--tavus-error-rate", type=float, default=0.0)
+    spawn.add_argument("--tavus-slow-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    
+    if not args.spawn and not (args.base_url and args.token):
+        parser.error("either --spawn or both --base-url and --token are required")
+    random.seed(args.seed)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    
+    processes = []
+    try:
+        if args.spawn:
+            base_url = f"http://127.0.0.1:{args.port}"
+            env, processes = spawn_stack(args)
+            wait_until_live(base_url, processes)
+            token = bootstrap_token(env)
+        else:
+            base_url, token = args.base_url.rstrip("/"), args.token
+        
+        async def run():
+            test = LoadTest(
+                base_url, token, args.rps, args.duration, args.warmup, args.mix,
+                args.max_in_flight, args.webhook_secret
+            )
+            await test.setup(args.conversations)
+            return await test.run()
+        
+        results = asyncio.run(run())
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+    
+    timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    results = dict(
+        label=args.label,
+        timestamp=timestamp,
+        git_commit=git_commit(),
+        config={
+            key: value for key, value in vars(args).items()
+            if key not in ("token", "webhook_secret", "output", "compare", "json")
+        },
+        **results
+    )
+    output = args.output or os.path.join(RESULTS_DIR, f"loadtest-{timestamp}.json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+        print(f"\nResults saved to {output}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
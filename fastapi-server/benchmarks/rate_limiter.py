@@ -0,0 +1,83 @@
+"""Compare the hybrid rate limit storage with the plain Redis storage
+
+Runs the same fixed-window hits through both limits backends against a real
+Redis and reports throughput, per-hit latency and the number of Redis
+commands each one issued.
+
+    python benchmarks/rate_limiter.py --redis-url redis://localhost:6379 --hits 20000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redis
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+
+import services.rate_limit_storage  # noqa: F401  registers hybrid+redis://
+
+def redis_commands(client) -> int:
+    return int(client.info("stats")["total_commands_processed"])
+
+def run(storage_uri: str, hits: int, keys: int, redis_url: str, **options) -> dict:
+    storage = storage_from_string(storage_uri, **options)
+    limiter = FixedWindowRateLimiter(storage)
+    item = parse("1000000/minute")
+    client = redis.from_url(redis_url)
+    storage.reset()
+    
+    latencies = []
+    commands_before = redis_commands(client)
+    started = time.perf_counter()
+    for i in range(hits):
+        t0 = time.perf_counter()
+        limiter.hit(item, "bench", str(i % keys))
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    # Account for the info call itself
+    commands = redis_commands(client) - commands_before - 1
+    
+    latencies.sort()
+    return {
+        "backend": storage_uri.split("://")[0],
+        "hits": hits,
+        "hits_per_second": round(hits / elapsed),
+        "p50_us": round(latencies[len(latencies) // 2] * 1e6, 1),
+        "p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 1),
+        "mean_us": round(statistics.mean(latencies) * 1e6, 1),
+        "redis_commands": commands
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379"))
+    parser.add_argument("--hits", type=int, default=20000)
+    parser.add_argument("--keys", type=int, default=50, help="Distinct limiter keys (clients)")
+    parser.add_argument("--sync-interval", type=float, default=1.0)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+    
+    results = [
+        run(args.redis_url, args.hits, args.keys, args.redis_url),
+        run(f"hybrid+{args.redis_url}", args.hits, args.keys, args.redis_url, sync_interval=args.sync_interval)
+    ]
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    
+    print(f"{'backend':<14}{'hits/s':>12}{'p50 us':>10}{'p99 us':>10}{'mean us':>10}{'redis cmds':>12}")
+    for result in results:
+        print(
+            f"{result['backend']:<14}{result['hits_per_second']:>12}{result['p50_us']:>10}"
+            f"{result['p99_us']:>10}{result['mean_us']:>10}{result['redis_commands']:>12}"
+        )
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""Per-item cost of serializing list endpoint responses
+
+Compares the response_model path (Pydantic models, FastAPI validation,
+jsonable_encoder and stdlib json) with the trusted-payload path used by the
+list endpoints (plain dicts rendered by FastJSONResponse), for conversation
+and message pages of several sizes. Both paths are checked to produce the
+same JSON first.
+
+    python benchmarks/response_serialization.py --sizes 20,100,1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+import serialization
+from models import ConversationResponse, MessageResponse
+from serialization import FastJSONResponse, conversation_payload, message_payload
+
+def conversation_rows(count: int) -> list:
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            tavus_conversation_id=f"c{i:012d}",
+            name=f"Conversation {i}",
+            status="active",
+            created_at=now - timedelta(minutes=i),
+            updated_at=now - timedelta(seconds=i)
+        )
+        for i in range(count)
+    ]
+
+def message_rows(count: int) -> list:
+    now = datetime.utcnow()
+    conversation_id = uuid.uuid4()
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            conversation_id=conversation_id,
+            content=f"Message number {i} with a few words of content",
+            message_type="user" if i % 2 else "assistant",
+            video_url=None if i % 2 else f"https://videos.example/{i}.mp4",
+            stream_url=None,
+            created_at=now + timedelta(seconds=i)
+        )
+        for i in range(count)
+    ]
+
+def conversation_models(rows) -> list:
+    # What list_conversations returned before the trusted path
+    return [
+        ConversationResponse(
+            id=str(row.id),
+            tavus_conversation_id=row.tavus_conversation_id,
+            name=row.name,
+            status=row.status,
+            created_at=row.created_at,
+            updated_at=row.updated_at
+        )
+        for row in rows
+    ]
+
+def message_models(rows) -> list:
+    return [
+        MessageResponse(
+            id=str(row.id),
+            conversation_id=str(row.conversation_id),
+            content=row.content,
+            type=row.message_type,
+            timestamp=row.created_at,
+            video_url=row.video_url,
+            stream_url=row.stream_url
+        )
+        for row in rows
+    ]
+
+async def response_model_body(field, build_models, rows) -> bytes:
+    """Body FastAPI produces for a route returning models with response_model set"""
+    content = await serialize_response(field=field, response_content=build_models(rows))
+    return JSONResponse(content).body
+
+def trusted_body(build_payload, rows) -> bytes:
+    return FastJSONResponse([build_payload(row) for row in rows]).body
+
+async def measure(func, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        result = func()
+        if asyncio.iscoroutine(result):
+            await result
+    return (time.perf_counter() - started) / rounds
+
+async def run(sizes: List[int], budget: float) -> list:
+    cases = [
+        ("conversations", ConversationResponse, conversation_rows, conversation_models, conversation_payload),
+        ("messages", MessageResponse, message_rows, message_models, message_payload)
+    ]
+    results = []
+    for name, model, make_rows, build_models, build_payload in cases:
+        field = create_response_field(name=f"Response_{name}", type_=List[model])
+        for size in sizes:
+            rows = make_rows(size)
+            before = await response_model_body(field, build_models, rows)
+            after = trusted_body(build_payload, rows)
+            if json.loads(before) != json.loads(after):
+                raise AssertionError(f"Trusted {name} payload differs from the response_model output")
+            
+            # Aim for roughly `budget` seconds per measurement
+            rounds = max(3, int(budget / max(await measure(lambda: response_model_body(field, build_models, rows), 1), 1e-6)))
+            before_s = await measure(lambda: response_model_body(field, build_models, rows), rounds)
+            after_s = await measure(lambda: trusted_body(build_payload, rows), rounds)
+            results.append({
+                "endpoint": name,
+                "items": size,
+                "response_model_us_per_item": round(before_s / size * 1e6, 2),
+                "trusted_us_per_item": round(after_s / size * 1e6, 2),
+                "speedup": round(before_s / after_s, 1)
+            })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="20,100,1000", help="Comma-separated page sizes")
+    parser.add_argument("--budget", type=float, default=0.5, help="Approximate seconds per measurement")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+    
+    results = asyncio.run(run([int(size) for size in args.sizes.split(",")], args.budget))
+    
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    
+    print(f"JSON encoder for the trusted path: {'orjson' if serialization.orjson else 'json (orjson not installed)'}")
+    print(f"{'endpoint':<15}{'items':>7}{'before us/item':>16}{'after us/item':>15}{'speedup':>9}")
+    for result in results:
+        print(
+            f"{result['endpoint']:<15}{result['items']:>7}{result['response_model_us_per_item']:>16}"
+            f"{result['trusted_us_per_item']:>15}{result['speedup']:>8}x"
+        )
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""Throughput of the production server from 1 to N worker processes
+
+Starts a fake Tavus once, then for each worker count launches the app with
+``start.py --production`` (worker recycling off), saturates it with a fixed
+number of concurrent keep-alive clients for ``--duration`` seconds and
+records throughput and latency. Unlike loadtest.py this is closed loop: each
+client sends its next request as soon as the previous one returns, so the
+result is the capacity of the server, and the speedup over one worker shows
+how well it scales across cores. Needs Redis, like the app itself.
+
+    python benchmarks/worker_scaling.py --workers 1,2,4,8 --concurrency 64 --duration 20
+
+    # Framework overhead only, without the database
+    python benchmarks/worker_scaling.py --path /health/live
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from loadtest import (
+    APP_DIR, RESULTS_DIR, bootstrap_token, git_commit, migrate, percentile,
+    stack_env, start_fake_tavus, wait_until_live
+)
+
+async def seed_conversations(base_url: str, token: str, count: int):
+    """Make sure the list endpoint returns a full page"""
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=30.0) as client:
+        existing = (await client.get("/api/v2/conversations", params={"limit": count})).json()
+        for i in range(len(existing), count):
+            response = await client.post("/api/v2/conversations", json={
+                "replica_id": "bench-replica",
+                "persona_id": "bench-persona",
+                "conversation_name": f"Scaling {i}"
+            })
+            response.raise_for_status()
+
+async def saturate(base_url: str, path: str, token: str, concurrency: int, duration: float, warmup: float) -> Dict[str, Any]:
+    """Run ``concurrency`` clients back to back; returns throughput and latency of the measured part"""
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies: List[float] = []
+    errors = 0
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+    
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30.0) as client:
+        async def worker():
+            nonlocal errors
+            while True:
+                request_started = time.perf_counter()
+                if request_started >= stop_at:
+                    return
+                try:
+                    ok = (await client.get(path)).status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if request_started >= measure_from:
+                    latencies.append(time.perf_counter() - request_started)
+                    errors += not ok
+        
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None
+    }
+
+def worker_distribution(base_url: str, admin_token: str) -> Optional[List[int]]:
+    """Requests served by each live worker, from the published worker stats"""
+    try:
+        response = httpx.get(
+            f"{base_url}/api/v2/system/workers", headers={"X-Admin-Token": admin_token}, timeout=5.0
+        )
+        return sorted((worker["requests_total"] for worker in response.json()["workers"]), reverse=True)
+    except (httpx.HTTPError, KeyError, ValueError):
+        return None
+
+def run_workers(args, env: Dict[str, str], workers: int, token: Optional[str]) -> tuple:
+    """Start the app with ``workers`` processes and measure it; returns (result, token)"""
+    base_url = f"http://127.0.0.1:{args.port}"
+    app_env = dict(env, HOST="127.0.0.1", PORT=str(args.port), ACCESS_LOG="false", WORKER_STATS_INTERVAL="1")
+    command = [sys.executable, "start.py", "--production", "--workers", str(workers), "--max-requests", "0"]
+    process = subprocess.Popen(command, cwd=APP_DIR, env=app_env, stdout=subprocess.DEVNULL)
+    try:
+        wait_until_live(base_url, [process])
+        if token is None:
+            token = bootstrap_token(env)
+            if args.path.startswith("/api/v2/conversations"):
+                asyncio.run(seed_conversations(base_url, token, args.seed_conversations))
+        
+        result = asyncio.run(saturate(base_url, args.path, token, args.concurrency, args.duration, args.warmup))
+        result["workers"] = workers
+        # Published snapshots lag by up to WORKER_STATS_INTERVAL
+        time.sleep(1.5)
+        result["per_worker_requests"] = worker_distribution(base_url, env["ADMIN_TOKEN"])
+        return result, token
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default=None, help="Comma-separated worker counts (default: 1, 2, 4, ... up to the CPU count)")
+    parser.add_argument("--path", default="/api/v2/conversations?limit=20", help="GET path to load")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per worker count")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds before --duration")
+    parser.add_argument("--seed-conversations", type=int, default=20, help="Conversations created before the first run")
+    parser.add_argument("--port", type=int, default=8200)
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/worker-scaling-<time>.json)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    
+    stack = parser.add_argument_group("local stack")
+    stack.add_argument("--database-url", default=f"sqlite:///{os.path.join(RESULTS_DIR, 'loadtest.db')}")
+    stack.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379"))
+    stack.add_argument("--webhook-secret", default="loadtest-webhook-secret")
+    stack.add_argument("--rate-limits", action="store_true", help="Keep rate limiting on (off by default)")
+    stack.add_argument("--tavus-port", type=int, default=8100)
+    stack.add_argument("--tavus-latency-ms", type=float, default=20.0)
+    stack.add_argument("--tavus-latency-sigma", type=float, default=0.2)
+    stack.add_argument("--tavus-send-latency-ms", type=float, default=50.0)
+    stack.add_argument("--tavus-error-rate", type=float, default=0.0)
+    stack.add_argument("--tavus-slow-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    
+    sys.path.insert(0, APP_DIR)
+    from start import available_cpus, event_loop_implementations
+    cpus = available_cpus()
+    if args.workers:
+        counts = [int(count) for count in args.workers.split(",")]
+    else:
+        counts = [1]
+        while counts[-1] * 2 <= cpus:
+            counts.append(counts[-1] * 2)
+        if counts[-1] != cpus:
+            counts.append(cpus)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    
+    env = stack_env(args)
+    migrate(env)
+    fake_tavus = start_fake_tavus(args, env)
+    results = []
+    token = None
+    try:
+        for workers in counts:
+            result, token = run_workers(args, env, workers, token)
+            results.append(result)
+            if not args.json:
+                print(f"{workers} workers: {result['throughput_rps']} rps, p99 {result['p99_ms']} ms", flush=True)
+    finally:
+        fake_tavus.terminate()
+        fake_tavus.wait(timeout=30)
+    
+    baseline = results[0]["throughput_rps"] / results[0]["workers"] if results[0]["throughput_rps"] else None
+    for result in results:
+        speedup = result["throughput_rps"] / baseline if baseline else None
+        result["rps_per_worker"] = round(result["throughput_rps"] / result["workers"], 1)
+        result["efficiency"] = round(speedup / result["workers"], 2) if speedup else None
+    
+    loop, http = event_loop_implementations()
+    timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    report = {
+        "timestamp": timestamp,
+        "git_commit": git_commit(),
+        "cpus": cpus,
+        "event_loop": loop,
+        "http_parser": http,
+        "path": args.path,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "results": results
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"worker-scaling-{timestamp}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    
+    print(f"\n{cpus} CPUs, {loop} event loop, {http} HTTP parser, GET {args.path}, {args.concurrency} clients")
+    print(f"{'workers':>8}{'rps':>10}{'rps/worker':>12}{'efficiency':>12}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}  per-worker requests")
+    for result in results:
+        print(
+            f"{result['workers']:>8}{result['throughput_rps']:>10}{result['rps_per_worker']:>12}"
+            f"{str(result['efficiency']):>12}{str(result['p50_ms']):>10}{str(result['p99_ms']):>10}"
+            f"{result['errors']:>8}  {result['per_worker_requests']}"
+        )
+    print(f"\nResults saved to {output}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -11,11 +11,28 @@ class Settings(BaseSettings):
     # Server settings
     HOST: str = Field(default="0.0.0.0", env="HOST")
     PORT: int = Field(default=8001, env="PORT")
+    # Production mode (start.py --production): worker processes (0 = one per
+    # available CPU), recycling after MAX_REQUESTS (+ up to MAX_REQUESTS_JITTER)
+    # requests to bound memory growth, and seconds to finish in-flight requests
+    WEB_CONCURRENCY: int = Field(default=0, env="WEB_CONCURRENCY")
+    MAX_REQUESTS: int = Field(default=10000, env="MAX_REQUESTS")
+    MAX_REQUESTS_JITTER: int = Field(default=1000, env="MAX_REQUESTS_JITTER")
+    GRACEFUL_TIMEOUT: int = Field(default=30, env="GRACEFUL_TIMEOUT")
+    WORKER_TIMEOUT: int = Field(default=60, env="WORKER_TIMEOUT")
+    KEEPALIVE_TIMEOUT: int = Field(default=5, env="KEEPALIVE_TIMEOUT")
+    ACCESS_LOG: bool = Field(default=True, env="ACCESS_LOG")
+    # Seconds between per-worker stats snapshots published to Redis
+    WORKER_STATS_INTERVAL: float = Field(default=10.0, env="WORKER_STATS_INTERVAL")
     
     # Security
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # API key principal cache TTL and last_used write-behind interval (seconds)
+    API_KEY_CACHE_TTL: int = Field(default=60, env="API_KEY_CACHE_TTL")
+    API_KEY_LAST_USED_FLUSH_INTERVAL: int = Field(default=30, env="API_KEY_LAST_USED_FLUSH_INTERVAL")
+    # X-Admin-Token value required by the /api/v2/system endpoints (unset disables them)
+    ADMIN_TOKEN: str = Field(default="", env="ADMIN_TOKEN")
     
     # CORS
     ALLOWED_ORIGINS: List[str] = Field(
@@ -29,10 +46,26 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = Field(..., env="DATABASE_URL")
+    DATABASE_ASYNC_URL: str = Field(default="", env="DATABASE_ASYNC_URL")
+    # "async" uses a native async driver, "threadpool" runs the sync driver in threads
+    DATABASE_MODE: str = Field(default="async", env="DATABASE_MODE")
+    # Run the migrations at startup instead of with migrate.py (development only)
+    AUTO_CREATE_SCHEMA: bool = Field(default=False, env="AUTO_CREATE_SCHEMA")
+    # Monthly messages partitions kept created ahead of time (PostgreSQL)
+    MESSAGES_PARTITION_MONTHS_AHEAD: int = Field(default=3, env="MESSAGES_PARTITION_MONTHS_AHEAD")
+    DATABASE_POOL_SIZE: int = Field(default=10, env="DATABASE_POOL_SIZE")
+    DATABASE_MAX_OVERFLOW: int = Field(default=20, env="DATABASE_MAX_OVERFLOW")
     
     # Redis
     REDIS_URL: str = Field(default="redis://localhost:6379", env="REDIS_URL")
     
+    # Rate limiting: "hybrid" counts in process and syncs to Redis every
+    # RATE_LIMIT_SYNC_INTERVAL seconds, "redis" hits Redis on every request
+    RATE_LIMIT_BACKEND: str = Field(default="hybrid", env="RATE_LIMIT_BACKEND")
+    RATE_LIMIT_SYNC_INTERVAL: float = Field(default=1.0, env="RATE_LIMIT_SYNC_INTERVAL")
+    # Only meant to be turned off for load tests driven from a single address
+    RATE_LIMIT_ENABLED: bool = Field(default=True, env="RATE_LIMIT_ENABLED")
+    
     # Tavus API
     TAVUS_API_KEY: str = Field(..., env="TAVUS_API_KEY")
     TAVUS_API_BASE: str = Field(
@@ -41,6 +74,129 @@ class Settings(BaseSettings):
     )
     TAVUS_WEBHOOK_SECRET: str = Field(..., env="TAVUS_WEBHOOK_SECRET")
     
+    # Tavus HTTP client pool
+    TAVUS_HTTP_MAX_CONNECTIONS: int = Field(default=100, env="TAVUS_HTTP_MAX_CONNECTIONS")
+    TAVUS_HTTP_MAX_KEEPALIVE: int = Field(default=20, env="TAVUS_HTTP_MAX_KEEPALIVE")
+    TAVUS_HTTP_KEEPALIVE_EXPIRY: float = Field(default=30.0, env="TAVUS_HTTP_KEEPALIVE_EXPIRY")
+    TAVUS_HTTP_CONNECT_TIMEOUT: float = Field(default=5.0, env="TAVUS_HTTP_CONNECT_TIMEOUT")
+    TAVUS_HTTP2: bool = Field(default=True, env="TAVUS_HTTP2")
+    
+    # Per-operation circuit breakers for Tavus calls: open when at least
+    # FAILURE_RATE of the last WINDOW calls (MIN_CALLS minimum) failed or took
+    # longer than SLOW_CALL_SECONDS (MESSAGE_SLOW_CALL_SECONDS for send_message,
+    # which is slow by nature), then probe again after RESET_TIMEOUT
+    TAVUS_BREAKER_ENABLED: bool = Field(default=True, env="TAVUS_BREAKER_ENABLED")
+    TAVUS_BREAKER_WINDOW: int = Field(default=20, env="TAVUS_BREAKER_WINDOW")
+    TAVUS_BREAKER_MIN_CALLS: int = Field(default=10, env="TAVUS_BREAKER_MIN_CALLS")
+    TAVUS_BREAKER_FAILURE_RATE: float = Field(default=0.5, env="TAVUS_BREAKER_FAILURE_RATE")
+    TAVUS_BREAKER_SLOW_CALL_SECONDS: float = Field(default=10.0, env="TAVUS_BREAKER_SLOW_CALL_SECONDS")
+    TAVUS_BREAKER_MESSAGE_SLOW_CALL_SECONDS: float = Field(default=50.0, env="TAVUS_BREAKER_MESSAGE_SLOW_CALL_SECONDS")
+    TAVUS_BREAKER_RESET_TIMEOUT: float = Field(default=30.0, env="TAVUS_BREAKER_RESET_TIMEOUT")
+    TAVUS_BREAKER_HALF_OPEN_CALLS: int = Field(default=3, env="TAVUS_BREAKER_HALF_OPEN_CALLS")
+    
+    # Hedged status lookups: retry in parallel once the first attempt is slower
+    # than the recent HEDGE_PERCENTILE latency (clamped to MIN/MAX_DELAY seconds)
+    TAVUS_HEDGE_ENABLED: bool = Field(default=False, env="TAVUS_HEDGE_ENABLED")
+    TAVUS_HEDGE_PERCENTILE: float = Field(default=95.0, env="TAVUS_HEDGE_PERCENTILE")
+    TAVUS_HEDGE_MIN_DELAY: float = Field(default=0.05, env="TAVUS_HEDGE_MIN_DELAY")
+    TAVUS_HEDGE_MAX_DELAY: float = Field(default=2.0, env="TAVUS_HEDGE_MAX_DELAY")
+    TAVUS_HEDGE_MAX_ATTEMPTS: int = Field(default=2, env="TAVUS_HEDGE_MAX_ATTEMPTS")
+    
+    # Retries of transient Tavus failures (total attempts, backoff in seconds)
+    TAVUS_RETRY_ATTEMPTS: int = Field(default=3, env="TAVUS_RETRY_ATTEMPTS")
+    TAVUS_RETRY_BASE_DELAY: float = Field(default=0.2, env="TAVUS_RETRY_BASE_DELAY")
+    TAVUS_RETRY_MAX_DELAY: float = Field(default=2.0, env="TAVUS_RETRY_MAX_DELAY")
+    
+    # Idempotency-Key records (seconds): completed responses are replayed for
+    # IDEMPOTENCY_TTL; duplicates of an in-flight request wait up to
+    # IDEMPOTENCY_WAIT_TIMEOUT; IDEMPOTENCY_LOCK_TTL bounds a crashed request's claim
+    IDEMPOTENCY_TTL: int = Field(default=86400, env="IDEMPOTENCY_TTL")
+    IDEMPOTENCY_LOCK_TTL: int = Field(default=120, env="IDEMPOTENCY_LOCK_TTL")
+    IDEMPOTENCY_WAIT_TIMEOUT: float = Field(default=30.0, env="IDEMPOTENCY_WAIT_TIMEOUT")
+    
+    # Conversation status poller
+    STATUS_POLL_INTERVAL: float = Field(default=10.0, env="STATUS_POLL_INTERVAL")
+    STATUS_POLL_MAX_INTERVAL: float = Field(default=120.0, env="STATUS_POLL_MAX_INTERVAL")
+    STATUS_POLL_BACKOFF: float = Field(default=1.5, env="STATUS_POLL_BACKOFF")
+    STATUS_POLL_MAX_ATTEMPTS: int = Field(default=30, env="STATUS_POLL_MAX_ATTEMPTS")
+    STATUS_POLL_CONCURRENCY: int = Field(default=20, env="STATUS_POLL_CONCURRENCY")
+    STATUS_POLL_FLUSH_INTERVAL: float = Field(default=2.0, env="STATUS_POLL_FLUSH_INTERVAL")
+    
+    # Prometheus metrics at /metrics, totalled over all workers in Redis
+    # every METRICS_PUBLISH_INTERVAL seconds
+    METRICS_ENABLED: bool = Field(default=True, env="METRICS_ENABLED")
+    METRICS_PUBLISH_INTERVAL: float = Field(default=5.0, env="METRICS_PUBLISH_INTERVAL")
+    
+    # Per-request profiling (needs pyinstrument); requests opt in with
+    # X-Profile plus X-Profile-Token, or every PROFILING_SAMPLE_EVERY-th
+    # request to PROFILING_SAMPLE_ROUTE ("METHOD /path/{template}") is sampled
+    PROFILING_ENABLED: bool = Field(default=False, env="PROFILING_ENABLED")
+    PROFILING_ADMIN_TOKEN: str = Field(default="", env="PROFILING_ADMIN_TOKEN")
+    PROFILING_INTERVAL: float = Field(default=0.001, env="PROFILING_INTERVAL")
+    PROFILING_DIR: str = Field(default="profiles", env="PROFILING_DIR")
+    PROFILING_MAX_PROFILES: int = Field(default=100, env="PROFILING_MAX_PROFILES")
+    PROFILING_SAMPLE_ROUTE: str = Field(default="", env="PROFILING_SAMPLE_ROUTE")
+    PROFILING_SAMPLE_EVERY: int = Field(default=0, env="PROFILING_SAMPLE_EVERY")
+    
+    # Message archive (archive.py): messages of completed/errored conversations
+    # not updated for ARCHIVE_AFTER_DAYS move to gzipped JSONL under ARCHIVE_DIR
+    ARCHIVE_DIR: str = Field(default="archive", env="ARCHIVE_DIR")
+    ARCHIVE_AFTER_DAYS: int = Field(default=90, env="ARCHIVE_AFTER_DAYS")
+    ARCHIVE_BATCH_SIZE: int = Field(default=100, env="ARCHIVE_BATCH_SIZE")
+    ARCHIVE_DELETE_CHUNK: int = Field(default=1000, env="ARCHIVE_DELETE_CHUNK")
+    ARCHIVE_CACHE_SIZE: int = Field(default=128, env="ARCHIVE_CACHE_SIZE")
+    
+    # Background purge of deleted conversations: Tavus deletes are retried with
+    # backoff up to REAPER_MAX_ATTEMPTS, messages are deleted in chunks
+    REAPER_INTERVAL: float = Field(default=30.0, env="REAPER_INTERVAL")
+    REAPER_BATCH_SIZE: int = Field(default=50, env="REAPER_BATCH_SIZE")
+    REAPER_DELETE_CHUNK: int = Field(default=1000, env="REAPER_DELETE_CHUNK")
+    REAPER_CONCURRENCY: int = Field(default=5, env="REAPER_CONCURRENCY")
+    REAPER_MAX_ATTEMPTS: int = Field(default=8, env="REAPER_MAX_ATTEMPTS")
+    REAPER_RETRY_BASE_DELAY: float = Field(default=30.0, env="REAPER_RETRY_BASE_DELAY")
+    REAPER_RETRY_MAX_DELAY: float = Field(default=3600.0, env="REAPER_RETRY_MAX_DELAY")
+    REAPER_LEASE: float = Field(default=300.0, env="REAPER_LEASE")
+    
+    # Run the startup Tavus connection check in the background after startup
+    STARTUP_DEFER_PROBES: bool = Field(default=True, env="STARTUP_DEFER_PROBES")
+    
+    # Background health probes (seconds)
+    HEALTH_CHECK_DATABASE_INTERVAL: float = Field(default=10.0, env="HEALTH_CHECK_DATABASE_INTERVAL")
+    HEALTH_CHECK_REDIS_INTERVAL: float = Field(default=10.0, env="HEALTH_CHECK_REDIS_INTERVAL")
+    HEALTH_CHECK_TAVUS_INTERVAL: float = Field(default=30.0, env="HEALTH_CHECK_TAVUS_INTERVAL")
+    HEALTH_CHECK_TIMEOUT: float = Field(default=5.0, env="HEALTH_CHECK_TIMEOUT")
+    HEALTH_CHECK_FAILURE_THRESHOLD: int = Field(default=2, env="HEALTH_CHECK_FAILURE_THRESHOLD")
+    
+    # Batch conversation creation
+    CONVERSATION_BATCH_MAX_SIZE: int = Field(default=500, env="CONVERSATION_BATCH_MAX_SIZE")
+    CONVERSATION_BATCH_CONCURRENCY: int = Field(default=10, env="CONVERSATION_BATCH_CONCURRENCY")
+    
+    # Per-user usage counters (seconds)
+    USAGE_STATS_FLUSH_INTERVAL: float = Field(default=5.0, env="USAGE_STATS_FLUSH_INTERVAL")
+    USAGE_STATS_RECONCILE_INTERVAL: float = Field(default=3600.0, env="USAGE_STATS_RECONCILE_INTERVAL")
+    
+    # Streaming message responses (seconds)
+    MESSAGE_STREAM_HEARTBEAT: float = Field(default=10.0, env="MESSAGE_STREAM_HEARTBEAT")
+    MESSAGE_STREAM_VIDEO_WAIT: float = Field(default=120.0, env="MESSAGE_STREAM_VIDEO_WAIT")
+    
+    # Rows fetched per round trip when streaming message history as NDJSON
+    MESSAGE_HISTORY_CHUNK_SIZE: int = Field(default=500, env="MESSAGE_HISTORY_CHUNK_SIZE")
+    
+    # Conversation status cache (seconds)
+    STATUS_CACHE_MAX_AGE: float = Field(default=15.0, env="STATUS_CACHE_MAX_AGE")
+    STATUS_CACHE_TTL: int = Field(default=86400, env="STATUS_CACHE_TTL")
+    
+    # Webhook ingestion queue (Redis stream)
+    WEBHOOK_BATCH_SIZE: int = Field(default=100, env="WEBHOOK_BATCH_SIZE")
+    WEBHOOK_CLAIM_IDLE_MS: int = Field(default=60000, env="WEBHOOK_CLAIM_IDLE_MS")
+    WEBHOOK_STREAM_MAXLEN: int = Field(default=100000, env="WEBHOOK_STREAM_MAXLEN")
+    # Failed attempts before an event is moved to the dead-letter stream
+    WEBHOOK_MAX_ATTEMPTS: int = Field(default=10, env="WEBHOOK_MAX_ATTEMPTS")
+    
+    # Replica/persona catalog cache (seconds)
+    CATALOG_CACHE_TTL: int = Field(default=300, env="CATALOG_CACHE_TTL")
+    CATALOG_CACHE_STALE_TTL: int = Field(default=3600, env="CATALOG_CACHE_STALE_TTL")
+    
     # Rate limiting
     RATE_LIMIT_PER_MINUTE: int = Field(default=60, env="RATE_LIMIT_PER_MINUTE")
     
@@ -1,16 +1,78 @@
-from sqlalchemy import create_engine, Column, String, DateTime, Text, Integer, Boolean, ForeignKey
+from sqlalchemy import create_engine, text, Column, String, DateTime, Text, Integer, Boolean, ForeignKey, Index, Uuid
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, Session, relationship
-from sqlalchemy.dialects.postgresql import UUID
-from datetime import datetime
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+import logging
+import os
+import re
 import uuid
 from config import settings
+from metrics import instrument_engine, instrument_sessions
+
+logger = logging.getLogger(__name__)
+
+# Sync driver prefix -> async driver prefix
+ASYNC_DRIVERS = {
+    "postgresql+psycopg2://": "postgresql+asyncpg://",
+    "postgresql://": "postgresql+asyncpg://",
+    "postgres://": "postgresql+asyncpg://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
+
+def get_async_database_url() -> str:
+    """Async driver URL, derived from DATABASE_URL unless set explicitly"""
+    if settings.DATABASE_ASYNC_URL:
+        return settings.DATABASE_ASYNC_URL
+    
+    for sync_prefix, async_prefix in ASYNC_DRIVERS.items():
+        if settings.DATABASE_URL.startswith(sync_prefix):
+            return async_prefix + settings.DATABASE_URL[len(sync_prefix):]
+    
+    return settings.DATABASE_URL
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Connection pool options (SQLite manages its own pool)"""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW
+    }
 
 # Database setup
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
+# Native async engine, only built when DATABASE_MODE=async
+if settings.DATABASE_MODE == "async":
+    async_engine = create_async_engine(get_async_database_url(), **_engine_options(get_async_database_url()))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine)
+    instrument_sessions(Session)
+
+class UUID(TypeDecorator):
+    """Native uuid on PostgreSQL, CHAR(32) on SQLite; accepts ids as strings on both"""
+    impl = Uuid
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is not None and not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value
+
 # Database models
 class User(Base):
     __tablename__ = "users"
@@ -40,12 +102,36 @@ class Conversation(Base):
     stream_url = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Tombstone: set by delete_conversation, the row and its messages are
+    # purged later by the ConversationReaper
+    deleted_at = Column(DateTime, nullable=True)
+    purge_after = Column(DateTime, nullable=True)
+    purge_attempts = Column(Integer, default=0, nullable=False)
     
     # Relationships
     user = relationship("User", back_populates="conversations")
     messages = relationship("Message", back_populates="conversation")
+    
+    __table_args__ = (
+        # Backs keyset pagination of a user's conversations by (updated_at, id)
+        Index("ix_conversations_user_updated_id", "user_id", "updated_at", "id"),
+        # Tombstones due for purging; live rows are left out of the index
+        Index(
+            "ix_conversations_purge_after",
+            "purge_after",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL")
+        ),
+    )
 
 class Message(Base):
+    """On PostgreSQL the table is range-partitioned by month of created_at
+
+    Partitions are named messages_yYYYYmMM and created ahead of time by
+    migrate.py and the archive job (ensure_message_partitions); rows outside
+    them land in messages_default. The partition key has to be part of the
+    primary key.
+    """
     __tablename__ = "messages"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -54,17 +140,23 @@ class Message(Base):
     message_type = Column(String, nullable=False)  # 'user' or 'assistant'
     video_url = Column(String)
     stream_url = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
     
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
+    
+    __table_args__ = (
+        # Backs keyset pagination and streaming of a conversation's messages
+        Index("ix_messages_conversation_created_id", "conversation_id", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
 class APIKey(Base):
     __tablename__ = "api_keys"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    key_hash = Column(String, nullable=False)
+    key_hash = Column(String, unique=True, index=True, nullable=False)
     name = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     last_used = Column(DateTime)
@@ -75,20 +167,234 @@ class WebhookEvent(Base):
     __tablename__ = "webhook_events"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_id = Column(String, unique=True, index=True)  # sha256 of the delivered payload
     event_type = Column(String, nullable=False)
     conversation_id = Column(String, nullable=False)
     data = Column(Text)  # JSON data
     processed = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+class ThreadedSession:
+    """Async facade over a sync Session that runs every database call in the threadpool
+    
+    Mirrors the subset of AsyncSession used by the services, so the same code runs
+    in both DATABASE_MODE=threadpool and DATABASE_MODE=async.
+    """
+    
+    def __init__(self, session: Session):
+        self.sync_session = session
+    
+    @property
+    def info(self) -> Dict[str, Any]:
+        return self.sync_session.info
+    
+    def add(self, instance):
+        self.sync_session.add(instance)
+    
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+    
+    async def execute(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, statement, params, **kwargs)
+    
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kwargs)
+    
+    async def scalars(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalars, statement, params, **kwargs)
+    
+    async def get(self, entity, ident):
+        return await run_in_threadpool(self.sync_session.get, entity, ident)
+    
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+    
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+    
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+    
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+    
+    async def refresh(self, instance):
+        await run_in_threadpool(self.sync_session.refresh, instance)
+    
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+DBSession = Union[AsyncSession, ThreadedSession]
+
+async def stream_partitions(db: DBSession, statement, size: int):
+    """Yield result rows in chunks of ``size`` from a server-side cursor
+    
+    Rows are fetched as they are consumed instead of being buffered, so large
+    result sets can be streamed with bounded memory in either DATABASE_MODE.
+    """
+    statement = statement.execution_options(yield_per=size)
+    if isinstance(db, ThreadedSession):
+        result = await db.execute(statement)
+        try:
+            while True:
+                rows = await run_in_threadpool(result.fetchmany, size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            await run_in_threadpool(result.close)
+    else:
+        result = await db.stream(statement)
+        async for rows in result.partitions(size):
+            yield rows
+
 # Database dependency
 async def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = ThreadedSession(SessionLocal())
+        try:
+            yield db
+        finally:
+            await db.close()
+
+# Session for background tasks, outside of request dependencies
+db_session = asynccontextmanager(get_db)
+
+# Schema migrations (alembic revisions in migrations/)
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+def _alembic_config(connection=None):
+    from alembic.config import Config
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    config.attributes["connection"] = connection
+    return config
+
+def pending_migrations(connection=None) -> List[str]:
+    """Revisions not applied to the database yet, oldest first"""
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    if connection is None:
+        with engine.connect() as connection:
+            return pending_migrations(connection)
+    applied = set(MigrationContext.configure(connection).get_current_heads())
+    pending = []
+    for script in ScriptDirectory.from_config(_alembic_config()).walk_revisions():
+        if script.revision in applied:
+            break
+        pending.append(script.revision)
+    return pending[::-1]
+
+def upgrade_schema(connection=None) -> Tuple[List[str], List[str]]:
+    """Apply pending migrations (migrate.py) and create upcoming messages partitions
+
+    Returns the revisions applied and the partitions created.
+    """
+    from alembic import command
+    if connection is None:
+        with engine.begin() as connection:
+            return upgrade_schema(connection)
+    pending = pending_migrations(connection)
+    command.upgrade(_alembic_config(connection), "head")
+    return pending, ensure_message_partitions(connection, settings.MESSAGES_PARTITION_MONTHS_AHEAD)
+
+# Monthly partitions of messages (PostgreSQL only)
+MESSAGE_PARTITION_PATTERN = re.compile(r"^messages_y(\d{4})m(\d{2})$")
+MESSAGE_DEFAULT_PARTITION = "messages_default"
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def message_partition_name(month: date) -> str:
+    return f"messages_y{month.year:04d}m{month.month:02d}"
+
+def messages_partitioned(connection) -> bool:
+    """Whether the messages table is a partitioned table (tables created before partitioning are not)"""
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('messages'))"
+    )).scalar())
+
+def message_partitions(connection) -> List[str]:
+    """Names of the partitions attached to messages"""
+    return list(connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('messages') ORDER BY c.relname"
+    )).scalars())
+
+def ensure_message_partitions(connection, months_ahead: int, start: Optional[date] = None) -> List[str]:
+    """Create the partitions from ``start``'s month (default: this month) to ``months_ahead`` months later
+
+    Returns the partitions created. A month whose rows already sit in the
+    default partition cannot get its own partition; it is logged and skipped.
+    """
+    if not messages_partitioned(connection):
+        return []
+    existing = set(message_partitions(connection))
+    first = (start or datetime.utcnow().date()).replace(day=1)
+    created = []
+    for offset in range(months_ahead + 1):
+        lower = _add_months(first, offset)
+        name = message_partition_name(lower)
+        if name in existing:
+            continue
+        try:
+            with connection.begin_nested():
+                connection.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF messages "
+                    f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{_add_months(lower, 1).isoformat()}')"
+                ))
+            created.append(name)
+        except Exception as e:
+            logger.warning(f"Could not create partition {name}: {e}")
+    if MESSAGE_DEFAULT_PARTITION not in existing:
+        connection.execute(text(f"CREATE TABLE {MESSAGE_DEFAULT_PARTITION} PARTITION OF messages DEFAULT"))
+        created.append(MESSAGE_DEFAULT_PARTITION)
+    return created
+
+def drop_empty_message_partitions(connection, before: date) -> List[str]:
+    """Drop monthly partitions that end on or before ``before`` and hold no rows (archived months)"""
+    if not messages_partitioned(connection):
+        return []
+    dropped = []
+    for name in message_partitions(connection):
+        match = MESSAGE_PARTITION_PATTERN.match(name)
+        if not match or _add_months(date(int(match.group(1)), int(match.group(2)), 1), 1) > before:
+            continue
+        if connection.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+            continue
+        connection.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    return dropped
+
+def _ping(connection):
+    connection.execute(text("SELECT 1"))
 
-# Initialize database
 async def init_db():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    """Check the database is reachable, opening the first pooled connection
+
+    The schema is migrated by the separate migration step (migrate.py), or
+    here only when AUTO_CREATE_SCHEMA is set.
+    """
+    if async_engine is not None:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(upgrade_schema if settings.AUTO_CREATE_SCHEMA else _ping)
+    else:
+        def connect():
+            with engine.begin() as conn:
+                if settings.AUTO_CREATE_SCHEMA:
+                    upgrade_schema(conn)
+                else:
+                    _ping(conn)
+        await run_in_threadpool(connect)
+
+async def close_db():
+    """Dispose of database connection pools"""
+    if async_engine is not None:
+        await async_engine.dispose()
+    await run_in_threadpool(engine.dispose)
\ No newline at end of file
@@ -1,15 +1,22 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request
+# Imported first so the startup report includes the time spent importing the app
+from startup import StartupTimer
+startup_timer = StartupTimer()
+
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from contextlib import asynccontextmanager
 import httpx
 import os
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set
 from datetime import datetime, timedelta
 import asyncio
+import hashlib
+import json
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -17,18 +24,41 @@ import redis.asyncio as redis
 
 from models import (
     ConversationRequest, 
+    ConversationBatchRequest,
+    ConversationBatchItem,
+    ConversationBatchResponse,
     MessageRequest, 
     ConversationResponse,
     MessageResponse,
     WebhookEvent,
     HealthResponse,
-    ErrorResponse
+    ProfilingSamplingRequest,
+    ErrorResponse,
+    ConversationStats,
+    UsageStats,
+    UserStatsResponse,
+    FINAL_STATUSES
 )
 from config import settings
-from database import get_db, init_db
-from auth import verify_api_key, get_current_user
+from metrics import MetricsMiddleware, MetricsPublisher, instrument_redis, registry as metrics_registry
+from profiling import ProfilingMiddleware, RequestProfiler, TOKEN_HEADER
+from serialization import FastJSONResponse, conversation_payload, dumps, message_payload
+from worker import WorkerStats, WorkerStatsMiddleware
+from database import get_db, db_session, init_db, close_db
+from auth import verify_api_key, get_current_user, require_admin, revoke_api_key, api_key_usage, principal_cache
 from services.tavus_service import TavusService
-from services.conversation_service import ConversationService
+from services.resilience import CircuitOpenError
+from services.idempotency import IdempotencyInProgress, IdempotencyKeyMismatch, IdempotencyStore
+from services.conversation_service import ConversationService, encode_cursor
+from services.message_archive import MessageArchive
+from services.conversation_reaper import ConversationReaper
+from services.cache_service import SWRCache
+from services.status_poller import ConversationStatusPoller
+from services.webhook_queue import WebhookQueue
+from services.status_cache import ConversationStatusCache
+from services.usage_stats import UsageStatsService
+from services.rate_limit_storage import HybridRedisStorage
+from services.health_service import HealthProber
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -36,27 +66,86 @@ logger = logging.getLogger(__name__)
 
 # Redis for rate limiting
 redis_client = redis.from_url(settings.REDIS_URL)
-limiter = Limiter(key_func=get_remote_address, storage_uri=settings.REDIS_URL)
+if settings.METRICS_ENABLED:
+    instrument_redis(redis_client)
+metrics_publisher = MetricsPublisher(metrics_registry, redis_client, interval=settings.METRICS_PUBLISH_INTERVAL)
+if settings.RATE_LIMIT_BACKEND == "hybrid":
+    limiter = Limiter(
+        key_func=get_remote_address,
+        storage_uri=f"hybrid+{settings.REDIS_URL}",
+        storage_options={"sync_interval": settings.RATE_LIMIT_SYNC_INTERVAL},
+        enabled=settings.RATE_LIMIT_ENABLED
+    )
+else:
+    limiter = Limiter(
+        key_func=get_remote_address,
+        storage_uri=settings.REDIS_URL,
+        enabled=settings.RATE_LIMIT_ENABLED
+    )
+
+async def verify_tavus_connection():
+    try:
+        connected = await asyncio.wait_for(tavus_service.test_connection(), settings.HEALTH_CHECK_TIMEOUT)
+    except asyncio.TimeoutError:
+        connected = False
+    if connected:
+        logger.info("✅ Tavus API connection verified")
+    else:
+        logger.warning("⚠️ Tavus API connection failed")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
     logger.info("🚀 Starting DocAmy FastAPI Server...")
-    await init_db()
-    logger.info("✅ Database initialized")
+    # Dependencies are set up concurrently; the database and Redis must be
+    # reachable, the schema itself is migrated by migrate.py
+    await startup_timer.run_concurrently("dependencies", {
+        "database": init_db(),
+        "redis": redis_client.ping(),
+        "tavus_client": tavus_service.start(),
+        "webhook_queue": webhook_queue.start()
+    })
+    logger.info("✅ Database and Redis connected")
     
-    # Test Tavus API connection
-    tavus_service = TavusService()
-    if await tavus_service.test_connection():
-        logger.info("✅ Tavus API connection verified")
+    async with startup_timer.phase("background_tasks"):
+        await catalog_cache.start()
+        await api_key_usage.start()
+        await principal_cache.start(redis_client)
+        await usage_stats.start()
+        await status_poller.start()
+        await health_prober.start()
+        await worker_stats.start()
+        if settings.METRICS_ENABLED:
+            await metrics_publisher.start()
+        await conversation_reaper.start()
+    
+    # Tavus is not needed to serve traffic (the health prober keeps checking
+    # it), so by default the first probe runs after startup
+    if settings.STARTUP_DEFER_PROBES:
+        startup_timer.defer("tavus_probe", verify_tavus_connection())
     else:
-        logger.warning("⚠️ Tavus API connection failed")
+        async with startup_timer.phase("tavus_probe"):
+            await verify_tavus_connection()
+    startup_timer.finish()
     
     yield
     
     # Shutdown
     logger.info("🔄 Shutting down DocAmy FastAPI Server...")
+    await startup_timer.stop()
+    await conversation_reaper.stop()
+    await metrics_publisher.stop()
+    await worker_stats.stop()
+    await health_prober.stop()
+    await webhook_queue.stop()
+    await status_poller.stop()
+    await catalog_cache.stop()
+    await principal_cache.stop()
+    await api_key_usage.stop()
+    await usage_stats.stop()
+    await tavus_service.close()
+    await close_db()
     await redis_client.close()
 
 # Create FastAPI app
@@ -66,6 +155,7 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=FastJSONResponse,
     lifespan=lifespan
 )
 
@@ -85,12 +175,122 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency histograms per route template
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Per-worker request counters
+worker_stats = WorkerStats(
+    redis_client,
+    interval=settings.WORKER_STATS_INTERVAL,
+    max_requests=settings.MAX_REQUESTS
+)
+app.add_middleware(WorkerStatsMiddleware, stats=worker_stats)
+
+# On-demand and sampled request profiling; outermost so middleware time is included
+request_profiler = RequestProfiler(
+    output_dir=settings.PROFILING_DIR,
+    admin_token=settings.PROFILING_ADMIN_TOKEN,
+    interval=settings.PROFILING_INTERVAL,
+    max_profiles=settings.PROFILING_MAX_PROFILES,
+    sample_route=settings.PROFILING_SAMPLE_ROUTE,
+    sample_every=settings.PROFILING_SAMPLE_EVERY
+)
+if settings.PROFILING_ENABLED:
+    if not request_profiler.available:
+        logger.warning("PROFILING_ENABLED is set but pyinstrument is not installed")
+    app.add_middleware(ProfilingMiddleware, profiler=request_profiler)
+
 # Security scheme
 security = HTTPBearer()
 
 # Services
 tavus_service = TavusService()
-conversation_service = ConversationService()
+status_cache = ConversationStatusCache(
+    redis_client,
+    max_age=settings.STATUS_CACHE_MAX_AGE,
+    ttl=settings.STATUS_CACHE_TTL
+)
+async def load_usage_counts() -> Dict[str, Dict[str, int]]:
+    async with db_session() as db:
+        return await conversation_service.count_usage(db)
+
+usage_stats = UsageStatsService(
+    redis_client,
+    flush_interval=settings.USAGE_STATS_FLUSH_INTERVAL,
+    reconcile_interval=settings.USAGE_STATS_RECONCILE_INTERVAL,
+    counts_loader=load_usage_counts
+)
+message_archive = MessageArchive(settings.ARCHIVE_DIR, cache_size=settings.ARCHIVE_CACHE_SIZE)
+conversation_service = ConversationService(status_cache=status_cache, usage_stats=usage_stats, archive=message_archive)
+conversation_reaper = ConversationReaper(
+    tavus_service,
+    archive=message_archive,
+    interval=settings.REAPER_INTERVAL,
+    batch_size=settings.REAPER_BATCH_SIZE,
+    delete_chunk=settings.REAPER_DELETE_CHUNK,
+    concurrency=settings.REAPER_CONCURRENCY,
+    max_attempts=settings.REAPER_MAX_ATTEMPTS,
+    retry_base_delay=settings.REAPER_RETRY_BASE_DELAY,
+    retry_max_delay=settings.REAPER_RETRY_MAX_DELAY,
+    lease=settings.REAPER_LEASE
+)
+idempotency_store = IdempotencyStore(
+    redis_client,
+    ttl=settings.IDEMPOTENCY_TTL,
+    lock_ttl=settings.IDEMPOTENCY_LOCK_TTL,
+    wait_timeout=settings.IDEMPOTENCY_WAIT_TIMEOUT
+)
+catalog_cache = SWRCache(
+    "catalog",
+    ttl=settings.CATALOG_CACHE_TTL,
+    stale_ttl=settings.CATALOG_CACHE_STALE_TTL,
+    redis_client=redis_client
+)
+status_poller = ConversationStatusPoller(
+    tavus_service,
+    conversation_service,
+    base_interval=settings.STATUS_POLL_INTERVAL,
+    max_interval=settings.STATUS_POLL_MAX_INTERVAL,
+    backoff_factor=settings.STATUS_POLL_BACKOFF,
+    max_attempts=settings.STATUS_POLL_MAX_ATTEMPTS,
+    concurrency=settings.STATUS_POLL_CONCURRENCY,
+    flush_interval=settings.STATUS_POLL_FLUSH_INTERVAL,
+    status_cache=status_cache
+)
+
+def on_webhook_events_processed(events: List[WebhookEvent]):
+    """Every Tavus event type carries a final status, so stop polling"""
+    for event in events:
+        status_poller.cancel(event.conversation_id)
+
+webhook_queue = WebhookQueue(
+    redis_client,
+    conversation_service,
+    on_processed=on_webhook_events_processed,
+    batch_size=settings.WEBHOOK_BATCH_SIZE,
+    claim_idle_ms=settings.WEBHOOK_CLAIM_IDLE_MS,
+    maxlen=settings.WEBHOOK_STREAM_MAXLEN,
+    max_attempts=settings.WEBHOOK_MAX_ATTEMPTS
+)
+
+health_prober = HealthProber(
+    timeout=settings.HEALTH_CHECK_TIMEOUT,
+    failure_threshold=settings.HEALTH_CHECK_FAILURE_THRESHOLD
+)
+health_prober.register("database", conversation_service.health_check, settings.HEALTH_CHECK_DATABASE_INTERVAL)
+health_prober.register("redis", redis_client.ping, settings.HEALTH_CHECK_REDIS_INTERVAL)
+# Tavus being down degrades the service but taking workers out of rotation won't help
+health_prober.register("tavus_api", tavus_service.test_connection, settings.HEALTH_CHECK_TAVUS_INTERVAL, critical=False)
+
+@app.middleware("http")
+async def count_api_calls(request: Request, call_next):
+    response = await call_next(request)
+    # Set by get_current_user for authenticated requests
+    user_id = getattr(request.state, "user_id", None)
+    if user_id:
+        usage_stats.record_api_call(user_id)
+    return response
 
 @app.get("/", response_model=Dict[str, str])
 async def root():
@@ -103,79 +303,161 @@ async def root():
     }
 
 @app.get("/health", response_model=HealthResponse)
-@limiter.limit("30/minute")
-async def health_check(request: Request):
-    """Health check endpoint"""
-    try:
-        # Check database connection
-        db_status = await conversation_service.health_check()
-        
-        # Check Tavus API
-        tavus_status = await tavus_service.test_connection()
-        
-        # Check Redis
-        redis_status = await redis_client.ping()
-        
-        return HealthResponse(
-            status="healthy" if all([db_status, tavus_status, redis_status]) else "degraded",
-            timestamp=datetime.utcnow(),
-            services={
-                "database": "healthy" if db_status else "unhealthy",
-                "tavus_api": "healthy" if tavus_status else "unhealthy",
-                "redis": "healthy" if redis_status else "unhealthy"
-            },
-            version="2.0.0"
+async def health_check():
+    """Health check endpoint
+    
+    Served from the background prober's last results, so it never waits on
+    (or sends traffic to) the dependencies themselves.
+    """
+    checks = health_prober.snapshot()
+    return HealthResponse(
+        status=health_prober.status(),
+        timestamp=datetime.utcnow(),
+        services={name: check["status"] for name, check in checks.items()},
+        version=settings.APP_VERSION,
+        checks=checks
+    )
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: critical dependencies (database, Redis) are healthy"""
+    if not health_prober.is_ready():
+        return JSONResponse(
+            status_code=503,
+            content=jsonable_encoder({"status": "not_ready", "checks": health_prober.snapshot()})
         )
+    return {"status": "ready"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of the latency histograms of all workers"""
+    return PlainTextResponse(
+        await metrics_publisher.collect(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@app.get("/api/v2/system/tavus-pool", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def tavus_pool_stats():
+    """Connection pool statistics for the shared Tavus HTTP client"""
+    return tavus_service.pool_stats()
+
+@app.get("/api/v2/system/idempotency", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def idempotency_stats():
+    """Claim, replay and conflict counters for Idempotency-Key handling"""
+    return idempotency_store.stats()
+
+@app.get("/api/v2/system/archive", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def archive_stats():
+    """Size of the message archive and read cache counters"""
+    return await message_archive.stats()
+
+@app.get("/api/v2/system/reaper", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def reaper_stats():
+    """Purge counters of deleted conversations on this worker"""
+    return conversation_reaper.stats()
+
+@app.get("/api/v2/system/startup", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def startup_report():
+    """Duration of each startup phase of this worker"""
+    return startup_timer.report()
+
+@app.get("/api/v2/system/worker", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def worker_stats_current():
+    """Stats of the worker process serving this request"""
+    return worker_stats.snapshot()
+
+@app.get("/api/v2/system/workers", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def worker_stats_fleet():
+    """Latest stats of every live worker, as published to Redis"""
+    try:
+        workers = await worker_stats.fleet()
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return HealthResponse(
-            status="unhealthy",
-            timestamp=datetime.utcnow(),
-            services={
-                "database": "unknown",
-                "tavus_api": "unknown", 
-                "redis": "unknown"
-            },
-            version="2.0.0",
-            error=str(e)
-        )
+        logger.error(f"Error reading worker stats: {e}")
+        workers = [worker_stats.snapshot()]
+    return {
+        "workers": workers,
+        "count": len(workers),
+        "requests_total": sum(worker["requests_total"] for worker in workers),
+        "rss_bytes": sum(worker["rss_bytes"] or 0 for worker in workers)
+    }
+
+@app.get("/api/v2/system/tavus-circuits", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def tavus_circuit_stats():
+    """Circuit breaker state and hedging delays per Tavus operation"""
+    return tavus_service.resilience_stats()
+
+def _tavus_properties(conversation_req: ConversationRequest) -> Optional[Dict[str, Any]]:
+    if conversation_req.properties is None:
+        return None
+    return conversation_req.properties.dict(exclude_none=True)
 
 @app.post("/api/v2/conversations", response_model=ConversationResponse)
 @limiter.limit("10/minute")
 async def create_conversation(
     request: Request,
     conversation_req: ConversationRequest,
-    background_tasks: BackgroundTasks,
+    idempotency_key: Optional[str] = Header(default=None, max_length=255),
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
-    """Create a new conversation with Tavus"""
+    """Create a new conversation with Tavus
+    
+    With an Idempotency-Key header, retries of the same request (same key and
+    body) wait for or replay the first one instead of creating duplicates.
+    """
+    claim = None
+    if idempotency_key:
+        try:
+            claim = await idempotency_store.claim(
+                str(current_user["id"]),
+                idempotency_key,
+                IdempotencyStore.fingerprint(conversation_req.dict())
+            )
+        except IdempotencyKeyMismatch:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        except IdempotencyInProgress:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        
+        if claim is not None and claim.replay is not None:
+            return JSONResponse(
+                claim.replay["body"],
+                status_code=claim.replay["status_code"],
+                headers={"Idempotent-Replayed": "true"}
+            )
+    
     try:
         # Create conversation with Tavus
         tavus_response = await tavus_service.create_conversation(
             replica_id=conversation_req.replica_id,
             persona_id=conversation_req.persona_id,
-            properties=conversation_req.properties
+            properties=_tavus_properties(conversation_req)
         )
         
-        # Store in database
-        conversation = await conversation_service.create_conversation(
-            db=db,
-            user_id=current_user["id"],
-            tavus_conversation_id=tavus_response["conversation_id"],
-            name=conversation_req.name,
-            replica_id=conversation_req.replica_id,
-            persona_id=conversation_req.persona_id
-        )
+        # Store in database; don't leave an orphaned Tavus conversation behind
+        # for a retry to duplicate if that fails
+        try:
+            conversation = await conversation_service.create_conversation(
+                db=db,
+                user_id=current_user["id"],
+                tavus_conversation_id=tavus_response["conversation_id"],
+                name=conversation_req.name,
+                replica_id=conversation_req.replica_id,
+                persona_id=conversation_req.persona_id
+            )
+        except Exception:
+            await tavus_service.delete_conversation(tavus_response["conversation_id"])
+            raise
         
-        # Background task to monitor conversation status
-        background_tasks.add_task(
-            monitor_conversation_status,
-            tavus_response["conversation_id"]
-        )
+        # Poll conversation status until it completes
+        status_poller.track(tavus_response["conversation_id"])
         
-        return ConversationResponse(
-            id=conversation.id,
+        response = ConversationResponse(
+            id=str(conversation.id),
             tavus_conversation_id=tavus_response["conversation_id"],
             name=conversation.name,
             status=conversation.status,
@@ -183,10 +465,116 @@ async def create_conversation(
             video_url=tavus_response.get("video_url"),
             stream_url=tavus_response.get("stream_url")
         )
+        if claim is not None:
+            await idempotency_store.complete(claim, 200, jsonable_encoder(response))
+        return response
         
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"Error creating conversation: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Let a retry with the same key run again after a failure
+        if claim is not None and not claim.completed:
+            await idempotency_store.release(claim)
+
+@app.post("/api/v2/conversations/batch", response_model=ConversationBatchResponse)
+@limiter.limit("5/minute")
+async def create_conversations_batch(
+    request: Request,
+    batch_req: ConversationBatchRequest,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """Create several conversations at once
+    
+    Tavus calls run concurrently (at most CONVERSATION_BATCH_CONCURRENCY at a
+    time) and the created conversations are stored with one bulk insert.
+    Items fail individually; results are returned in request order. Batch
+    creates have their own Tavus circuit breaker, so a failing batch fails
+    fast without opening the circuit for other users' single creates.
+    """
+    items = batch_req.conversations
+    if len(items) > settings.CONVERSATION_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.CONVERSATION_BATCH_MAX_SIZE} conversations per batch"
+        )
+    
+    semaphore = asyncio.Semaphore(settings.CONVERSATION_BATCH_CONCURRENCY)
+    
+    async def create_upstream(conversation_req: ConversationRequest) -> Dict[str, Any]:
+        async with semaphore:
+            return await tavus_service.create_conversation(
+                replica_id=conversation_req.replica_id,
+                persona_id=conversation_req.persona_id,
+                properties=_tavus_properties(conversation_req),
+                batch=True
+            )
+    
+    outcomes = await asyncio.gather(*(create_upstream(item) for item in items), return_exceptions=True)
+    
+    results: List[ConversationBatchItem] = []
+    created = []
+    for index, (conversation_req, outcome) in enumerate(zip(items, outcomes)):
+        if isinstance(outcome, Exception):
+            results.append(ConversationBatchItem(index=index, success=False, error=str(outcome)))
+        else:
+            created.append((index, conversation_req, outcome))
+    
+    try:
+        conversations = await conversation_service.create_conversations(
+            db=db,
+            user_id=current_user["id"],
+            conversations=[
+                {
+                    "tavus_conversation_id": tavus_response["conversation_id"],
+                    "name": conversation_req.name,
+                    "replica_id": conversation_req.replica_id,
+                    "persona_id": conversation_req.persona_id
+                }
+                for _, conversation_req, tavus_response in created
+            ]
+        )
+    except Exception as e:
+        logger.error(f"Error storing conversation batch: {e}")
+        
+        # Don't leave conversations running in Tavus that we have no record of
+        async def delete_upstream(tavus_conversation_id: str):
+            async with semaphore:
+                await tavus_service.delete_conversation(tavus_conversation_id)
+        
+        await asyncio.gather(*(delete_upstream(resp["conversation_id"]) for _, _, resp in created))
+        results.extend(
+            ConversationBatchItem(index=index, success=False, error="Failed to store conversation")
+            for index, _, _ in created
+        )
+        created, conversations = [], []
+    
+    for (index, _, tavus_response), conversation in zip(created, conversations):
+        status_poller.track(tavus_response["conversation_id"])
+        results.append(ConversationBatchItem(
+            index=index,
+            success=True,
+            conversation=ConversationResponse(
+                id=str(conversation.id),
+                tavus_conversation_id=conversation.tavus_conversation_id,
+                name=conversation.name,
+                status=conversation.status,
+                created_at=conversation.created_at,
+                updated_at=conversation.updated_at,
+                video_url=tavus_response.get("video_url"),
+                stream_url=tavus_response.get("stream_url")
+            )
+        ))
+    
+    results.sort(key=lambda item: item.index)
+    return ConversationBatchResponse(
+        created=len(created),
+        failed=len(items) - len(created),
+        results=results
+    )
 
 @app.post("/api/v2/conversations/{conversation_id}/messages", response_model=MessageResponse)
 @limiter.limit("20/minute")
@@ -210,32 +598,44 @@ async def send_message(
         if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found")
         
-        # Send message to Tavus
-        tavus_response = await tavus_service.send_message(
-            conversation_id=conversation.tavus_conversation_id,
-            text=message_req.text
+        # Insert the user message while the Tavus call is in flight; both
+        # messages and the conversation timestamp commit together afterwards
+        user_insert, tavus_result = await asyncio.gather(
+            conversation_service.append_messages(
+                db=db,
+                conversation_id=conversation.id,
+                messages=[{"content": message_req.text, "message_type": "user"}],
+                commit=False
+            ),
+            tavus_service.send_message(
+                conversation_id=conversation.tavus_conversation_id,
+                text=message_req.text
+            ),
+            return_exceptions=True
         )
+        for outcome in (user_insert, tavus_result):
+            if isinstance(outcome, BaseException):
+                await db.rollback()
+                raise outcome
+        message, tavus_response = user_insert[0], tavus_result
         
-        # Store message in database
-        message = await conversation_service.add_message(
+        # Store AI response and commit the turn
+        replies = []
+        if tavus_response.get("response_text"):
+            replies.append({
+                "content": tavus_response["response_text"],
+                "message_type": "assistant",
+                "video_url": tavus_response.get("video_url"),
+                "stream_url": tavus_response.get("stream_url")
+            })
+        await conversation_service.append_messages(
             db=db,
             conversation_id=conversation.id,
-            content=message_req.text,
-            message_type="user"
+            messages=replies
         )
         
-        # Store AI response
-        if tavus_response.get("response_text"):
-            await conversation_service.add_message(
-                db=db,
-                conversation_id=conversation.id,
-                content=tavus_response["response_text"],
-                message_type="assistant",
-                video_url=tavus_response.get("video_url")
-            )
-        
         return MessageResponse(
-            id=message.id,
+            id=str(message.id),
             conversation_id=conversation_id,
             content=message_req.text,
             type="user",
@@ -245,12 +645,215 @@ async def send_message(
             status=tavus_response.get("status", "processing")
         )
         
-    except HTTPException:
+    except (HTTPException, CircuitOpenError):
         raise
     except Exception as e:
         logger.error(f"Error sending message: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v2/conversations/{conversation_id}/messages", response_model=List[MessageResponse])
+@limiter.limit("30/minute")
+async def list_messages(
+    request: Request,
+    conversation_id: str,
+    skip: int = 0,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """List conversation messages, oldest first
+    
+    Pass the X-Next-Cursor response header back as ?cursor= to fetch the next
+    page. With ?stream=true the whole transcript is returned as NDJSON, read
+    from a server-side cursor in chunks instead of being loaded at once.
+    """
+    conversation = await conversation_service.get_conversation(
+        db=db,
+        conversation_id=conversation_id,
+        user_id=current_user["id"]
+    )
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    if stream:
+        async def rows():
+            async with db_session() as stream_db:
+                async for chunk in conversation_service.iter_conversation_messages(
+                    db=stream_db,
+                    conversation_id=conversation_id,
+                    user_id=current_user["id"],
+                    chunk_size=settings.MESSAGE_HISTORY_CHUNK_SIZE
+                ):
+                    yield b"".join(dumps(message_payload(row)) + b"\n" for row in chunk)
+        
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+    
+    try:
+        messages = await conversation_service.get_conversation_messages(
+            db=db,
+            conversation_id=conversation_id,
+            user_id=current_user["id"],
+            skip=skip,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    headers = {}
+    if messages and len(messages) == limit:
+        last = messages[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    
+    # Rows come from our own database, so skip response_model validation
+    return FastJSONResponse([message_payload(row) for row in messages], headers=headers)
+
+def _sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Events frame"""
+    payload = data if isinstance(data, str) else json.dumps(data, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+# Streamed message turns in flight; the event loop only keeps weak references
+# to tasks, so a turn whose client disconnected would otherwise be collectable
+_message_turns: Set[asyncio.Task] = set()
+
+def _message_turn_done(task: asyncio.Task):
+    _message_turns.discard(task)
+    # Retrieve the exception here so a turn that failed after its client left is still logged
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Error completing message turn: {task.exception()}")
+
+async def _complete_message_turn(conversation, text: str) -> Dict[str, Any]:
+    """Send a message to Tavus and persist the assistant reply
+    
+    Runs as its own task so the reply is stored even if the streaming client
+    disconnects.
+    """
+    tavus_response = await tavus_service.send_message(
+        conversation_id=conversation.tavus_conversation_id,
+        text=text
+    )
+    
+    assistant_message = None
+    if tavus_response.get("response_text"):
+        async with db_session() as db:
+            assistant_message = await conversation_service.add_message(
+                db=db,
+                conversation_id=conversation.id,
+                content=tavus_response["response_text"],
+                message_type="assistant",
+                video_url=tavus_response.get("video_url"),
+                stream_url=tavus_response.get("stream_url")
+            )
+    
+    return {"tavus_response": tavus_response, "assistant_message": assistant_message}
+
+@app.post("/api/v2/conversations/{conversation_id}/messages/stream")
+@limiter.limit("20/minute")
+async def stream_message(
+    request: Request,
+    conversation_id: str,
+    message_req: MessageRequest,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """Send a message and stream its progress as Server-Sent Events
+    
+    Events: ack (persisted user message), status, message (assistant reply),
+    video (URLs once available), error and done.
+    """
+    conversation = await conversation_service.get_conversation(
+        db=db,
+        conversation_id=conversation_id,
+        user_id=current_user["id"]
+    )
+    
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    # Persist the user message before anything is streamed
+    message = await conversation_service.add_message(
+        db=db,
+        conversation_id=conversation.id,
+        content=message_req.text,
+        message_type="user"
+    )
+    ack = MessageResponse(
+        id=str(message.id),
+        conversation_id=conversation_id,
+        content=message.content,
+        type="user",
+        timestamp=message.created_at,
+        status="received"
+    )
+    
+    turn = asyncio.create_task(_complete_message_turn(conversation, message_req.text))
+    _message_turns.add(turn)
+    turn.add_done_callback(_message_turn_done)
+    
+    async def events():
+        yield _sse("ack", ack.json())
+        yield _sse("status", {"status": "processing"})
+        
+        # Keep the connection alive while Tavus generates the reply
+        while not turn.done():
+            done, _ = await asyncio.wait({turn}, timeout=settings.MESSAGE_STREAM_HEARTBEAT)
+            if not done:
+                yield ": keep-alive\n\n"
+        
+        try:
+            result = turn.result()
+        except Exception as e:
+            # Logged by _message_turn_done
+            yield _sse("error", {"error": str(e)})
+            return
+        
+        tavus_response = result["tavus_response"]
+        assistant_message = result["assistant_message"]
+        status = tavus_response.get("status", "processing")
+        video_url = tavus_response.get("video_url")
+        stream_url = tavus_response.get("stream_url")
+        
+        if assistant_message is not None:
+            yield _sse("message", MessageResponse(
+                id=str(assistant_message.id),
+                conversation_id=conversation_id,
+                content=assistant_message.content,
+                type="assistant",
+                timestamp=assistant_message.created_at,
+                video_url=video_url,
+                stream_url=stream_url,
+                status=status
+            ).json())
+        
+        # Wait for the video from the webhook/poller-fed status cache
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.MESSAGE_STREAM_VIDEO_WAIT
+        while not (video_url or stream_url) and status not in FINAL_STATUSES and loop.time() < deadline:
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(1)
+            cached = await status_cache.get(conversation.tavus_conversation_id)
+            if not cached:
+                continue
+            if cached["status"] and cached["status"] != status:
+                status = cached["status"]
+                yield _sse("status", {"status": status})
+            video_url = cached["video_url"]
+            stream_url = cached["stream_url"]
+        
+        if video_url or stream_url:
+            yield _sse("video", {"video_url": video_url, "stream_url": stream_url, "status": status})
+        yield _sse("done", {"status": status})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/v2/conversations/{conversation_id}", response_model=ConversationResponse)
 @limiter.limit("60/minute")
 async def get_conversation(
@@ -270,13 +873,39 @@ async def get_conversation(
         if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found")
         
-        # Get latest status from Tavus
-        tavus_status = await tavus_service.get_conversation_status(
-            conversation.tavus_conversation_id
-        )
+        # Final statuses are already in the database; otherwise prefer the
+        # webhook/poller-fed cache and only fall back to Tavus when stale
+        if conversation.status in FINAL_STATUSES:
+            tavus_status = {
+                "status": conversation.status,
+                "video_url": conversation.video_url,
+                "stream_url": conversation.stream_url
+            }
+        else:
+            tavus_status = await status_cache.get(conversation.tavus_conversation_id)
+        
+        if tavus_status is None:
+            try:
+                tavus_status = await tavus_service.get_conversation_status(
+                    conversation.tavus_conversation_id
+                )
+            except CircuitOpenError:
+                # Tavus is failing: serve the last stored status instead of an error
+                tavus_status = {
+                    "status": conversation.status,
+                    "video_url": conversation.video_url,
+                    "stream_url": conversation.stream_url
+                }
+            else:
+                await status_cache.set(
+                    conversation.tavus_conversation_id,
+                    tavus_status.get("status"),
+                    video_url=tavus_status.get("video_url"),
+                    stream_url=tavus_status.get("stream_url")
+                )
         
         return ConversationResponse(
-            id=conversation.id,
+            id=str(conversation.id),
             tavus_conversation_id=conversation.tavus_conversation_id,
             name=conversation.name,
             status=tavus_status.get("status", conversation.status),
@@ -298,35 +927,39 @@ async def list_conversations(
     request: Request,
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
-    """List user conversations"""
+    """List user conversations
+    
+    Pass the X-Next-Cursor response header back as ?cursor= to fetch the next
+    page without OFFSET scanning.
+    """
     try:
         conversations = await conversation_service.list_conversations(
             db=db,
             user_id=current_user["id"],
             skip=skip,
-            limit=limit
+            limit=limit,
+            cursor=cursor
         )
         
-        return [
-            ConversationResponse(
-                id=conv.id,
-                tavus_conversation_id=conv.tavus_conversation_id,
-                name=conv.name,
-                status=conv.status,
-                created_at=conv.created_at,
-                updated_at=conv.updated_at
-            )
-            for conv in conversations
-        ]
+        headers = {}
+        if conversations and len(conversations) == limit:
+            last = conversations[-1]
+            headers["X-Next-Cursor"] = encode_cursor(last.updated_at, last.id)
+        
+        # Rows come from our own database, so skip response_model validation
+        return FastJSONResponse([conversation_payload(conv) for conv in conversations], headers=headers)
         
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Error listing conversations: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/api/v2/conversations/{conversation_id}")
+@app.delete("/api/v2/conversations/{conversation_id}", status_code=202)
 @limiter.limit("10/minute")
 async def delete_conversation(
     request: Request,
@@ -334,7 +967,11 @@ async def delete_conversation(
     current_user: dict = Depends(get_current_user),
     db = Depends(get_db)
 ):
-    """Delete a conversation"""
+    """Delete a conversation
+    
+    The conversation disappears right away; deleting it from Tavus and
+    purging its messages happens in the background.
+    """
     try:
         conversation = await conversation_service.get_conversation(
             db=db,
@@ -345,16 +982,16 @@ async def delete_conversation(
         if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found")
         
-        # Delete from Tavus
-        await tavus_service.delete_conversation(conversation.tavus_conversation_id)
-        
-        # Delete from database
-        await conversation_service.delete_conversation(
+        deleted = await conversation_service.delete_conversation(
             db=db,
             conversation_id=conversation_id,
             user_id=current_user["id"]
         )
+        if not deleted:
+            raise HTTPException(status_code=404, detail="Conversation not found")
         
+        status_poller.cancel(conversation.tavus_conversation_id)
+        conversation_reaper.wake()
         return {"message": "Conversation deleted successfully"}
         
     except HTTPException:
@@ -363,30 +1000,45 @@ async def delete_conversation(
         logger.error(f"Error deleting conversation: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.delete("/api/v2/auth/api-keys/{api_key_id}")
+@limiter.limit("10/minute")
+async def delete_api_key(
+    request: Request,
+    api_key_id: str,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """Revoke one of the current user's API keys on every worker"""
+    if not await revoke_api_key(db, api_key_id, current_user["id"]):
+        raise HTTPException(status_code=404, detail="API key not found")
+    return {"message": "API key revoked"}
+
 @app.post("/api/v2/webhooks/tavus")
 @limiter.limit("100/minute")
 async def tavus_webhook(
     request: Request,
-    webhook_event: WebhookEvent,
-    background_tasks: BackgroundTasks
+    webhook_event: WebhookEvent
 ):
     """Handle Tavus webhook events"""
     try:
         # Verify webhook signature
+        payload = await request.body()
         signature = request.headers.get("x-tavus-signature")
         if not tavus_service.verify_webhook_signature(
-            payload=await request.body(),
+            payload=payload,
             signature=signature
         ):
             raise HTTPException(status_code=401, detail="Invalid webhook signature")
         
-        # Process webhook event in background
-        background_tasks.add_task(
-            process_webhook_event,
-            webhook_event
-        )
+        # Acknowledge only once the event is durably queued; redeliveries share an id
+        event_id = hashlib.sha256(payload).hexdigest()
+        try:
+            await webhook_queue.enqueue(event_id, webhook_event.json())
+        except Exception as e:
+            logger.error(f"Error queueing webhook event: {e}")
+            raise HTTPException(status_code=503, detail="Webhook queue unavailable")
         
-        return {"status": "received"}
+        return {"status": "received", "event_id": event_id}
         
     except HTTPException:
         raise
@@ -394,6 +1046,40 @@ async def tavus_webhook(
         logger.error(f"Error processing webhook: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/v2/stats", response_model=UserStatsResponse)
+@limiter.limit("60/minute")
+async def get_user_stats(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_db)
+):
+    """Usage statistics for the current user, served from incremental counters"""
+    try:
+        stats = await usage_stats.get(current_user["id"])
+        if stats is None:
+            # First read for this user: seed the counters from the database
+            counts = await conversation_service.count_usage(db, current_user["id"])
+            await usage_stats.seed(counts)
+            stats = await usage_stats.get(current_user["id"])
+        
+        total_conversations = stats["conversations"]
+        return UserStatsResponse(
+            conversations=ConversationStats(
+                total_conversations=total_conversations,
+                active_conversations=stats["active_conversations"],
+                total_messages=stats["messages"],
+                avg_conversation_length=(stats["messages"] / total_conversations) if total_conversations > 0 else 0
+            ),
+            usage=UsageStats(
+                api_calls_today=stats["api_calls_today"],
+                api_calls_this_month=stats["api_calls_this_month"]
+            )
+        )
+        
+    except Exception as e:
+        logger.error(f"Error getting user stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/v2/replicas", response_model=List[Dict[str, Any]])
 @limiter.limit("30/minute")
 async def list_replicas(
@@ -402,8 +1088,10 @@ async def list_replicas(
 ):
     """List available Tavus replicas"""
     try:
-        replicas = await tavus_service.list_replicas()
+        replicas = await catalog_cache.get("replicas", tavus_service.list_replicas)
         return replicas
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"Error listing replicas: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -416,61 +1104,112 @@ async def list_personas(
 ):
     """List available Tavus personas"""
     try:
-        personas = await tavus_service.list_personas()
+        personas = await catalog_cache.get("personas", tavus_service.list_personas)
         return personas
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"Error listing personas: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Background tasks
-async def monitor_conversation_status(tavus_conversation_id: str):
-    """Monitor conversation status and update database"""
-    max_attempts = 30
-    attempt = 0
+@app.delete("/api/v2/catalog/cache", dependencies=[Depends(require_admin)])
+@limiter.limit("10/minute")
+async def invalidate_catalog_cache(
+    request: Request,
+    key: Optional[str] = None
+):
+    """Invalidate cached replicas/personas on every worker (admin only)"""
+    if key is not None and key not in ("replicas", "personas"):
+        raise HTTPException(status_code=400, detail="key must be 'replicas' or 'personas'")
     
-    while attempt < max_attempts:
-        try:
-            status = await tavus_service.get_conversation_status(tavus_conversation_id)
-            
-            if status.get("status") in ["completed", "error"]:
-                # Update database with final status
-                async with get_db() as db:
-                    await conversation_service.update_conversation_status(
-                        db=db,
-                        tavus_conversation_id=tavus_conversation_id,
-                        status=status["status"],
-                        video_url=status.get("video_url")
-                    )
-                break
-                
-            await asyncio.sleep(10)  # Wait 10 seconds before next check
-            attempt += 1
-            
-        except Exception as e:
-            logger.error(f"Error monitoring conversation {tavus_conversation_id}: {e}")
-            break
+    await catalog_cache.invalidate(key)
+    return {"message": "Catalog cache invalidated", "key": key or "all"}
+
+@app.get("/api/v2/system/status-poller", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def status_poller_stats():
+    """Scheduler statistics for the conversation status poller"""
+    return status_poller.stats()
+
+@app.get("/api/v2/system/webhook-queue", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def webhook_queue_stats():
+    """Depth, pending count and drain lag of the webhook queue"""
+    return await webhook_queue.stats()
+
+@app.get("/api/v2/system/status-cache", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def status_cache_stats():
+    """Hit/stale/miss counters for the conversation status cache"""
+    return status_cache.stats()
 
-async def process_webhook_event(webhook_event: WebhookEvent):
-    """Process Tavus webhook events"""
+@app.get("/api/v2/system/usage-stats", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def usage_stats_stats():
+    """Usage counter maintenance statistics for this worker"""
+    return usage_stats.stats()
+
+@app.get("/api/v2/system/rate-limiter", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def rate_limiter_stats():
+    """Local counter and sync statistics for the hybrid rate limit storage"""
+    storage = limiter._storage
+    if isinstance(storage, HybridRedisStorage):
+        return {"backend": "hybrid", **storage.stats()}
+    return {"backend": settings.RATE_LIMIT_BACKEND}
+
+@app.get("/api/v2/system/catalog-cache", response_model=Dict[str, Any], dependencies=[Depends(require_admin)])
+async def catalog_cache_stats():
+    """Hit/miss statistics for the replica/persona catalog cache"""
+    return catalog_cache.stats()
+
+def require_profiling_admin(request: Request):
+    """Profiling endpoints are only served with the admin profiling token"""
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not request_profiler.authorized(request.headers.get(TOKEN_HEADER)):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+@app.get("/api/v2/system/profiling", response_model=Dict[str, Any], dependencies=[Depends(require_profiling_admin)])
+async def profiling_status():
+    """Profiling configuration, counters and stored profiles"""
+    return {**request_profiler.stats(), "profiles": request_profiler.list_profiles()}
+
+@app.put("/api/v2/system/profiling/sampling", response_model=Dict[str, Any], dependencies=[Depends(require_profiling_admin)])
+async def update_profiling_sampling(sampling: ProfilingSamplingRequest):
+    """Change rolling sampling on this worker without a restart; every=0 turns it off"""
     try:
-        async with get_db() as db:
-            await conversation_service.handle_webhook_event(
-                db=db,
-                event=webhook_event
-            )
-    except Exception as e:
-        logger.error(f"Error processing webhook event: {e}")
+        request_profiler.set_sampling(sampling.route, sampling.every)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return request_profiler.stats()
+
+@app.get("/api/v2/system/profiling/profiles/{name}", dependencies=[Depends(require_profiling_admin)])
+async def download_profile(name: str):
+    """Download a stored profile (open it at https://www.speedscope.app)"""
+    path = request_profiler.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=os.path.basename(path))
 
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
-        content=ErrorResponse(
+        content=jsonable_encoder(ErrorResponse(
             error=exc.detail,
             status_code=exc.status_code,
             timestamp=datetime.utcnow()
-        ).dict()
+        ).dict())
+    )
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(max(1, int(exc.retry_after)))},
+        content=jsonable_encoder(ErrorResponse(
+            error="Tavus API is temporarily unavailable",
+            status_code=503,
+            timestamp=datetime.utcnow(),
+            details={"circuit": exc.name}
+        ).dict())
     )
 
 @app.exception_handler(Exception)
@@ -478,19 +1217,16 @@ async def general_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unhandled exception: {exc}")
     return JSONResponse(
         status_code=500,
-        content=ErrorResponse(
+        content=jsonable_encoder(ErrorResponse(
             error="Internal server error",
             status_code=500,
             timestamp=datetime.utcnow()
-        ).dict()
+        ).dict())
     )
 
+startup_timer.record("import", startup_timer.started_at)
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8001,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    # start.py picks development (single process, reload with DEBUG) or production mode
+    import start
+    start.main()
\ No newline at end of file
@@ -0,0 +1,321 @@
+import asyncio
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    """Prometheus-style histogram with fixed buckets, kept per label combination"""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+    
+    @contextmanager
+    def time(self, *labelvalues: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+    
+    def snapshot(self) -> Dict[Tuple[str, ...], Tuple[List[int], float]]:
+        """Copy of the per-bucket counts and sum of every label combination"""
+        with self._lock:
+            return {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+    
+    def render(self, series: Optional[Dict[Tuple[str, ...], Tuple[List[int], float]]] = None) -> List[str]:
+        """Exposition lines of this process's series, or of ``series`` when given"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        if series is None:
+            series = self.snapshot()
+        for labels, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Histogram] = []
+    
+    @property
+    def metrics(self) -> List[Histogram]:
+        return list(self._metrics)
+    
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, **kwargs)
+        self._metrics.append(metric)
+        return metric
+    
+    def render(self, series: Optional[Dict[str, Dict]] = None) -> str:
+        """Exposition of this process's histograms, or of ``series`` (by metric name) when given"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render(None if series is None else series.get(metric.name, {})))
+        return "\n".join(lines) + "\n"
+
+class MetricsPublisher:
+    """Adds this worker's observations to histogram totals shared in Redis
+
+    Each worker process keeps its own histograms. Every ``interval`` seconds
+    the counts and sums observed since the last publish are added, in one
+    MULTI/EXEC, to a hash per metric (``<prefix>:<metric name>``), so the
+    totals cover every worker, including recycled ones, and only ever grow
+    like Prometheus counters should. ``collect`` renders those totals; if
+    Redis is unavailable it falls back to this worker's histograms and the
+    unpublished observations are added on the next successful publish.
+    """
+    
+    def __init__(self, registry: MetricsRegistry, redis_client, interval: float = 5.0, prefix: str = "docamy:metrics"):
+        self.registry = registry
+        self.redis = redis_client
+        self.interval = interval
+        self.prefix = prefix
+        # Series as of the last successful publish, by metric name
+        self._published: Dict[str, Dict[Tuple[str, ...], Tuple[List[int], float]]] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+    
+    def _key(self, metric: Histogram) -> str:
+        return f"{self.prefix}:{metric.name}"
+    
+    async def publish(self):
+        """Add the observations made since the last publish to the shared totals"""
+        async with self._lock:
+            snapshots = {metric.name: metric.snapshot() for metric in self.registry.metrics}
+            pipe = self.redis.pipeline(transaction=True)
+            changed = False
+            for metric in self.registry.metrics:
+                published = self._published.get(metric.name, {})
+                for labels, (counts, total) in snapshots[metric.name].items():
+                    previous_counts, previous_total = published.get(labels, ([0] * len(counts), 0.0))
+                    for index, (count, previous) in enumerate(zip(counts, previous_counts)):
+                        if count > previous:
+                            pipe.hincrby(self._key(metric), json.dumps([*labels, index]), count - previous)
+                            changed = True
+                    if total > previous_total:
+                        pipe.hincrbyfloat(self._key(metric), json.dumps([*labels, "sum"]), total - previous_total)
+                        changed = True
+            if changed:
+                await pipe.execute()
+            self._published = snapshots
+    
+    async def collect(self) -> str:
+        """Exposition of the totals of all workers, or of this worker's if Redis is unavailable"""
+        try:
+            await self.publish()
+            pipe = self.redis.pipeline(transaction=False)
+            for metric in self.registry.metrics:
+                pipe.hgetall(self._key(metric))
+            results = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Error reading shared metrics, serving this worker's: {e}")
+            return self.registry.render()
+        
+        series: Dict[str, Dict] = {}
+        for metric, fields in zip(self.registry.metrics, results):
+            metric_series = series[metric.name] = {}
+            for field, value in fields.items():
+                *labels, slot = json.loads(field)
+                counts, total = metric_series.get(tuple(labels), ([0] * (len(metric.buckets) + 1), 0.0))
+                if slot == "sum":
+                    total = float(value)
+                elif slot < len(counts):
+                    counts[slot] = int(value)
+                metric_series[tuple(labels)] = (counts, total)
+        return self.registry.render(series)
+    
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._publish_loop())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Hand over what this worker observed since the last publish
+        try:
+            await self.publish()
+        except Exception as e:
+            logger.warning(f"Error publishing metrics: {e}")
+    
+    async def _publish_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.publish()
+            except Exception as e:
+                logger.warning(f"Error publishing metrics: {e}")
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.histogram(
+    "docamy_http_request_duration_seconds",
+    "HTTP request duration by route template",
+    ("method", "route", "status")
+)
+TAVUS_REQUEST_DURATION = registry.histogram(
+    "docamy_tavus_request_duration_seconds",
+    "Tavus API call duration by TavusService method and response status",
+    ("operation", "status")
+)
+DB_QUERY_DURATION = registry.histogram(
+    "docamy_db_query_duration_seconds",
+    "Database statement duration by statement type",
+    ("operation",)
+)
+DB_COMMIT_DURATION = registry.histogram(
+    "docamy_db_commit_duration_seconds",
+    "Session commit duration, including the flush"
+)
+REDIS_COMMAND_DURATION = registry.histogram(
+    "docamy_redis_command_duration_seconds",
+    "Redis command duration by command",
+    ("command",)
+)
+BACKGROUND_TASK_DURATION = registry.histogram(
+    "docamy_background_task_duration_seconds",
+    "Duration of background work units",
+    ("task",)
+)
+
+def timed_task(task: str):
+    """Decorator recording an async function's duration under BACKGROUND_TASK_DURATION"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with BACKGROUND_TASK_DURATION.time(task):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class MetricsMiddleware:
+    """ASGI middleware recording request duration per route template
+
+    Streaming responses are timed until their last chunk is sent.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        status = 500
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Use the matched route's template to keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, scope["method"], route, str(status))
+
+def instrument_engine(engine):
+    """Time every statement executed on a (sync) SQLAlchemy engine"""
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+    
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is None:
+            return
+        operation = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "unknown"
+        DB_QUERY_DURATION.observe(time.perf_counter() - started, operation)
+
+def instrument_sessions(session_class):
+    """Time commits (flush included) of every session of the given class"""
+    
+    @event.listens_for(session_class, "before_commit")
+    def _before_commit(session):
+        session.info["commit_started"] = time.perf_counter()
+    
+    @event.listens_for(session_class, "after_commit")
+    def _after_commit(session):
+        started = session.info.pop("commit_started", None)
+        if started is not None:
+            DB_COMMIT_DURATION.observe(time.perf_counter() - started)
+
+def instrument_redis(client):
+    """Time commands and pipelines issued through a redis.asyncio client"""
+    execute_command = client.execute_command
+    pipeline = client.pipeline
+    
+    async def timed_execute_command(*args, **options):
+        started = time.perf_counter()
+        try:
+            return await execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.observe(time.perf_counter() - started, str(args[0]).lower())
+    
+    def timed_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+        
+        async def timed_execute(*execute_args, **execute_kwargs):
+            started = time.perf_counter()
+            try:
+                return await execute(*execute_args, **execute_kwargs)
+            finally:
+                REDIS_COMMAND_DURATION.observe(time.perf_counter() - started, "pipeline")
+        
+        pipe.execute = timed_execute
+        return pipe
+    
+    client.execute_command = timed_execute_command
+    client.pipeline = timed_pipeline
+    return client
\ No newline at end of file
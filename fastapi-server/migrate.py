@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+DocAmy database migration step
+Runs the pending alembic migrations (alembic upgrade head) and creates the
+upcoming messages partitions; run once per deploy, before the servers start
+(they no longer migrate the schema themselves)
+"""
+
+import sys
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate the DocAmy database schema")
+    parser.add_argument("--check", action="store_true", help="Only report pending migrations; exit 1 if there are any")
+    args = parser.parse_args()
+    
+    from database import engine, pending_migrations, upgrade_schema
+    
+    try:
+        if args.check:
+            pending = pending_migrations()
+            if pending:
+                print(f"❌ Pending migrations: {', '.join(pending)}")
+                print("Run: python migrate.py")
+                sys.exit(1)
+            print("✅ Database schema is up to date")
+            return
+        
+        applied, partitions = upgrade_schema()
+        if applied:
+            print(f"✅ Applied migrations: {', '.join(applied)}")
+        else:
+            print("✅ Database schema is up to date")
+        if partitions:
+            print(f"✅ Created partitions: {', '.join(partitions)}")
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        sys.exit(1)
+    finally:
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""Alembic environment: runs revisions on the app's engine, or on a connection
+passed in ``config.attributes["connection"]`` (database.upgrade_schema)"""
+from alembic import context
+
+from database import Base, engine
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("connection") is None:
+    from logging.config import fileConfig
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+def run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=Base.metadata,
+        # SQLite can only alter tables by copying them
+        render_as_batch=connection.dialect.name == "sqlite"
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+if context.is_offline_mode():
+    # Revisions inspect the live schema (tables created before migrations existed)
+    raise SystemExit("Offline (--sql) migrations are not supported; run them against the database")
+
+connection = config.attributes.get("connection")
+if connection is None:
+    with engine.connect() as connection:
+        run_migrations(connection)
+else:
+    run_migrations(connection)
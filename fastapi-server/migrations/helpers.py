@@ -0,0 +1,20 @@
+"""Schema checks shared by the revisions
+
+Databases created before migrations existed (by create_all at startup, or
+by migrate.py creating missing tables) may already have some of what a
+revision adds, so revisions only add what is missing.
+"""
+import sqlalchemy as sa
+from alembic import op
+
+def has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+def has_column(table: str, column: str) -> bool:
+    return column in {col["name"] for col in sa.inspect(op.get_bind()).get_columns(table)}
+
+def has_index(table: str, index: str) -> bool:
+    return index in {idx["name"] for idx in sa.inspect(op.get_bind()).get_indexes(table)}
+
+def is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
@@ -0,0 +1,88 @@
+"""Baseline: the tables as the server used to create them at startup
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_table
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing deployments already have these from create_all
+    if not has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.Column("full_name", sa.String()),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime())
+        )
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+    
+    if not has_table("conversations"):
+        op.create_table(
+            "conversations",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("user_id", sa.Uuid(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("tavus_conversation_id", sa.String(), nullable=False, unique=True),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("replica_id", sa.String(), nullable=False),
+            sa.Column("persona_id", sa.String(), nullable=False),
+            sa.Column("status", sa.String()),
+            sa.Column("video_url", sa.String()),
+            sa.Column("stream_url", sa.String()),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime())
+        )
+    
+    if not has_table("messages"):
+        op.create_table(
+            "messages",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("conversation_id", sa.Uuid(), sa.ForeignKey("conversations.id"), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("message_type", sa.String(), nullable=False),
+            sa.Column("video_url", sa.String()),
+            sa.Column("stream_url", sa.String()),
+            sa.Column("created_at", sa.DateTime())
+        )
+    
+    if not has_table("api_keys"):
+        op.create_table(
+            "api_keys",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("user_id", sa.Uuid(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("key_hash", sa.String(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column("last_used", sa.DateTime()),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("expires_at", sa.DateTime())
+        )
+    
+    if not has_table("webhook_events"):
+        op.create_table(
+            "webhook_events",
+            sa.Column("id", sa.Uuid(), primary_key=True),
+            sa.Column("event_type", sa.String(), nullable=False),
+            sa.Column("conversation_id", sa.String(), nullable=False),
+            sa.Column("data", sa.Text()),
+            sa.Column("processed", sa.Boolean()),
+            sa.Column("created_at", sa.DateTime())
+        )
+
+
+def downgrade():
+    for table in ("webhook_events", "api_keys", "messages", "conversations", "users"):
+        op.drop_table(table)
@@ -0,0 +1,23 @@
+"""Unique index on api_keys.key_hash for the cached API key lookup
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+from migrations.helpers import has_index
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_index("api_keys", "ix_api_keys_key_hash"):
+        op.create_index("ix_api_keys_key_hash", "api_keys", ["key_hash"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_api_keys_key_hash", table_name="api_keys")
@@ -0,0 +1,23 @@
+"""Index backing keyset pagination of a user's conversations
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+from migrations.helpers import has_index
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_index("conversations", "ix_conversations_user_updated_id"):
+        op.create_index("ix_conversations_user_updated_id", "conversations", ["user_id", "updated_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_conversations_user_updated_id", table_name="conversations")
@@ -0,0 +1,23 @@
+"""Index backing keyset pagination and streaming of a conversation's messages
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+from migrations.helpers import has_index
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_index("messages", "ix_messages_conversation_created_id"):
+        op.create_index("ix_messages_conversation_created_id", "messages", ["conversation_id", "created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_messages_conversation_created_id", table_name="messages")
@@ -0,0 +1,28 @@
+"""webhook_events.event_id with a unique index, for deduplicating redeliveries
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column, has_index
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Events stored before have no id and stay NULL, which the index allows
+    if not has_column("webhook_events", "event_id"):
+        op.add_column("webhook_events", sa.Column("event_id", sa.String()))
+    if not has_index("webhook_events", "ix_webhook_events_event_id"):
+        op.create_index("ix_webhook_events_event_id", "webhook_events", ["event_id"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_webhook_events_event_id", table_name="webhook_events")
+    op.drop_column("webhook_events", "event_id")
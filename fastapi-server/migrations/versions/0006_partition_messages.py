@@ -0,0 +1,87 @@
+"""Range-partition messages by month of created_at (PostgreSQL)
+
+The existing table is renamed, a partitioned one created with partitions
+from its oldest message's month to MESSAGES_PARTITION_MONTHS_AHEAD months
+ahead, and the rows are copied over. The copy holds a lock on messages for
+its duration, so run it in a maintenance window on large tables. Other
+databases keep a plain table.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+from config import settings
+from database import ensure_message_partitions, messages_partitioned
+from migrations.helpers import is_postgresql
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, conversation_id, content, message_type, video_url, stream_url, created_at"
+
+
+def _create_messages(*constraints, **kwargs):
+    op.create_table(
+        "messages",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("conversation_id", sa.Uuid(), sa.ForeignKey("conversations.id"), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("message_type", sa.String(), nullable=False),
+        sa.Column("video_url", sa.String()),
+        sa.Column("stream_url", sa.String()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        *constraints,
+        **kwargs
+    )
+    op.create_index("ix_messages_conversation_created_id", "messages", ["conversation_id", "created_at", "id"])
+
+
+def _set_aside_messages(name: str):
+    """Rename messages and free the index names the new table will use"""
+    op.execute(f"ALTER TABLE messages RENAME TO {name}")
+    op.execute(f"ALTER TABLE {name} RENAME CONSTRAINT messages_pkey TO {name}_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_messages_conversation_created_id")
+
+
+def upgrade():
+    bind = op.get_bind()
+    if not is_postgresql() or messages_partitioned(bind):
+        return
+    
+    _set_aside_messages("messages_unpartitioned")
+    _create_messages(
+        sa.PrimaryKeyConstraint("id", "created_at", name="messages_pkey"),
+        postgresql_partition_by="RANGE (created_at)"
+    )
+    
+    now = datetime.utcnow()
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM messages_unpartitioned")).scalar() or now
+    months_back = (now.year - oldest.year) * 12 + now.month - oldest.month
+    ensure_message_partitions(bind, months_back + settings.MESSAGES_PARTITION_MONTHS_AHEAD, start=oldest.date())
+    
+    # The partition key is part of the primary key, so it cannot stay NULL
+    op.execute(
+        f"INSERT INTO messages ({COLUMNS}) "
+        f"SELECT id, conversation_id, content, message_type, video_url, stream_url, "
+        f"COALESCE(created_at, timezone('utc', now())) FROM messages_unpartitioned"
+    )
+    op.execute("DROP TABLE messages_unpartitioned")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if not is_postgresql() or not messages_partitioned(bind):
+        return
+    
+    _set_aside_messages("messages_partitioned")
+    _create_messages(sa.PrimaryKeyConstraint("id", name="messages_pkey"))
+    op.execute(f"INSERT INTO messages ({COLUMNS}) SELECT {COLUMNS} FROM messages_partitioned")
+    # Drops the monthly partitions with it
+    op.execute("DROP TABLE messages_partitioned")
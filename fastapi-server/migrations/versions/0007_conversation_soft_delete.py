@@ -0,0 +1,42 @@
+"""Soft delete columns of conversations and the index the reaper scans
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column, has_index
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_column("conversations", "deleted_at"):
+        op.add_column("conversations", sa.Column("deleted_at", sa.DateTime()))
+    if not has_column("conversations", "purge_after"):
+        op.add_column("conversations", sa.Column("purge_after", sa.DateTime()))
+    if not has_column("conversations", "purge_attempts"):
+        op.add_column(
+            "conversations",
+            sa.Column("purge_attempts", sa.Integer(), nullable=False, server_default="0")
+        )
+    if not has_index("conversations", "ix_conversations_purge_after"):
+        op.create_index(
+            "ix_conversations_purge_after",
+            "conversations",
+            ["purge_after"],
+            postgresql_where=sa.text("deleted_at IS NOT NULL"),
+            sqlite_where=sa.text("deleted_at IS NOT NULL")
+        )
+
+
+def downgrade():
+    op.drop_index("ix_conversations_purge_after", table_name="conversations")
+    op.drop_column("conversations", "purge_attempts")
+    op.drop_column("conversations", "purge_after")
+    op.drop_column("conversations", "deleted_at")
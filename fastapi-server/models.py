@@ -9,6 +9,9 @@ class ConversationStatus(str, Enum):
     ERROR = "error"
     PROCESSING = "processing"
 
+# Statuses after which a conversation no longer changes
+FINAL_STATUSES = {ConversationStatus.COMPLETED.value, ConversationStatus.ERROR.value}
+
 class MessageType(str, Enum):
     USER = "user"
     ASSISTANT = "assistant"
@@ -37,6 +40,9 @@ class ConversationRequest(BaseModel):
             raise ValueError('ID must be at least 5 characters long')
         return v
 
+class ConversationBatchRequest(BaseModel):
+    conversations: List[ConversationRequest] = Field(..., min_items=1, description="Conversations to create")
+
 class MessageRequest(BaseModel):
     text: str = Field(..., min_length=1, max_length=2000, description="Message text")
     
@@ -57,6 +63,17 @@ class ConversationResponse(BaseModel):
     stream_url: Optional[str] = None
     message_count: Optional[int] = 0
 
+class ConversationBatchItem(BaseModel):
+    index: int
+    success: bool
+    conversation: Optional[ConversationResponse] = None
+    error: Optional[str] = None
+
+class ConversationBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[ConversationBatchItem]
+
 class MessageResponse(BaseModel):
     id: str
     conversation_id: str
@@ -84,6 +101,11 @@ class HealthResponse(BaseModel):
     services: Dict[str, str]
     version: str
     error: Optional[str] = None
+    checks: Optional[Dict[str, Dict[str, Any]]] = None
+
+class ProfilingSamplingRequest(BaseModel):
+    route: Optional[str] = Field(default=None, description="Route to sample, as 'METHOD /path/{template}'")
+    every: int = Field(default=0, ge=0, description="Profile every N-th matching request; 0 turns sampling off")
 
 class ErrorResponse(BaseModel):
     error: str
@@ -130,11 +152,15 @@ class ConversationStats(BaseModel):
     active_conversations: int
     total_messages: int
     avg_conversation_length: float
-    most_active_day: str
+    most_active_day: Optional[str] = None
 
 class UsageStats(BaseModel):
     api_calls_today: int
     api_calls_this_month: int
-    video_minutes_generated: float
-    storage_used_mb: float
-    rate_limit_remaining: int
\ No newline at end of file
+    video_minutes_generated: Optional[float] = None
+    storage_used_mb: Optional[float] = None
+    rate_limit_remaining: Optional[int] = None
+
+class UserStatsResponse(BaseModel):
+    conversations: ConversationStats
+    usage: UsageStats
\ No newline at end of file
@@ -0,0 +1,234 @@
+import hmac
+import itertools
+import os
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, QueryParams
+from starlette.routing import Match
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+TOKEN_HEADER = "x-profile-token"
+PROFILE_SUFFIX = ".speedscope.json"
+
+class RequestProfiler:
+    """Profiles selected requests with pyinstrument and keeps the results on disk
+
+    A request is profiled on demand, when it carries an ``X-Profile`` header
+    (or ``?profile=``) together with the admin ``X-Profile-Token``, or by
+    rolling sampling of every ``sample_every``-th request to ``sample_route``
+    (``"METHOD /path/{template}"``). Profiles are written in speedscope's
+    format, which speedscope.app renders as a flame graph; only the newest
+    ``max_profiles`` are kept.
+    """
+    
+    def __init__(
+        self,
+        output_dir: str,
+        admin_token: str = "",
+        interval: float = 0.001,
+        max_profiles: int = 100,
+        sample_route: str = "",
+        sample_every: int = 0
+    ):
+        self.output_dir = output_dir
+        self.admin_token = admin_token
+        self.interval = interval
+        self.max_profiles = max_profiles
+        
+        self.sample_route: Optional[Tuple[str, str]] = None
+        self.sample_every = 0
+        self._sample_target = None
+        self._counter = itertools.count()
+        if sample_route and sample_every:
+            self.set_sampling(sample_route, sample_every)
+        
+        self.profiled = 0
+        self.sampled = 0
+        self.rejected = 0
+    
+    @property
+    def available(self) -> bool:
+        return Profiler is not None
+    
+    def authorized(self, token: Optional[str]) -> bool:
+        return bool(self.admin_token) and bool(token) and hmac.compare_digest(token, self.admin_token)
+    
+    def set_sampling(self, route: Optional[str], every: int):
+        """Profile every ``every``-th request to ``route``; a falsy route or ``every`` turns sampling off"""
+        if not route or every <= 0:
+            self.sample_route, self.sample_every = None, 0
+        else:
+            method, _, path = route.strip().partition(" ")
+            if not path:
+                raise ValueError("Sample route must look like 'METHOD /path'")
+            self.sample_route, self.sample_every = (method.upper(), path.strip()), every
+        self._sample_target = None
+        self._counter = itertools.count()
+    
+    def _resolve_target(self, app):
+        method, path = self.sample_route
+        for route in getattr(app, "routes", []):
+            if getattr(route, "path", None) == path and method in (getattr(route, "methods", None) or ()):
+                return route
+        return None
+    
+    def should_sample(self, scope) -> bool:
+        if not self.sample_every or scope["method"] != self.sample_route[0]:
+            return False
+        if self._sample_target is None:
+            self._sample_target = self._resolve_target(scope.get("app"))
+            if self._sample_target is None:
+                return False
+        if self._sample_target.matches(scope)[0] != Match.FULL:
+            return False
+        return next(self._counter) % self.sample_every == 0
+    
+    def requested_mode(self, scope) -> Optional[str]:
+        """``"return"`` or ``"store"`` for an authorized on-demand request, else None"""
+        headers = Headers(scope=scope)
+        mode = headers.get(PROFILE_HEADER)
+        if mode is None and b"profile=" in scope.get("query_string", b""):
+            mode = QueryParams(scope["query_string"]).get("profile")
+        if mode is None:
+            return None
+        if not self.authorized(headers.get(TOKEN_HEADER)):
+            self.rejected += 1
+            logger.warning(f"Ignoring profile request without a valid token for {scope['path']}")
+            return None
+        return "return" if mode.lower() == "return" else "store"
+    
+    def start(self):
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        profiler.start()
+        return profiler
+    
+    def profile_name(self, scope) -> str:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_")[:60] or "root"
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{scope['method']}-{slug}-{uuid.uuid4().hex[:8]}"
+    
+    def render(self, profiler) -> str:
+        return profiler.output(renderer=SpeedscopeRenderer())
+    
+    def _write(self, name: str, profiler):
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(os.path.join(self.output_dir, name + PROFILE_SUFFIX), "w") as f:
+            f.write(self.render(profiler))
+        
+        profiles = sorted(
+            (entry for entry in os.scandir(self.output_dir) if entry.name.endswith(PROFILE_SUFFIX)),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in profiles[:max(0, len(profiles) - self.max_profiles)]:
+            os.remove(entry.path)
+    
+    async def save(self, name: str, profiler):
+        try:
+            await run_in_threadpool(self._write, name, profiler)
+        except Exception as e:
+            logger.error(f"Error saving profile {name}: {e}")
+    
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.output_dir):
+            return []
+        profiles = []
+        for entry in os.scandir(self.output_dir):
+            if entry.name.endswith(PROFILE_SUFFIX):
+                stat = entry.stat()
+                profiles.append({
+                    "name": entry.name[:-len(PROFILE_SUFFIX)],
+                    "size": stat.st_size,
+                    "created_at": stat.st_mtime
+                })
+        return sorted(profiles, key=lambda profile: profile["created_at"], reverse=True)
+    
+    def profile_path(self, name: str) -> Optional[str]:
+        if not re.fullmatch(r"[A-Za-z0-9_.-]+", name):
+            return None
+        path = os.path.join(self.output_dir, name + PROFILE_SUFFIX)
+        return path if os.path.isfile(path) else None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "available": self.available,
+            "sample_route": " ".join(self.sample_route) if self.sample_route else None,
+            "sample_every": self.sample_every,
+            "profiled": self.profiled,
+            "sampled": self.sampled,
+            "rejected": self.rejected,
+            "stored": len(self.list_profiles())
+        }
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling on-demand and sampled requests
+
+    Requests that are neither asked for nor sampled pass straight through. With
+    ``X-Profile: return`` the response body is replaced by the profile (the
+    original status is kept in ``X-Profiled-Status``); otherwise the profile is
+    stored and its name returned in ``X-Profile-Id``.
+    """
+    
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.available:
+            await self.app(scope, receive, send)
+            return
+        
+        mode = self.profiler.requested_mode(scope)
+        if mode is None:
+            if not self.profiler.should_sample(scope):
+                await self.app(scope, receive, send)
+                return
+            self.profiler.sampled += 1
+        
+        name = self.profiler.profile_name(scope)
+        status = 500
+        
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start" and mode == "store":
+                message = dict(message, headers=list(message.get("headers", [])) + [(b"x-profile-id", name.encode())])
+            await send(message)
+        
+        async def capture_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+        
+        profiler = self.profiler.start()
+        try:
+            await self.app(scope, receive, capture_status if mode == "return" else send_with_profile_id)
+        finally:
+            profiler.stop()
+            self.profiler.profiled += 1
+        
+        if mode == "return":
+            body = (await run_in_threadpool(self.profiler.render, profiler)).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"content-disposition", f'attachment; filename="{name}{PROFILE_SUFFIX}"'.encode()),
+                    (b"x-profiled-status", str(status).encode())
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+        else:
+            # The response has already gone out; rendering only delays this task
+            await self.profiler.save(name, profiler)
\ No newline at end of file
@@ -52,6 +52,14 @@ if not exist ".env" (
     )
 )
 
+REM Apply pending database migrations
+echo 🗄️  Migrating database...
+python migrate.py
+if errorlevel 1 (
+    pause
+    exit /b 1
+)
+
 REM Start the server
 echo 🚀 Starting FastAPI server...
 python start.py
@@ -61,6 +61,10 @@ if [ ! -f ".env" ]; then
     fi
 fi
 
+# Apply pending database migrations
+echo "🗄️  Migrating database..."
+$PYTHON_CMD migrate.py || exit 1
+
 # Start the server
 echo "🚀 Starting FastAPI server..."
 $PYTHON_CMD start.py
\ No newline at end of file
@@ -0,0 +1,64 @@
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON, with datetimes, UUIDs and enums encoded as jsonable_encoder does"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+# Trusted payload builders: rows read from our own database are mapped straight
+# to the response shape, skipping response_model validation and
+# jsonable_encoder. Keep them in step with the models they mirror.
+
+def conversation_payload(conversation) -> Dict[str, Any]:
+    """models.ConversationResponse fields of a Conversation row"""
+    return {
+        "id": str(conversation.id),
+        "tavus_conversation_id": conversation.tavus_conversation_id,
+        "name": conversation.name,
+        "status": conversation.status,
+        "created_at": conversation.created_at,
+        "updated_at": conversation.updated_at,
+        "video_url": None,
+        "stream_url": None,
+        "message_count": 0
+    }
+
+def message_payload(message) -> Dict[str, Any]:
+    """models.MessageResponse fields of a Message row"""
+    return {
+        "id": str(message.id),
+        "conversation_id": str(message.conversation_id),
+        "content": message.content,
+        "type": message.message_type,
+        "timestamp": message.created_at,
+        "video_url": message.video_url,
+        "stream_url": message.stream_url,
+        "status": None
+    }
\ No newline at end of file
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+import logging
+
+from metrics import timed_task
+
+logger = logging.getLogger(__name__)
+
+class CacheEntry:
+    def __init__(self, value: Any, fetched_at: float):
+        self.value = value
+        self.fetched_at = fetched_at
+    
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+class SWRCache:
+    """Stale-while-revalidate cache with an in-process tier and an optional Redis tier
+
+    - Fresh entries (younger than ``ttl``) are served from memory.
+    - Stale entries (younger than ``ttl + stale_ttl``) are served immediately while a
+      single background refresh runs.
+    - Concurrent misses for the same key share one loader call (single flight).
+    - If the loader fails, the last known value is served regardless of age.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        stale_ttl: float,
+        redis_client=None,
+        namespace: str = "docamy:cache"
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.redis = redis_client
+        self.prefix = f"{namespace}:{name}"
+        self.channel = f"{self.prefix}:invalidate"
+        
+        self._entries: Dict[str, CacheEntry] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+    
+    async def start(self):
+        """Listen for invalidations published by other workers"""
+        if self.redis is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen_invalidations())
+    
+    async def stop(self):
+        """Stop the invalidation listener and any in-flight refreshes"""
+        tasks = list(self._inflight.values())
+        if self._listener is not None:
+            tasks.append(self._listener)
+            self._listener = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, loading it with loader when needed"""
+        entry = self._entries.get(key)
+        if entry and entry.age() < self.ttl:
+            self._stats["hits"] += 1
+            return entry.value
+        
+        # Another worker may already have refreshed the shared tier
+        shared = await self._read_shared(key)
+        if shared and (entry is None or shared.fetched_at > entry.fetched_at):
+            self._entries[key] = shared
+            entry = shared
+            if entry.age() < self.ttl:
+                self._stats["hits"] += 1
+                return entry.value
+        
+        if entry and entry.age() < self.ttl + self.stale_ttl:
+            self._stats["stale_hits"] += 1
+            self._refresh(key, loader)
+            return entry.value
+        
+        self._stats["misses"] += 1
+        try:
+            return await asyncio.shield(self._refresh(key, loader))
+        except Exception:
+            if entry is not None:
+                logger.warning(f"Serving stale '{self.name}:{key}' after refresh failure")
+                return entry.value
+            raise
+    
+    async def invalidate(self, key: Optional[str] = None):
+        """Drop one key (or all keys) locally, in Redis and on other workers"""
+        self._drop_local(key)
+        
+        if self.redis is None:
+            return
+        try:
+            if key is None:
+                keys = [k async for k in self.redis.scan_iter(match=f"{self.prefix}:data:*")]
+                if keys:
+                    await self.redis.delete(*keys)
+            else:
+                await self.redis.delete(self._redis_key(key))
+            await self.redis.publish(self.channel, key or "*")
+        except Exception as e:
+            logger.error(f"Error invalidating cache '{self.name}': {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and entry ages"""
+        return {
+            **self._stats,
+            "entries": {key: round(entry.age(), 3) for key, entry in self._entries.items()},
+            "inflight": len(self._inflight)
+        }
+    
+    def _refresh(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Start (or join) the single refresh for key"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader))
+            # Background refreshes may fail unobserved; errors are already logged
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+    
+    @timed_task("cache_refresh")
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            self._stats["refreshes"] += 1
+            value = await loader()
+            entry = CacheEntry(value, time.time())
+            self._entries[key] = entry
+            await self._write_shared(key, entry)
+            return value
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.error(f"Error refreshing cache '{self.name}:{key}': {e}")
+            raise
+        finally:
+            self._inflight.pop(key, None)
+    
+    def _drop_local(self, key: Optional[str]):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+    
+    def _redis_key(self, key: str) -> str:
+        return f"{self.prefix}:data:{key}"
+    
+    async def _read_shared(self, key: str) -> Optional[CacheEntry]:
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(self._redis_key(key))
+            if raw is None:
+                return None
+            data = json.loads(raw)
+            return CacheEntry(data["value"], data["fetched_at"])
+        except Exception as e:
+            logger.warning(f"Error reading shared cache '{self.name}:{key}': {e}")
+            return None
+    
+    async def _write_shared(self, key: str, entry: CacheEntry):
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(
+                self._redis_key(key),
+                json.dumps({"value": entry.value, "fetched_at": entry.fetched_at}),
+                ex=max(1, int(self.ttl + self.stale_ttl))
+            )
+        except Exception as e:
+            logger.warning(f"Error writing shared cache '{self.name}:{key}': {e}")
+    
+    async def _listen_invalidations(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    key = message["data"]
+                    if isinstance(key, bytes):
+                        key = key.decode()
+                    self._drop_local(None if key == "*" else key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener for '{self.name}' failed: {e}")
+                await asyncio.sleep(5)
+            finally:
+                await pubsub.close()
\ No newline at end of file
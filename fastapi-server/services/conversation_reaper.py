@@ -0,0 +1,204 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+import logging
+
+from sqlalchemy import delete, select, update
+from starlette.concurrency import run_in_threadpool
+
+from database import Conversation, Message, db_session
+from metrics import timed_task
+from services.resilience import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+class ConversationReaper:
+    """Background cleanup of soft-deleted conversations
+
+    delete_conversation only tombstones the row. Every ``interval`` seconds,
+    or as soon as it is woken, the reaper picks up tombstones whose
+    ``purge_after`` has passed and claims each one by moving ``purge_after``
+    ``lease`` seconds ahead with a conditional UPDATE, so every worker can run
+    a reaper without two of them purging the same conversation. A claimed
+    conversation is deleted from Tavus, then its messages are deleted
+    ``delete_chunk`` rows per transaction, then its archive and its row. At
+    most ``concurrency`` conversations are handled at a time. A failed Tavus
+    delete is retried with jittered exponential backoff; after
+    ``max_attempts`` the local data is purged anyway and the error logged.
+    """
+    
+    def __init__(
+        self,
+        tavus_service,
+        archive=None,
+        interval: float = 30.0,
+        batch_size: int = 50,
+        delete_chunk: int = 1000,
+        concurrency: int = 5,
+        max_attempts: int = 8,
+        retry_base_delay: float = 30.0,
+        retry_max_delay: float = 3600.0,
+        lease: float = 300.0
+    ):
+        self.tavus_service = tavus_service
+        self.archive = archive
+        self.interval = interval
+        self.batch_size = batch_size
+        self.delete_chunk = delete_chunk
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.lease = lease
+        
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running = 0
+        self._stats = {"runs": 0, "purged": 0, "messages_deleted": 0, "tavus_retries": 0, "tavus_abandoned": 0, "errors": 0}
+    
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def wake(self):
+        """Reap now instead of at the next interval, e.g. right after a delete"""
+        self._wakeup.set()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "in_flight": self._running}
+    
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                # Keep going while there are full batches
+                while await self.reap() >= self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reaping deleted conversations: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def reap(self) -> int:
+        """Purge one batch of due tombstones; returns how many were found"""
+        self._stats["runs"] += 1
+        now = datetime.utcnow()
+        async with db_session() as db:
+            result = await db.execute(
+                select(
+                    Conversation.id,
+                    Conversation.tavus_conversation_id,
+                    Conversation.purge_after,
+                    Conversation.purge_attempts
+                ).where(
+                    Conversation.deleted_at.isnot(None),
+                    Conversation.purge_after <= now
+                ).order_by(Conversation.purge_after).limit(self.batch_size)
+            )
+            due = list(result.all())
+            claimed = [row for row in due if await self._claim(db, row, now)]
+        
+        await asyncio.gather(*(self._reap_one(row) for row in claimed))
+        return len(due)
+    
+    async def _claim(self, db, row, now: datetime) -> bool:
+        """Take a lease on a tombstone unless another reaper got there first"""
+        result = await db.execute(
+            update(Conversation).where(
+                Conversation.id == row.id,
+                Conversation.purge_after == row.purge_after
+            ).values(purge_after=now + timedelta(seconds=self.lease))
+        )
+        await db.commit()
+        return result.rowcount == 1
+    
+    @timed_task("conversation_reap")
+    async def _reap_one(self, row):
+        async with self._semaphore:
+            self._running += 1
+            try:
+                if not await self.tavus_service.delete_conversation(row.tavus_conversation_id):
+                    attempts = row.purge_attempts + 1
+                    if attempts < self.max_attempts:
+                        await self._retry_later(row, attempts)
+                        return
+                    self._stats["tavus_abandoned"] += 1
+                    logger.error(
+                        f"Giving up deleting conversation {row.tavus_conversation_id} from Tavus "
+                        f"after {attempts} attempts, purging it locally"
+                    )
+                await self.purge(row.id)
+            except Exception as e:
+                # The lease runs out and another run picks it up again
+                self._stats["errors"] += 1
+                logger.error(f"Error purging conversation {row.id}: {e}")
+            finally:
+                self._running -= 1
+    
+    async def _retry_later(self, row, attempts: int):
+        delay = backoff_delay(attempts - 1, self.retry_base_delay, self.retry_max_delay)
+        self._stats["tavus_retries"] += 1
+        logger.warning(
+            f"Deleting conversation {row.tavus_conversation_id} from Tavus failed, "
+            f"retrying in {delay:.0f}s ({attempts}/{self.max_attempts})"
+        )
+        async with db_session() as db:
+            await db.execute(
+                update(Conversation).where(Conversation.id == row.id).values(
+                    purge_attempts=attempts,
+                    purge_after=datetime.utcnow() + timedelta(seconds=delay)
+                )
+            )
+            await db.commit()
+    
+    async def purge(self, conversation_id) -> int:
+        """Delete a tombstoned conversation's messages, archive and row; returns the messages deleted"""
+        deleted = 0
+        async with db_session() as db:
+            while True:
+                chunk = select(Message.id).where(
+                    Message.conversation_id == conversation_id
+                ).limit(self.delete_chunk)
+                result = await db.execute(
+                    delete(Message).where(
+                        Message.conversation_id == conversation_id,
+                        Message.id.in_(chunk)
+                    )
+                )
+                await db.commit()
+                deleted += result.rowcount or 0
+                self._stats["messages_deleted"] += result.rowcount or 0
+                if (result.rowcount or 0) < self.delete_chunk:
+                    break
+            
+            if self.archive is not None:
+                await run_in_threadpool(self.archive.remove, conversation_id)
+            
+            await db.execute(
+                delete(Conversation).where(
+                    Conversation.id == conversation_id,
+                    Conversation.deleted_at.isnot(None)
+                )
+            )
+            await db.commit()
+        
+        # The archiver may have written the archive between the removal above
+        # and the row delete; it checks the row after writing, so removing
+        # again now leaves no orphaned archive
+        if self.archive is not None:
+            await run_in_threadpool(self.archive.remove, conversation_id)
+        self._stats["purged"] += 1
+        return deleted
\ No newline at end of file
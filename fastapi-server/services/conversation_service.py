@@ -1,22 +1,62 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
-from typing import List, Optional, Dict, Any
+from sqlalchemy import case, desc, func, select, insert, update, bindparam, tuple_
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple, Union
 from datetime import datetime
+import base64
 import json
 import uuid
 
-from database import Conversation, Message, User, WebhookEvent as DBWebhookEvent
+from database import DBSession, db_session, stream_partitions, Conversation, Message, User, WebhookEvent as DBWebhookEvent
 from models import WebhookEvent, ConversationStatus
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _as_uuid(value: Union[str, uuid.UUID]) -> Optional[uuid.UUID]:
+    """Coerce an ID to UUID, returning None for malformed input"""
+    if isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+def encode_cursor(timestamp: datetime, row_id: uuid.UUID) -> str:
+    """Opaque keyset cursor over (timestamp, id)"""
+    raw = json.dumps([timestamp.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Decode a cursor from encode_cursor, raising ValueError if malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), uuid.UUID(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _active_delta(previous_status: Optional[str], status: Optional[str]) -> int:
+    """Change in a user's active conversation count for a status transition"""
+    return int(status == ConversationStatus.ACTIVE) - int(previous_status == ConversationStatus.ACTIVE)
+
 class ConversationService:
     
+    def __init__(self, status_cache=None, usage_stats=None, archive=None):
+        # Optional ConversationStatusCache kept in sync with status writes
+        self.status_cache = status_cache
+        # Optional UsageStatsService whose per-user counters track every write
+        self.usage_stats = usage_stats
+        # Optional MessageArchive holding the older messages of finished conversations
+        self.archive = archive
+    
+    async def _record_usage(self, deltas: Dict[str, Dict[str, int]]):
+        if self.usage_stats is not None:
+            await self.usage_stats.adjust_many(deltas)
+    
     async def health_check(self) -> bool:
         """Check database health"""
         try:
-            # Simple database connectivity check
+            async with db_session() as db:
+                await db.execute(select(1))
             return True
         except Exception as e:
             logger.error(f"Database health check failed: {e}")
@@ -24,47 +64,92 @@ class ConversationService:
     
     async def create_conversation(
         self,
-        db: Session,
+        db: DBSession,
         user_id: str,
         tavus_conversation_id: str,
         name: str,
         replica_id: str,
         persona_id: str
-    ) -> Conversation:
+    ) -> Any:
         """Create a new conversation in database"""
+        rows = await self.create_conversations(db, user_id, [{
+            "tavus_conversation_id": tavus_conversation_id,
+            "name": name,
+            "replica_id": replica_id,
+            "persona_id": persona_id
+        }])
+        return rows[0]
+    
+    async def create_conversations(
+        self,
+        db: DBSession,
+        user_id: str,
+        conversations: List[Dict[str, Any]]
+    ) -> List[Any]:
+        """Insert several conversations with one multi-row INSERT ... RETURNING and commit"""
+        if not conversations:
+            return []
+        
+        now = datetime.utcnow()
+        default_name = f"Conversation {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": _as_uuid(user_id),
+                "tavus_conversation_id": item["tavus_conversation_id"],
+                "name": item.get("name") or default_name,
+                "replica_id": item["replica_id"],
+                "persona_id": item["persona_id"],
+                "status": ConversationStatus.ACTIVE.value,
+                "created_at": now,
+                "updated_at": now
+            }
+            for item in conversations
+        ]
+        
         try:
-            conversation = Conversation(
-                user_id=user_id,
-                tavus_conversation_id=tavus_conversation_id,
-                name=name or f"Conversation {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-                replica_id=replica_id,
-                persona_id=persona_id,
-                status=ConversationStatus.ACTIVE
+            result = await db.execute(
+                insert(Conversation).values(rows).returning(
+                    Conversation.id,
+                    Conversation.tavus_conversation_id,
+                    Conversation.name,
+                    Conversation.status,
+                    Conversation.created_at,
+                    Conversation.updated_at
+                )
             )
+            inserted = list(result.all())
+            await db.commit()
             
-            db.add(conversation)
-            db.commit()
-            db.refresh(conversation)
+            await self._record_usage({
+                str(user_id): {"conversations": len(rows), "active_conversations": len(rows)}
+            })
             
-            return conversation
+            # RETURNING order is not guaranteed to follow VALUES order
+            by_tavus_id = {row.tavus_conversation_id: row for row in inserted}
+            return [by_tavus_id[row["tavus_conversation_id"]] for row in rows]
             
         except Exception as e:
-            db.rollback()
-            logger.error(f"Error creating conversation: {e}")
+            await db.rollback()
+            logger.error(f"Error creating conversations: {e}")
             raise
     
     async def get_conversation(
         self,
-        db: Session,
+        db: DBSession,
         conversation_id: str,
         user_id: str
     ) -> Optional[Conversation]:
         """Get a conversation by ID"""
         try:
-            return db.query(Conversation).filter(
-                Conversation.id == conversation_id,
-                Conversation.user_id == user_id
-            ).first()
+            result = await db.execute(
+                select(Conversation).where(
+                    Conversation.id == _as_uuid(conversation_id),
+                    Conversation.user_id == _as_uuid(user_id),
+                    Conversation.deleted_at.is_(None)
+                )
+            )
+            return result.scalars().first()
             
         except Exception as e:
             logger.error(f"Error getting conversation: {e}")
@@ -72,16 +157,42 @@ class ConversationService:
     
     async def list_conversations(
         self,
-        db: Session,
+        db: DBSession,
         user_id: str,
         skip: int = 0,
-        limit: int = 20
-    ) -> List[Conversation]:
-        """List user conversations"""
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> List[Any]:
+        """List user conversations, newest first
+        
+        Only the columns needed for ConversationResponse are loaded. With a
+        cursor (see encode_cursor) rows after that position are returned using
+        the (user_id, updated_at, id) index, and skip is ignored.
+        """
+        position = decode_cursor(cursor) if cursor else None
+        
         try:
-            return db.query(Conversation).filter(
-                Conversation.user_id == user_id
-            ).order_by(desc(Conversation.updated_at)).offset(skip).limit(limit).all()
+            query = select(
+                Conversation.id,
+                Conversation.tavus_conversation_id,
+                Conversation.name,
+                Conversation.status,
+                Conversation.created_at,
+                Conversation.updated_at
+            ).where(
+                Conversation.user_id == _as_uuid(user_id),
+                Conversation.deleted_at.is_(None)
+            ).order_by(desc(Conversation.updated_at), desc(Conversation.id))
+            
+            if position:
+                query = query.where(
+                    tuple_(Conversation.updated_at, Conversation.id) < tuple_(*position)
+                )
+            else:
+                query = query.offset(skip)
+            
+            result = await db.execute(query.limit(limit))
+            return list(result.all())
             
         except Exception as e:
             logger.error(f"Error listing conversations: {e}")
@@ -89,221 +200,515 @@ class ConversationService:
     
     async def update_conversation_status(
         self,
-        db: Session,
+        db: DBSession,
         tavus_conversation_id: str,
         status: str,
         video_url: Optional[str] = None
     ) -> bool:
         """Update conversation status"""
         try:
-            conversation = db.query(Conversation).filter(
-                Conversation.tavus_conversation_id == tavus_conversation_id
-            ).first()
+            result = await db.execute(
+                select(Conversation).where(
+                    Conversation.tavus_conversation_id == tavus_conversation_id
+                )
+            )
+            conversation = result.scalars().first()
             
             if conversation:
+                previous_status = conversation.status
                 conversation.status = status
                 conversation.updated_at = datetime.utcnow()
                 
                 if video_url:
                     conversation.video_url = video_url
                 
-                db.commit()
+                await db.commit()
+                # A deleted conversation was already taken out of the counters
+                if conversation.deleted_at is None:
+                    await self._record_usage({
+                        str(conversation.user_id): {"active_conversations": _active_delta(previous_status, status)}
+                    })
                 return True
             
             return False
             
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Error updating conversation status: {e}")
             return False
     
+    async def bulk_update_conversation_status(
+        self,
+        db: DBSession,
+        updates: List[Dict[str, Any]]
+    ) -> int:
+        """Apply several status updates, keyed by Tavus conversation ID, in one transaction"""
+        if not updates:
+            return 0
+        
+        table = Conversation.__table__
+        stmt = update(table).where(
+            table.c.tavus_conversation_id == bindparam("b_tavus_conversation_id")
+        ).values(
+            status=bindparam("b_status"),
+            video_url=func.coalesce(bindparam("b_video_url"), table.c.video_url),
+            updated_at=bindparam("b_updated_at")
+        )
+        
+        try:
+            # Current owner and status, to keep the active conversation counters right
+            result = await db.execute(
+                select(
+                    Conversation.tavus_conversation_id,
+                    Conversation.user_id,
+                    Conversation.status
+                ).where(
+                    Conversation.tavus_conversation_id.in_([item["tavus_conversation_id"] for item in updates]),
+                    Conversation.deleted_at.is_(None)
+                )
+            )
+            current = {row.tavus_conversation_id: row for row in result.all()}
+            
+            await db.execute(stmt, [
+                {
+                    "b_tavus_conversation_id": item["tavus_conversation_id"],
+                    "b_status": item["status"],
+                    "b_video_url": item.get("video_url"),
+                    "b_updated_at": item.get("updated_at") or datetime.utcnow()
+                }
+                for item in updates
+            ])
+            await db.commit()
+            
+            deltas: Dict[str, Dict[str, int]] = {}
+            for item in updates:
+                row = current.get(item["tavus_conversation_id"])
+                if row is not None:
+                    counters = deltas.setdefault(str(row.user_id), {"active_conversations": 0})
+                    counters["active_conversations"] += _active_delta(row.status, item["status"])
+            await self._record_usage(deltas)
+            
+            if self.status_cache is not None:
+                await self.status_cache.set_many(updates)
+            return len(updates)
+            
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error bulk updating conversation status: {e}")
+            raise
+    
     async def delete_conversation(
         self,
-        db: Session,
+        db: DBSession,
         conversation_id: str,
         user_id: str
     ) -> bool:
-        """Delete a conversation"""
+        """Soft-delete a conversation
+        
+        The row is only tombstoned, which hides it and its messages from every
+        read; the ConversationReaper deletes it from Tavus and purges the
+        messages, archive and row in the background. Usage counters drop
+        right away.
+        """
+        conversation_uuid = _as_uuid(conversation_id)
         try:
-            conversation = db.query(Conversation).filter(
-                Conversation.id == conversation_id,
-                Conversation.user_id == user_id
-            ).first()
+            now = datetime.utcnow()
+            result = await db.execute(
+                update(Conversation).where(
+                    Conversation.id == conversation_uuid,
+                    Conversation.user_id == _as_uuid(user_id),
+                    Conversation.deleted_at.is_(None)
+                ).values(
+                    deleted_at=now,
+                    purge_after=now,
+                    purge_attempts=0
+                ).returning(Conversation.status)
+            )
+            status = result.scalar()
+            if status is None:
+                await db.rollback()
+                return False
             
-            if conversation:
-                # Delete associated messages
-                db.query(Message).filter(
-                    Message.conversation_id == conversation_id
-                ).delete()
-                
-                # Delete conversation
-                db.delete(conversation)
-                db.commit()
-                return True
+            messages = (await db.execute(
+                select(func.count(Message.id)).where(Message.conversation_id == conversation_uuid)
+            )).scalar()
+            await db.commit()
             
-            return False
+            if self.archive is not None:
+                await self.archive.refresh()
+                entry = self.archive.entry(conversation_uuid)
+                messages += entry["messages"] if entry else 0
+            
+            await self._record_usage({
+                str(user_id): {
+                    "conversations": -1,
+                    "active_conversations": -1 if status == ConversationStatus.ACTIVE else 0,
+                    "messages": -messages
+                }
+            })
+            return True
             
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Error deleting conversation: {e}")
             return False
     
     async def add_message(
         self,
-        db: Session,
+        db: DBSession,
         conversation_id: str,
         content: str,
         message_type: str,
         video_url: Optional[str] = None,
         stream_url: Optional[str] = None
-    ) -> Message:
+    ) -> Any:
         """Add a message to conversation"""
+        rows = await self.append_messages(db, conversation_id, [{
+            "content": content,
+            "message_type": message_type,
+            "video_url": video_url,
+            "stream_url": stream_url
+        }])
+        return rows[0]
+    
+    async def append_messages(
+        self,
+        db: DBSession,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        commit: bool = True
+    ) -> List[Any]:
+        """Insert messages with one multi-row INSERT ... RETURNING
+        
+        With commit=True the conversation's updated_at is touched and the
+        transaction committed; with commit=False the rows are only inserted,
+        leaving the timestamp update and commit to a later call in the same
+        transaction.
+        """
+        conversation_uuid = _as_uuid(conversation_id)
+        now = datetime.utcnow()
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "conversation_id": conversation_uuid,
+                "content": message["content"],
+                "message_type": message["message_type"],
+                "video_url": message.get("video_url"),
+                "stream_url": message.get("stream_url"),
+                "created_at": message.get("created_at") or now
+            }
+            for message in messages
+        ]
+        
         try:
-            message = Message(
-                conversation_id=conversation_id,
-                content=content,
-                message_type=message_type,
-                video_url=video_url,
-                stream_url=stream_url
-            )
-            
-            db.add(message)
+            inserted = []
+            # Rows from earlier commit=False calls are counted once the turn commits
+            pending = db.info.pop("pending_messages", 0)
+            if rows:
+                result = await db.execute(
+                    insert(Message).values(rows).returning(
+                        Message.id,
+                        Message.conversation_id,
+                        Message.content,
+                        Message.message_type,
+                        Message.video_url,
+                        Message.stream_url,
+                        Message.created_at
+                    )
+                )
+                inserted = list(result.all())
             
-            # Update conversation's updated_at timestamp
-            conversation = db.query(Conversation).filter(
-                Conversation.id == conversation_id
-            ).first()
+            if not commit:
+                db.info["pending_messages"] = pending + len(inserted)
+                return inserted
             
-            if conversation:
-                conversation.updated_at = datetime.utcnow()
-            
-            db.commit()
-            db.refresh(message)
+            result = await db.execute(
+                update(Conversation).where(
+                    Conversation.id == conversation_uuid
+                ).values(updated_at=now).returning(Conversation.user_id)
+            )
+            owner = result.scalar()
+            await db.commit()
             
-            return message
+            if owner is not None:
+                await self._record_usage({str(owner): {"messages": pending + len(inserted)}})
+            return inserted
             
         except Exception as e:
-            db.rollback()
-            logger.error(f"Error adding message: {e}")
+            db.info.pop("pending_messages", None)
+            await db.rollback()
+            logger.error(f"Error adding messages: {e}")
             raise
     
+    def _messages_query(self, conversation_id: str, user_id: str):
+        """Message columns for a conversation the user owns, oldest first"""
+        return select(
+            Message.id,
+            Message.conversation_id,
+            Message.content,
+            Message.message_type,
+            Message.video_url,
+            Message.stream_url,
+            Message.created_at
+        ).join(
+            Conversation, Message.conversation_id == Conversation.id
+        ).where(
+            Message.conversation_id == _as_uuid(conversation_id),
+            Conversation.user_id == _as_uuid(user_id),
+            Conversation.deleted_at.is_(None)
+        ).order_by(Message.created_at, Message.id)
+    
     async def get_conversation_messages(
         self,
-        db: Session,
+        db: DBSession,
         conversation_id: str,
         user_id: str,
         skip: int = 0,
-        limit: int = 50
-    ) -> List[Message]:
-        """Get messages for a conversation"""
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> List[Any]:
+        """Get messages for a conversation, oldest first
+        
+        With a cursor (see encode_cursor) rows after that position are returned
+        using the (conversation_id, created_at, id) index, and skip is ignored.
+        Archived messages, which all precede the ones still in the database,
+        are read from the archive first.
+        """
+        position = decode_cursor(cursor) if cursor else None
+        
         try:
-            # Verify user owns the conversation
-            conversation = await self.get_conversation(db, conversation_id, user_id)
-            if not conversation:
-                return []
+            rows = []
+            if self.archive is not None:
+                archived = await self.archive.read(conversation_id, user_id)
+                if archived:
+                    if position:
+                        archived = [row for row in archived if (row.created_at, row.id) > position]
+                    else:
+                        archived, skip = archived[skip:], max(0, skip - len(archived))
+                    rows = archived[:limit]
+                    if len(rows) == limit:
+                        return rows
+                    limit -= len(rows)
+            
+            query = self._messages_query(conversation_id, user_id)
+            if position:
+                query = query.where(tuple_(Message.created_at, Message.id) > tuple_(*position))
+            else:
+                query = query.offset(skip)
             
-            return db.query(Message).filter(
-                Message.conversation_id == conversation_id
-            ).order_by(Message.created_at).offset(skip).limit(limit).all()
+            result = await db.execute(query.limit(limit))
+            return rows + list(result.all())
             
         except Exception as e:
             logger.error(f"Error getting conversation messages: {e}")
             return []
     
+    async def iter_conversation_messages(
+        self,
+        db: DBSession,
+        conversation_id: str,
+        user_id: str,
+        chunk_size: int = 500
+    ) -> AsyncIterator[List[Any]]:
+        """Yield a conversation's full message history in chunks, archived messages first, then from a server-side cursor"""
+        if self.archive is not None:
+            archived = await self.archive.read(conversation_id, user_id)
+            for start in range(0, len(archived), chunk_size):
+                yield archived[start:start + chunk_size]
+        
+        query = self._messages_query(conversation_id, user_id)
+        async for rows in stream_partitions(db, query, chunk_size):
+            yield rows
+    
     async def handle_webhook_event(
         self,
-        db: Session,
+        db: DBSession,
         event: WebhookEvent
     ) -> bool:
         """Handle Tavus webhook events"""
         try:
-            # Store webhook event
-            db_event = DBWebhookEvent(
-                event_type=event.event_type,
-                conversation_id=event.conversation_id,
-                data=json.dumps(event.data.dict()),
-                processed=False
+            await self.handle_webhook_events(db, [(None, event)])
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error handling webhook event: {e}")
+            return False
+    
+    async def handle_webhook_events(
+        self,
+        db: DBSession,
+        events: List[Tuple[Optional[str], WebhookEvent]]
+    ) -> List[WebhookEvent]:
+        """Store and apply a batch of webhook events in one transaction
+        
+        Events are (event_id, event) pairs; ids already stored, or repeated
+        within the batch, are skipped. Returns the events that were applied.
+        """
+        try:
+            event_ids = [event_id for event_id, _ in events if event_id]
+            seen = set()
+            if event_ids:
+                result = await db.execute(
+                    select(DBWebhookEvent.event_id).where(DBWebhookEvent.event_id.in_(event_ids))
+                )
+                seen.update(result.scalars().all())
+            
+            fresh = []
+            for event_id, event in events:
+                if event_id and event_id in seen:
+                    continue
+                if event_id:
+                    seen.add(event_id)
+                fresh.append((event_id, event))
+            
+            if not fresh:
+                return []
+            
+            # One lookup for every conversation referenced by the batch
+            tavus_ids = {event.conversation_id for _, event in fresh}
+            result = await db.execute(
+                select(Conversation).where(Conversation.tavus_conversation_id.in_(tavus_ids))
             )
+            conversations = {conv.tavus_conversation_id: conv for conv in result.scalars().all()}
+            previous_status = {tavus_id: conv.status for tavus_id, conv in conversations.items()}
             
-            db.add(db_event)
+            for event_id, event in fresh:
+                db.add(DBWebhookEvent(
+                    event_id=event_id,
+                    event_type=event.event_type,
+                    conversation_id=event.conversation_id,
+                    data=json.dumps(event.data.dict()),
+                    processed=True
+                ))
+                
+                # Process the event
+                conversation = conversations.get(event.conversation_id)
+                if event.event_type == "conversation.video_generated":
+                    self._handle_video_generated(conversation, event)
+                elif event.event_type == "conversation.completed":
+                    self._handle_conversation_completed(conversation, event)
+                elif event.event_type == "conversation.error":
+                    self._handle_conversation_error(conversation, event)
             
-            # Process the event
-            if event.event_type == "conversation.video_generated":
-                await self._handle_video_generated(db, event)
-            elif event.event_type == "conversation.completed":
-                await self._handle_conversation_completed(db, event)
-            elif event.event_type == "conversation.error":
-                await self._handle_conversation_error(db, event)
+            await db.commit()
             
-            # Mark as processed
-            db_event.processed = True
-            db.commit()
+            deltas: Dict[str, Dict[str, int]] = {}
+            for tavus_id, conv in conversations.items():
+                if conv.deleted_at is not None:
+                    continue
+                counters = deltas.setdefault(str(conv.user_id), {"active_conversations": 0})
+                counters["active_conversations"] += _active_delta(previous_status[tavus_id], conv.status)
+            await self._record_usage(deltas)
             
-            return True
+            if self.status_cache is not None:
+                await self.status_cache.set_many(
+                    {
+                        "tavus_conversation_id": conv.tavus_conversation_id,
+                        "status": conv.status,
+                        "video_url": conv.video_url,
+                        "stream_url": conv.stream_url
+                    }
+                    for conv in conversations.values()
+                )
+            return [event for _, event in fresh]
             
         except Exception as e:
-            db.rollback()
-            logger.error(f"Error handling webhook event: {e}")
-            return False
+            await db.rollback()
+            logger.error(f"Error handling webhook events: {e}")
+            raise
+    
+    async def _get_by_tavus_id(self, db: DBSession, tavus_conversation_id: str) -> Optional[Conversation]:
+        """Look up a conversation by its Tavus conversation ID"""
+        result = await db.execute(
+            select(Conversation).where(
+                Conversation.tavus_conversation_id == tavus_conversation_id
+            )
+        )
+        return result.scalars().first()
     
-    async def _handle_video_generated(self, db: Session, event: WebhookEvent):
+    def _handle_video_generated(self, conversation: Optional[Conversation], event: WebhookEvent):
         """Handle video generated event"""
-        conversation = db.query(Conversation).filter(
-            Conversation.tavus_conversation_id == event.conversation_id
-        ).first()
-        
         if conversation and event.data.video_url:
             conversation.video_url = event.data.video_url
             conversation.status = ConversationStatus.COMPLETED
             conversation.updated_at = datetime.utcnow()
     
-    async def _handle_conversation_completed(self, db: Session, event: WebhookEvent):
+    def _handle_conversation_completed(self, conversation: Optional[Conversation], event: WebhookEvent):
         """Handle conversation completed event"""
-        conversation = db.query(Conversation).filter(
-            Conversation.tavus_conversation_id == event.conversation_id
-        ).first()
-        
         if conversation:
             conversation.status = ConversationStatus.COMPLETED
             conversation.updated_at = datetime.utcnow()
     
-    async def _handle_conversation_error(self, db: Session, event: WebhookEvent):
+    def _handle_conversation_error(self, conversation: Optional[Conversation], event: WebhookEvent):
         """Handle conversation error event"""
-        conversation = db.query(Conversation).filter(
-            Conversation.tavus_conversation_id == event.conversation_id
-        ).first()
-        
         if conversation:
             conversation.status = ConversationStatus.ERROR
             conversation.updated_at = datetime.utcnow()
     
+    async def count_usage(
+        self,
+        db: DBSession,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """Aggregate conversation, active conversation and message counts per user
+        
+        Used to seed and reconcile the incremental usage counters; pass user_id
+        to count a single user.
+        """
+        conversation_query = select(
+            Conversation.user_id,
+            func.count(Conversation.id),
+            func.sum(case((Conversation.status == ConversationStatus.ACTIVE.value, 1), else_=0))
+        ).group_by(Conversation.user_id)
+        message_query = select(
+            Conversation.user_id,
+            func.count(Message.id)
+        ).join(
+            Message, Message.conversation_id == Conversation.id
+        ).where(
+            Conversation.deleted_at.is_(None)
+        ).group_by(Conversation.user_id)
+        tombstone_query = select(Conversation.id, Conversation.user_id).where(Conversation.deleted_at.isnot(None))
+        conversation_query = conversation_query.where(Conversation.deleted_at.is_(None))
+        
+        if user_id is not None:
+            conversation_query = conversation_query.where(Conversation.user_id == _as_uuid(user_id))
+            message_query = message_query.where(Conversation.user_id == _as_uuid(user_id))
+            tombstone_query = tombstone_query.where(Conversation.user_id == _as_uuid(user_id))
+        
+        counts: Dict[str, Dict[str, int]] = {}
+        if user_id is not None:
+            counts[str(user_id)] = {"conversations": 0, "active_conversations": 0, "messages": 0}
+        
+        for owner, total, active in (await db.execute(conversation_query)).all():
+            counts[str(owner)] = {"conversations": total, "active_conversations": int(active or 0), "messages": 0}
+        for owner, messages in (await db.execute(message_query)).all():
+            counts.setdefault(str(owner), {"conversations": 0, "active_conversations": 0})["messages"] = messages
+        if self.archive is not None:
+            for owner, messages in (await self.archive.message_counts(user_id)).items():
+                entry = counts.setdefault(owner, {"conversations": 0, "active_conversations": 0, "messages": 0})
+                entry["messages"] = entry.get("messages", 0) + messages
+            # Archives of deleted conversations stay until the reaper gets to them
+            for conversation_id, owner in (await db.execute(tombstone_query)).all():
+                entry = self.archive.entry(conversation_id)
+                if entry is not None and str(owner) in counts:
+                    counts[str(owner)]["messages"] -= entry["messages"]
+        return counts
+    
     async def get_user_stats(
         self,
-        db: Session,
+        db: DBSession,
         user_id: str
     ) -> Dict[str, Any]:
         """Get user conversation statistics"""
         try:
-            total_conversations = db.query(func.count(Conversation.id)).filter(
-                Conversation.user_id == user_id
-            ).scalar()
-            
-            active_conversations = db.query(func.count(Conversation.id)).filter(
-                Conversation.user_id == user_id,
-                Conversation.status == ConversationStatus.ACTIVE
-            ).scalar()
-            
-            total_messages = db.query(func.count(Message.id)).join(
-                Conversation
-            ).filter(
-                Conversation.user_id == user_id
-            ).scalar()
-            
+            stats = (await self.count_usage(db, user_id))[str(user_id)]
+            total_conversations = stats["conversations"]
             return {
-                "total_conversations": total_conversations or 0,
-                "active_conversations": active_conversations or 0,
-                "total_messages": total_messages or 0,
-                "avg_conversation_length": (total_messages / total_conversations) if total_conversations > 0 else 0
+                "total_conversations": total_conversations,
+                "active_conversations": stats["active_conversations"],
+                "total_messages": stats["messages"],
+                "avg_conversation_length": (stats["messages"] / total_conversations) if total_conversations > 0 else 0
             }
             
         except Exception as e:
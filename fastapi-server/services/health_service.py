@@ -0,0 +1,111 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class DependencyHealth:
+    """Latest probe result for one dependency"""
+    
+    def __init__(self, name: str, check: Callable[[], Awaitable[Any]], interval: float, critical: bool):
+        self.name = name
+        self.check = check
+        self.interval = interval
+        self.critical = critical
+        
+        self.healthy: Optional[bool] = None
+        self.latency_ms: Optional[float] = None
+        self.last_checked: Optional[datetime] = None
+        self.last_success: Optional[datetime] = None
+        self.consecutive_failures = 0
+        self.error: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": "unknown" if self.healthy is None else ("healthy" if self.healthy else "unhealthy"),
+            "critical": self.critical,
+            "latency_ms": self.latency_ms,
+            "last_checked": self.last_checked,
+            "last_success": self.last_success,
+            "consecutive_failures": self.consecutive_failures,
+            "error": self.error
+        }
+
+class HealthProber:
+    """Checks dependencies in the background so health endpoints never block on them
+
+    Each registered dependency is probed on its own interval with a timeout.
+    A dependency only turns unhealthy after ``failure_threshold`` consecutive
+    failed probes, so one slow probe does not flap the status. Critical
+    dependencies decide readiness; non-critical ones only degrade it.
+    """
+    
+    def __init__(self, timeout: float, failure_threshold: int = 2):
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self._dependencies: Dict[str, DependencyHealth] = {}
+        self._tasks: List[asyncio.Task] = []
+    
+    def register(self, name: str, check: Callable[[], Awaitable[Any]], interval: float, critical: bool = True):
+        """Probe ``check`` every ``interval`` seconds; a falsy result or an exception is a failure"""
+        self._dependencies[name] = DependencyHealth(name, check, interval, critical)
+    
+    async def start(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._probe_loop(dependency))
+                for dependency in self._dependencies.values()
+            ]
+    
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def probe(self, dependency: DependencyHealth):
+        started = time.perf_counter()
+        try:
+            ok = bool(await asyncio.wait_for(dependency.check(), self.timeout))
+            error = None if ok else "check failed"
+        except asyncio.TimeoutError:
+            ok, error = False, f"timed out after {self.timeout}s"
+        except Exception as e:
+            ok, error = False, str(e)
+        
+        dependency.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        dependency.last_checked = datetime.utcnow()
+        if ok:
+            dependency.last_success = dependency.last_checked
+            dependency.consecutive_failures = 0
+            dependency.error = None
+            dependency.healthy = True
+        else:
+            dependency.consecutive_failures += 1
+            dependency.error = error
+            # Never probed successfully, or failing persistently
+            if dependency.healthy is None or dependency.consecutive_failures >= self.failure_threshold:
+                if dependency.healthy:
+                    logger.warning(f"Dependency '{dependency.name}' is unhealthy: {error}")
+                dependency.healthy = False
+    
+    async def _probe_loop(self, dependency: DependencyHealth):
+        while True:
+            await self.probe(dependency)
+            await asyncio.sleep(dependency.interval)
+    
+    def is_ready(self) -> bool:
+        """True when every critical dependency is healthy"""
+        return all(dep.healthy for dep in self._dependencies.values() if dep.critical)
+    
+    def status(self) -> str:
+        if not self.is_ready():
+            return "unhealthy"
+        if all(dep.healthy for dep in self._dependencies.values()):
+            return "healthy"
+        return "degraded"
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dep.to_dict() for name, dep in self._dependencies.items()}
\ No newline at end of file
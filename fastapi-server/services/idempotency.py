@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IdempotencyKeyMismatch(Exception):
+    """The key was already used for a request with a different payload"""
+
+class IdempotencyInProgress(Exception):
+    """The first request with this key is still running after the wait timeout"""
+
+class IdempotencyClaim:
+    """Ownership of an Idempotency-Key for one request, or the stored result to replay"""
+    
+    def __init__(self, key: str, owner: Optional[str], fingerprint: str, replay: Optional[Dict[str, Any]] = None):
+        self.key = key
+        self.owner = owner
+        self.fingerprint = fingerprint
+        self.replay = replay
+        self.completed = replay is not None
+
+class IdempotencyStore:
+    """Redis records of in-flight and completed requests, keyed by Idempotency-Key
+
+    The first request with a key claims it with SET NX (expiring after
+    ``lock_ttl`` in case the worker dies) and stores its response when done;
+    the record is then kept for ``ttl`` seconds. Duplicates arriving while
+    the first is in flight wait for it (up to ``wait_timeout``) and replay its
+    response. Failed requests release the key so a retry runs again. Keys
+    are scoped per user. If Redis is unavailable requests run without
+    deduplication.
+    """
+    
+    def __init__(
+        self,
+        redis_client,
+        ttl: int = 86400,
+        lock_ttl: int = 120,
+        wait_timeout: float = 30.0,
+        poll_interval: float = 0.1,
+        prefix: str = "docamy:idempotency"
+    ):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._stats = {"claimed": 0, "replayed": 0, "waited": 0, "mismatched": 0, "conflicts": 0, "errors": 0}
+    
+    def _key(self, scope: str, idempotency_key: str) -> str:
+        digest = hashlib.sha256(idempotency_key.encode()).hexdigest()
+        return f"{self.prefix}:{scope}:{digest}"
+    
+    @staticmethod
+    def fingerprint(payload: Any) -> str:
+        """Stable hash of the request payload"""
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    
+    async def claim(self, scope: str, idempotency_key: str, fingerprint: str) -> Optional[IdempotencyClaim]:
+        """Claim the key, or wait for and return the first request's result
+
+        Returns None when Redis is unavailable. Raises IdempotencyKeyMismatch
+        if the key was used with another payload and IdempotencyInProgress if
+        the first request is still running after ``wait_timeout``.
+        """
+        key = self._key(scope, idempotency_key)
+        owner = uuid.uuid4().hex
+        in_flight = json.dumps({"state": "in_flight", "owner": owner, "fingerprint": fingerprint})
+        deadline = time.monotonic() + self.wait_timeout
+        waited = False
+        
+        try:
+            while True:
+                if await self.redis.set(key, in_flight, nx=True, ex=self.lock_ttl):
+                    self._stats["claimed"] += 1
+                    return IdempotencyClaim(key, owner, fingerprint)
+                
+                raw = await self.redis.get(key)
+                if raw is None:
+                    # Released or expired between the two calls
+                    continue
+                record = json.loads(raw)
+                if record["fingerprint"] != fingerprint:
+                    self._stats["mismatched"] += 1
+                    raise IdempotencyKeyMismatch(idempotency_key)
+                if record["state"] == "completed":
+                    self._stats["replayed"] += 1
+                    return IdempotencyClaim(key, None, fingerprint, replay=record)
+                
+                if time.monotonic() >= deadline:
+                    self._stats["conflicts"] += 1
+                    raise IdempotencyInProgress(idempotency_key)
+                if not waited:
+                    waited = True
+                    self._stats["waited"] += 1
+                await asyncio.sleep(self.poll_interval)
+        except (IdempotencyKeyMismatch, IdempotencyInProgress):
+            raise
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Idempotency store unavailable, processing without deduplication: {e}")
+            return None
+    
+    async def complete(self, claim: IdempotencyClaim, status_code: int, body: Any):
+        """Store the response so duplicates replay it"""
+        record = json.dumps({
+            "state": "completed",
+            "fingerprint": claim.fingerprint,
+            "status_code": status_code,
+            "body": body
+        })
+        try:
+            await self.redis.set(claim.key, record, ex=self.ttl)
+            claim.completed = True
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Error storing idempotent response: {e}")
+    
+    async def release(self, claim: IdempotencyClaim):
+        """Drop an in-flight claim after a failure, unless another request has taken over"""
+        try:
+            raw = await self.redis.get(claim.key)
+            if raw is not None and json.loads(raw).get("owner") == claim.owner:
+                await self.redis.delete(claim.key)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Error releasing idempotency key: {e}")
+    
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats)
\ No newline at end of file
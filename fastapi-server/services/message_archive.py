@@ -0,0 +1,338 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, exists, func, select
+from starlette.concurrency import run_in_threadpool
+
+from database import Conversation, Message, db_session, stream_partitions
+from models import FINAL_STATUSES
+from serialization import dumps
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Same attributes as the message rows selected from the database
+ArchivedMessage = namedtuple(
+    "ArchivedMessage",
+    ["id", "conversation_id", "content", "message_type", "video_url", "stream_url", "created_at"]
+)
+
+def _encode(row) -> bytes:
+    return dumps({
+        "id": str(row.id),
+        "content": row.content,
+        "message_type": row.message_type,
+        "video_url": row.video_url,
+        "stream_url": row.stream_url,
+        "created_at": row.created_at.isoformat()
+    })
+
+def _decode(line: bytes, conversation_id: uuid.UUID) -> ArchivedMessage:
+    record = json.loads(line)
+    return ArchivedMessage(
+        id=uuid.UUID(record["id"]),
+        conversation_id=conversation_id,
+        content=record["content"],
+        message_type=record["message_type"],
+        video_url=record["video_url"],
+        stream_url=record["stream_url"],
+        created_at=datetime.fromisoformat(record["created_at"])
+    )
+
+class MessageArchive:
+    """Cold tier for the messages of finished conversations, as gzipped JSONL on local disk
+
+    Each archived conversation has one file,
+    ``<root>/messages/<2 hex chars>/<conversation_id>.jsonl.gz``, holding its
+    messages oldest first. ``<root>/manifest.jsonl`` records the owner, file,
+    message count, time range and checksum of every archive; it is
+    append-only, the last line for a conversation wins and a ``removed`` line
+    drops it. Readers reload the manifest when it grows (checked at most every
+    ``reload_interval`` seconds) and keep the ``cache_size`` most recently read
+    conversations decoded in memory. With several hosts the directory has to
+    be shared storage.
+    """
+    
+    def __init__(self, root: str, cache_size: int = 128, reload_interval: float = 1.0):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.jsonl")
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._manifest_size = -1
+        self._checked_at = 0.0
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._write_lock = threading.Lock()
+        self._stats = {"reads": 0, "cache_hits": 0, "archived_conversations": 0, "archived_messages": 0}
+    
+    def _path(self, conversation_id: str) -> str:
+        return os.path.join(self.root, "messages", conversation_id[:2], f"{conversation_id}.jsonl.gz")
+    
+    def _load_manifest(self):
+        try:
+            size = os.path.getsize(self.manifest_path)
+        except OSError:
+            size = 0
+        if size == self._manifest_size:
+            return
+        entries: Dict[str, Dict[str, Any]] = {}
+        if size:
+            with open(self.manifest_path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash while appending
+                        continue
+                    if entry.get("removed"):
+                        entries.pop(entry["conversation_id"], None)
+                    else:
+                        entries[entry["conversation_id"]] = entry
+        self._entries = entries
+        self._manifest_size = size
+    
+    async def refresh(self):
+        """Reload the manifest if it has changed, checking at most every ``reload_interval`` seconds"""
+        now = time.monotonic()
+        if now - self._checked_at >= self.reload_interval:
+            self._checked_at = now
+            await run_in_threadpool(self._load_manifest)
+    
+    def entry(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Manifest entry of an archived conversation as of the last refresh, or None"""
+        return self._entries.get(str(conversation_id))
+    
+    def _read_file(self, entry: Dict[str, Any]) -> List[ArchivedMessage]:
+        conversation_uuid = uuid.UUID(entry["conversation_id"])
+        with gzip.open(os.path.join(self.root, entry["file"]), "rb") as f:
+            return [_decode(line, conversation_uuid) for line in f if line.strip()]
+    
+    async def read(self, conversation_id: str, user_id: Optional[str] = None) -> List[ArchivedMessage]:
+        """Archived messages of a conversation, oldest first; empty if none or not owned by ``user_id``"""
+        await self.refresh()
+        entry = self.entry(conversation_id)
+        if entry is None or (user_id is not None and entry["user_id"] != str(user_id)):
+            return []
+        
+        self._stats["reads"] += 1
+        cached = self._cache.get(entry["conversation_id"])
+        if cached is not None and cached[0] == entry["sha256"]:
+            self._cache.move_to_end(entry["conversation_id"])
+            self._stats["cache_hits"] += 1
+            return cached[1]
+        
+        rows = await run_in_threadpool(self._read_file, entry)
+        self._cache[entry["conversation_id"]] = (entry["sha256"], rows)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return rows
+    
+    def _append_manifest(self, entry: Dict[str, Any]):
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.manifest_path, "a+b") as f:
+            # End a line cut short by a crash first, or this entry would be
+            # merged into it and skipped as unparseable
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write(json.dumps(entry).encode() + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def write(self, conversation_id: str, user_id: str, rows: List[Any]) -> Dict[str, Any]:
+        """Archive ``rows`` (oldest first), merged with what the conversation already has archived
+
+        The file is written and synced before it replaces the previous one and
+        before the manifest line is appended, so once this returns the rows can
+        be deleted from the database. Blocking; run it in a thread.
+        """
+        conversation_id = str(conversation_id)
+        with self._write_lock:
+            self._load_manifest()
+            previous = self._entries.get(conversation_id)
+            if previous is not None:
+                archived_ids = {row.id for row in rows}
+                rows = [row for row in self._read_file(previous) if row.id not in archived_ids] + list(rows)
+                rows.sort(key=lambda row: (row.created_at, row.id))
+            
+            path = self._path(conversation_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            digest = hashlib.sha256()
+            with open(path + ".tmp", "wb") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                    for row in rows:
+                        line = _encode(row) + b"\n"
+                        digest.update(line)
+                        f.write(line)
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(path + ".tmp", path)
+            
+            entry = {
+                "conversation_id": conversation_id,
+                "user_id": str(user_id),
+                "file": os.path.relpath(path, self.root),
+                "messages": len(rows),
+                "first_created_at": rows[0].created_at.isoformat() if rows else None,
+                "last_created_at": rows[-1].created_at.isoformat() if rows else None,
+                "bytes": os.path.getsize(path),
+                "sha256": digest.hexdigest(),
+                "archived_at": datetime.utcnow().isoformat()
+            }
+            self._append_manifest(entry)
+            self._load_manifest()
+            self._stats["archived_conversations"] += 1
+            self._stats["archived_messages"] += len(rows)
+            return entry
+    
+    def remove(self, conversation_id: str) -> int:
+        """Drop a conversation's archive; returns how many messages it held. Blocking."""
+        conversation_id = str(conversation_id)
+        with self._write_lock:
+            self._load_manifest()
+            entry = self._entries.get(conversation_id)
+            if entry is None:
+                return 0
+            self._append_manifest({"conversation_id": conversation_id, "removed": True})
+            self._load_manifest()
+            self._cache.pop(conversation_id, None)
+            try:
+                os.remove(os.path.join(self.root, entry["file"]))
+            except FileNotFoundError:
+                pass
+            return entry["messages"]
+    
+    async def message_counts(self, user_id: Optional[str] = None) -> Dict[str, int]:
+        """Archived messages per owner"""
+        await self.refresh()
+        counts: Dict[str, int] = {}
+        for entry in self._entries.values():
+            if user_id is None or entry["user_id"] == str(user_id):
+                counts[entry["user_id"]] = counts.get(entry["user_id"], 0) + entry["messages"]
+        return counts
+    
+    async def stats(self) -> Dict[str, Any]:
+        await self.refresh()
+        return {
+            **self._stats,
+            "conversations": len(self._entries),
+            "messages": sum(entry["messages"] for entry in self._entries.values()),
+            "bytes": sum(entry["bytes"] for entry in self._entries.values()),
+            "cached": len(self._cache)
+        }
+
+class MessageArchiver:
+    """Moves the messages of finished conversations into a MessageArchive
+
+    Conversations in a final status that have not been updated for
+    ``older_than`` are archived ``batch_size`` at a time: all their messages
+    are written to the archive, then deleted from the database in chunks of
+    ``delete_chunk`` rows, each in its own short transaction. Run it from one
+    place only (archive.py on a schedule).
+    """
+    
+    def __init__(self, archive: MessageArchive, older_than: timedelta, batch_size: int = 100, delete_chunk: int = 1000):
+        self.archive = archive
+        self.older_than = older_than
+        self.batch_size = batch_size
+        self.delete_chunk = delete_chunk
+    
+    def _candidates(self, cutoff: datetime):
+        return select(Conversation.id, Conversation.user_id).where(
+            Conversation.status.in_(FINAL_STATUSES),
+            Conversation.updated_at < cutoff,
+            Conversation.deleted_at.is_(None),
+            exists().where(Message.conversation_id == Conversation.id)
+        ).order_by(Conversation.updated_at)
+    
+    async def count_candidates(self) -> int:
+        async with db_session() as db:
+            query = select(func.count()).select_from(self._candidates(datetime.utcnow() - self.older_than).subquery())
+            return (await db.execute(query)).scalar()
+    
+    async def _is_live(self, conversation_id: uuid.UUID) -> bool:
+        async with db_session() as db:
+            query = select(Conversation.id).where(
+                Conversation.id == conversation_id,
+                Conversation.deleted_at.is_(None)
+            )
+            return (await db.execute(query)).first() is not None
+    
+    async def archive_conversation(self, conversation_id: uuid.UUID, user_id: uuid.UUID) -> int:
+        """Archive and delete a conversation's messages; returns how many were moved
+
+        Conversations deleted meanwhile are skipped. The row is checked again
+        after writing: if it was deleted during the write the archive is
+        removed here, otherwise deleting the row removes the archive after it.
+        """
+        query = select(
+            Message.id,
+            Message.conversation_id,
+            Message.content,
+            Message.message_type,
+            Message.video_url,
+            Message.stream_url,
+            Message.created_at
+        ).where(
+            Message.conversation_id == conversation_id
+        ).order_by(Message.created_at, Message.id)
+        
+        rows = []
+        async with db_session() as db:
+            async for chunk in stream_partitions(db, query, self.delete_chunk):
+                rows.extend(chunk)
+        if not rows or not await self._is_live(conversation_id):
+            return 0
+        
+        await run_in_threadpool(self.archive.write, conversation_id, user_id, rows)
+        if not await self._is_live(conversation_id):
+            await run_in_threadpool(self.archive.remove, conversation_id)
+            return 0
+        
+        async with db_session() as db:
+            for start in range(0, len(rows), self.delete_chunk):
+                chunk = rows[start:start + self.delete_chunk]
+                await db.execute(
+                    delete(Message).where(
+                        Message.conversation_id == conversation_id,
+                        Message.created_at <= chunk[-1].created_at,
+                        Message.id.in_([row.id for row in chunk])
+                    )
+                )
+                await db.commit()
+        return len(rows)
+    
+    async def run(self, limit: Optional[int] = None) -> Dict[str, int]:
+        """Archive eligible conversations, at most ``limit`` of them"""
+        cutoff = datetime.utcnow() - self.older_than
+        totals = {"conversations": 0, "messages": 0, "errors": 0}
+        failed = set()
+        while limit is None or totals["conversations"] < limit:
+            size = self.batch_size if limit is None else min(self.batch_size, limit - totals["conversations"])
+            async with db_session() as db:
+                query = self._candidates(cutoff)
+                if failed:
+                    query = query.where(Conversation.id.notin_(failed))
+                batch = list((await db.execute(query.limit(size))).all())
+            if not batch:
+                break
+            for conversation_id, user_id in batch:
+                try:
+                    totals["messages"] += await self.archive_conversation(conversation_id, user_id)
+                    totals["conversations"] += 1
+                except Exception as e:
+                    failed.add(conversation_id)
+                    totals["errors"] += 1
+                    logger.error(f"Error archiving conversation {conversation_id}: {e}")
+        return totals
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+import logging
+
+import redis
+from limits.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# Adds a worker's hits to a window and returns (count, pttl). Runs atomically,
+# so the key cannot expire between being created and incremented; a window
+# left without a TTL (PTTL -1) is given one again instead of never expiring.
+SYNC_WINDOW_SCRIPT = """
+local count = redis.call('INCRBY', KEYS[1], ARGV[1])
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl < 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    ttl = tonumber(ARGV[2]) * 1000
+end
+return {count, ttl}
+"""
+
+class _LocalWindow:
+    __slots__ = ("expires_at", "expiry", "synced", "pending")
+    
+    def __init__(self, expires_at: float, expiry: int):
+        self.expires_at = expires_at
+        self.expiry = expiry
+        # Global count as of the last sync, and hits not yet pushed to Redis
+        self.synced = 0
+        self.pending = 0
+
+class HybridRedisStorage(Storage):
+    """Rate limit storage that counts in process and syncs with Redis in batches
+
+    Registered for ``hybrid+redis://`` and ``hybrid+rediss://`` URIs, so it can
+    be used as a slowapi/limits ``storage_uri``. Each hit is a local increment;
+    a background thread pushes accumulated hits to Redis every
+    ``sync_interval`` seconds with one pipeline and pulls back the global
+    count and window expiry. Limits are therefore enforced globally up to the
+    hits other workers made since the last sync. If Redis is unreachable the
+    limits fall back to per-worker counting until it returns.
+
+    Supports the fixed-window strategies only.
+    """
+    
+    STORAGE_SCHEME = ["hybrid+redis", "hybrid+rediss"]
+    
+    def __init__(
+        self,
+        uri: str,
+        wrap_exceptions: bool = False,
+        sync_interval: float = 1.0,
+        **options: Any
+    ):
+        self.redis_url = uri.replace("hybrid+", "", 1)
+        self.sync_interval = float(sync_interval)
+        self.redis = redis.from_url(self.redis_url, **options)
+        self._sync_window = self.redis.register_script(SYNC_WINDOW_SCRIPT)
+        
+        self._windows: Dict[str, _LocalWindow] = {}
+        self._pid: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._redis_ok = True
+        self._syncs = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+    
+    @property
+    def base_exceptions(self):
+        return redis.RedisError
+    
+    def _ensure_sync_thread(self):
+        # Started lazily so each forked worker gets its own thread
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._sync_loop, name="rate-limit-sync", daemon=True)
+            self._thread.start()
+    
+    def _window(self, key: str) -> Optional[_LocalWindow]:
+        window = self._windows.get(key)
+        if window is not None and window.expires_at <= time.time():
+            del self._windows[key]
+            return None
+        return window
+    
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        self._ensure_sync_thread()
+        with self.lock:
+            window = self._window(key)
+            if window is None:
+                window = self._windows[key] = _LocalWindow(time.time() + expiry, expiry)
+            elif elastic_expiry:
+                window.expires_at = time.time() + expiry
+            window.pending += amount
+            return window.synced + window.pending
+    
+    def get(self, key: str) -> int:
+        with self.lock:
+            window = self._window(key)
+            return window.synced + window.pending if window else 0
+    
+    def get_expiry(self, key: str) -> int:
+        with self.lock:
+            window = self._window(key)
+            return int(window.expires_at) if window else int(time.time())
+    
+    def check(self) -> bool:
+        # Hits are always served locally, so the storage is usable without Redis
+        return True
+    
+    def reset(self) -> Optional[int]:
+        with self.lock:
+            keys = list(self._windows)
+            self._windows.clear()
+        if keys:
+            self.redis.delete(*keys)
+        return len(keys)
+    
+    def clear(self, key: str) -> None:
+        with self.lock:
+            self._windows.pop(key, None)
+        self.redis.delete(key)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            pending = sum(window.pending for window in self._windows.values())
+            return {
+                "keys": len(self._windows),
+                "pending_hits": pending,
+                "syncs": self._syncs,
+                "redis_available": self._redis_ok
+            }
+    
+    def sync(self):
+        """Push pending hits to Redis and refresh global counts and expiries"""
+        with self.lock:
+            now = time.time()
+            for key in [key for key, window in self._windows.items() if window.expires_at <= now]:
+                del self._windows[key]
+            batch = [(key, window, window.pending) for key, window in self._windows.items()]
+        if not batch:
+            return
+        
+        pipe = self.redis.pipeline(transaction=False)
+        for key, window, pending in batch:
+            self._sync_window(keys=[key], args=[pending, window.expiry], client=pipe)
+        results = pipe.execute()
+        
+        with self.lock:
+            for (key, window, pending), (count, ttl_ms) in zip(batch, results):
+                window.pending -= pending
+                window.synced = int(count)
+                if ttl_ms and ttl_ms > 0:
+                    window.expires_at = time.time() + ttl_ms / 1000
+        self._syncs += 1
+    
+    def _sync_loop(self):
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+                if not self._redis_ok:
+                    logger.info("Rate limit storage reconnected to Redis")
+                self._redis_ok = True
+            except Exception as e:
+                if self._redis_ok:
+                    logger.warning(f"Rate limit sync failed, counting locally until Redis is back: {e}")
+                self._redis_ok = False
\ No newline at end of file
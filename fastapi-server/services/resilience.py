@@ -0,0 +1,172 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+    
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Count-based circuit breaker with half-open probing
+
+    Outcomes of the last ``window`` calls are kept; once at least
+    ``min_calls`` have been seen and the share of failures (errors, or calls
+    slower than ``slow_call_seconds``) reaches ``failure_rate``, the circuit
+    opens and calls fail fast with CircuitOpenError. After ``reset_timeout``
+    seconds up to ``half_open_calls`` probe calls are let through: if they
+    all succeed the circuit closes, any failure opens it again.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        reset_timeout: float = 30.0,
+        half_open_calls: int = 3
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        
+        self.state = CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._stats = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+    
+    def before_call(self):
+        """Reserve a call, raising CircuitOpenError if the circuit does not allow one"""
+        if self.state == OPEN:
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                self._stats["rejected"] += 1
+                raise CircuitOpenError(self.name, remaining)
+            self.state = HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+        
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight + self._probe_successes >= self.half_open_calls:
+                self._stats["rejected"] += 1
+                raise CircuitOpenError(self.name, self.reset_timeout)
+            self._probes_in_flight += 1
+        self._stats["calls"] += 1
+    
+    def release(self):
+        """Give back a call reserved with before_call that ended without an outcome (cancelled)"""
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+    
+    def record(self, ok: bool, duration: float = 0.0):
+        """Record the outcome of a call reserved with before_call"""
+        if ok and duration > self.slow_call_seconds:
+            self._stats["slow_calls"] += 1
+            ok = False
+        if not ok:
+            self._stats["failures"] += 1
+        
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if not ok:
+                self._open()
+            else:
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_calls:
+                    logger.info(f"Circuit '{self.name}' closed")
+                    self.state = CLOSED
+                    self._outcomes.clear()
+            return
+        
+        self._outcomes.append(ok)
+        if self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+            failures = self._outcomes.count(False)
+            if failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+    
+    def _open(self):
+        if self.state != OPEN:
+            logger.warning(f"Circuit '{self.name}' opened, failing fast for {self.reset_timeout}s")
+            self._stats["opened"] += 1
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "window_calls": len(self._outcomes),
+            "window_failures": self._outcomes.count(False),
+            **self._stats
+        }
+
+class LatencyTracker:
+    """Recent call durations, used to derive the hedging delay"""
+    
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=size)
+    
+    def observe(self, duration: float):
+        self._samples.append(duration)
+    
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def hedged(call: Callable[[], Awaitable[Any]], delay: float, max_attempts: int = 2) -> Any:
+    """Run ``call`` and start another attempt every ``delay`` seconds it has not finished
+
+    Returns the first successful result and cancels the attempts still
+    running. Only for idempotent calls. Raises the first error if every
+    attempt fails.
+    """
+    pending = {asyncio.ensure_future(call())}
+    attempts = 1
+    first_error: Optional[BaseException] = None
+    try:
+        while pending:
+            timeout = delay if attempts < max_attempts else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                first_error = first_error or task.exception()
+            if not done:
+                pending.add(asyncio.ensure_future(call()))
+                attempts += 1
+        raise first_error
+    finally:
+        for task in pending:
+            task.cancel()
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff for retry ``attempt`` (0-based), capped at ``cap``
+
+    A server-provided ``retry_after`` is honoured as a lower bound, up to the cap.
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, cap))
+    return delay
\ No newline at end of file
@@ -0,0 +1,100 @@
+import time
+from typing import Any, Dict, Iterable, Optional
+import logging
+
+from models import FINAL_STATUSES
+
+logger = logging.getLogger(__name__)
+
+class ConversationStatusCache:
+    """Latest known Tavus status per conversation, one Redis hash per tavus_conversation_id
+
+    Written by the webhook consumer and the status poller; read by
+    GET /api/v2/conversations/{id}. Non-final entries older than ``max_age`` are
+    treated as stale, final ones never are.
+    """
+    
+    FIELDS = ("status", "video_url", "stream_url")
+    
+    def __init__(
+        self,
+        redis_client,
+        max_age: float,
+        ttl: int = 86400,
+        prefix: str = "docamy:conversation-status"
+    ):
+        self.redis = redis_client
+        self.max_age = max_age
+        self.ttl = ttl
+        self.prefix = prefix
+        self._stats = {"hits": 0, "stale": 0, "misses": 0, "errors": 0}
+    
+    def _key(self, tavus_conversation_id: str) -> str:
+        return f"{self.prefix}:{tavus_conversation_id}"
+    
+    async def get(self, tavus_conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Return the cached status if present and fresh enough, else None"""
+        try:
+            raw = await self.redis.hgetall(self._key(tavus_conversation_id))
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Error reading status cache for {tavus_conversation_id}: {e}")
+            return None
+        
+        if not raw:
+            self._stats["misses"] += 1
+            return None
+        
+        entry = {
+            (key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes) else value)
+            for key, value in raw.items()
+        }
+        age = time.time() - float(entry.get("updated_at", 0))
+        if entry.get("status") not in FINAL_STATUSES and age > self.max_age:
+            self._stats["stale"] += 1
+            return None
+        
+        self._stats["hits"] += 1
+        result = {field: entry.get(field) or None for field in self.FIELDS}
+        result["age"] = age
+        return result
+    
+    async def set(
+        self,
+        tavus_conversation_id: str,
+        status: Optional[str],
+        video_url: Optional[str] = None,
+        stream_url: Optional[str] = None
+    ):
+        await self.set_many([{
+            "tavus_conversation_id": tavus_conversation_id,
+            "status": status,
+            "video_url": video_url,
+            "stream_url": stream_url
+        }])
+    
+    async def set_many(self, items: Iterable[Dict[str, Any]]):
+        """Record several statuses in one pipeline; missing URLs keep their cached value"""
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            count = 0
+            for item in items:
+                status = item.get("status")
+                if not status:
+                    continue
+                mapping = {"status": str(getattr(status, "value", status)), "updated_at": time.time()}
+                for field in ("video_url", "stream_url"):
+                    if item.get(field):
+                        mapping[field] = item[field]
+                key = self._key(item["tavus_conversation_id"])
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, self.ttl)
+                count += 1
+            if count:
+                await pipe.execute()
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Error writing status cache: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats)
\ No newline at end of file
@@ -0,0 +1,215 @@
+import asyncio
+import heapq
+import itertools
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+import logging
+
+from database import db_session
+from models import FINAL_STATUSES
+from metrics import timed_task
+
+logger = logging.getLogger(__name__)
+
+class _TrackedConversation:
+    __slots__ = ("tavus_conversation_id", "attempts", "interval", "next_check", "last_status")
+    
+    def __init__(self, tavus_conversation_id: str, interval: float):
+        self.tavus_conversation_id = tavus_conversation_id
+        self.attempts = 0
+        self.interval = interval
+        self.next_check = 0.0
+        self.last_status: Optional[str] = None
+
+class ConversationStatusPoller:
+    """Single per-worker scheduler that polls Tavus for conversation status
+
+    Conversations sit in a heap keyed by their next check time. One loop pops
+    due entries and checks them with bounded concurrency; the poll interval
+    backs off while the status is unchanged and resets when it moves. Final
+    statuses are buffered and written in one batched UPDATE. Conversations
+    whose final status already arrived by webhook are cancelled; those that
+    another worker finished (its webhook or poller wrote a final status to the
+    shared status cache) are dropped before they are polled again.
+    """
+    
+    def __init__(
+        self,
+        tavus_service,
+        conversation_service,
+        base_interval: float,
+        max_interval: float,
+        backoff_factor: float,
+        max_attempts: int,
+        concurrency: int,
+        flush_interval: float,
+        status_cache=None
+    ):
+        self.tavus_service = tavus_service
+        self.conversation_service = conversation_service
+        self.status_cache = status_cache
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.max_attempts = max_attempts
+        self.flush_interval = flush_interval
+        
+        self._heap: List[Tuple[float, int, str]] = []
+        self._tracked: Dict[str, _TrackedConversation] = {}
+        self._seq = itertools.count()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._wakeup = asyncio.Event()
+        self._pending_updates: Dict[str, Dict[str, Any]] = {}
+        self._checks: Set[asyncio.Task] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._stats = {"checks": 0, "errors": 0, "finalized": 0, "cancelled": 0, "already_final": 0, "expired": 0, "flushed": 0}
+    
+    def track(self, tavus_conversation_id: str):
+        """Start polling a conversation until it reaches a final status"""
+        entry = _TrackedConversation(tavus_conversation_id, self.base_interval)
+        self._tracked[tavus_conversation_id] = entry
+        self._schedule(entry)
+    
+    def cancel(self, tavus_conversation_id: str):
+        """Stop polling a conversation, e.g. when a webhook delivered its final status"""
+        if self._tracked.pop(tavus_conversation_id, None) is not None:
+            self._stats["cancelled"] += 1
+        self._pending_updates.pop(tavus_conversation_id, None)
+    
+    async def start(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._run()),
+                asyncio.create_task(self._flush_loop())
+            ]
+    
+    async def stop(self):
+        tasks = self._tasks + list(self._checks)
+        self._tasks = []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.flush()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "tracked": len(self._tracked),
+            "in_flight": len(self._checks),
+            "pending_updates": len(self._pending_updates)
+        }
+    
+    def _schedule(self, entry: _TrackedConversation):
+        loop = asyncio.get_running_loop()
+        entry.next_check = loop.time() + entry.interval
+        heapq.heappush(self._heap, (entry.next_check, next(self._seq), entry.tavus_conversation_id))
+        self._wakeup.set()
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            while self._heap and self._heap[0][0] <= now:
+                due_at, _, tavus_conversation_id = heapq.heappop(self._heap)
+                entry = self._tracked.get(tavus_conversation_id)
+                # Skip cancelled conversations and superseded heap entries
+                if entry is None or entry.next_check != due_at:
+                    continue
+                
+                await self._semaphore.acquire()
+                task = asyncio.create_task(self._check(entry))
+                self._checks.add(task)
+                task.add_done_callback(self._check_done)
+                now = loop.time()
+            
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    
+    def _check_done(self, task: asyncio.Task):
+        self._checks.discard(task)
+        self._semaphore.release()
+    
+    @timed_task("status_poll_check")
+    async def _check(self, entry: _TrackedConversation):
+        tavus_conversation_id = entry.tavus_conversation_id
+        if self.status_cache is not None:
+            cached = await self.status_cache.get(tavus_conversation_id)
+            if cached and cached["status"] in FINAL_STATUSES:
+                if self._tracked.get(tavus_conversation_id) is entry:
+                    self._tracked.pop(tavus_conversation_id, None)
+                    self._stats["already_final"] += 1
+                return
+        
+        self._stats["checks"] += 1
+        try:
+            status = await self.tavus_service.get_conversation_status(tavus_conversation_id)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.error(f"Error monitoring conversation {tavus_conversation_id}: {e}")
+            status = {}
+        
+        if self._tracked.get(tavus_conversation_id) is not entry:
+            return
+        
+        current = status.get("status")
+        if current and self.status_cache is not None:
+            await self.status_cache.set(
+                tavus_conversation_id,
+                current,
+                video_url=status.get("video_url"),
+                stream_url=status.get("stream_url")
+            )
+        
+        if current in FINAL_STATUSES:
+            self._tracked.pop(tavus_conversation_id, None)
+            self._pending_updates[tavus_conversation_id] = {
+                "tavus_conversation_id": tavus_conversation_id,
+                "status": current,
+                "video_url": status.get("video_url"),
+                "updated_at": datetime.utcnow()
+            }
+            self._stats["finalized"] += 1
+            return
+        
+        entry.attempts += 1
+        if entry.attempts >= self.max_attempts:
+            self._tracked.pop(tavus_conversation_id, None)
+            self._stats["expired"] += 1
+            logger.warning(f"Stopped monitoring conversation {tavus_conversation_id} after {entry.attempts} checks")
+            return
+        
+        # Poll quickly while the status is moving, back off while it is not
+        if current is not None and current != entry.last_status:
+            entry.interval = self.base_interval
+        else:
+            entry.interval = min(entry.interval * self.backoff_factor, self.max_interval)
+        entry.last_status = current
+        self._schedule(entry)
+    
+    @timed_task("status_poll_flush")
+    async def flush(self) -> int:
+        """Write buffered final statuses in one transaction"""
+        if not self._pending_updates:
+            return 0
+        
+        updates = list(self._pending_updates.values())
+        self._pending_updates = {}
+        try:
+            async with db_session() as db:
+                count = await self.conversation_service.bulk_update_conversation_status(db, updates)
+            self._stats["flushed"] += count
+            return count
+        except Exception as e:
+            logger.error(f"Error flushing conversation status updates: {e}")
+            for update in updates:
+                self._pending_updates.setdefault(update["tavus_conversation_id"], update)
+            return 0
+    
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
\ No newline at end of file
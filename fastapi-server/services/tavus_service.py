@@ -1,13 +1,110 @@
+import asyncio
 import httpx
 import hmac
 import hashlib
 import json
+import functools
+import time
+from contextvars import ContextVar
 from typing import Dict, Any, Optional, List
 from config import settings
+from metrics import TAVUS_REQUEST_DURATION
+from services.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, backoff_delay, hedged
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Outcome of the last HTTP exchange in the current task, read by _timed
+_response_status: ContextVar[Optional[str]] = ContextVar("tavus_response_status", default=None)
+
+def _timed(operation: str):
+    """Record the duration and response status of a TavusService method"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            _response_status.set(None)
+            started = time.perf_counter()
+            failed = False
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                status = _response_status.get() or ("error" if failed else "ok")
+                TAVUS_REQUEST_DURATION.observe(time.perf_counter() - started, operation, status)
+        return wrapper
+    return decorator
+
+# Safe to retry for any request: Tavus refused it without acting
+_RETRYABLE_STATUSES = {429, 503}
+# Only safe to retry for idempotent requests, since Tavus may have acted on
+# them (a gateway's 502 does not prove the request never reached Tavus)
+_IDEMPOTENT_RETRYABLE_STATUSES = {500, 502, 504}
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+
+def _retryable_error(error: Exception, idempotent: bool) -> bool:
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    return idempotent and isinstance(error, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError))
+
+def _retryable_status(status_code: int, idempotent: bool) -> bool:
+    return status_code in _RETRYABLE_STATUSES or (idempotent and status_code in _IDEMPOTENT_RETRYABLE_STATUSES)
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+class _PoolStatsTransport(httpx.AsyncHTTPTransport):
+    """HTTP transport that counts requests and connection handshakes"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests_total = 0
+        self.requests_in_flight = 0
+        self.tcp_connects = 0
+        self.tls_handshakes = 0
+    
+    async def _trace(self, event_name: str, info: Dict[str, Any]):
+        if event_name == "connection.connect_tcp.complete":
+            self.tcp_connects += 1
+        elif event_name == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions["trace"] = self._trace
+        self.requests_total += 1
+        self.requests_in_flight += 1
+        try:
+            response = await super().handle_async_request(request)
+            _response_status.set(str(response.status_code))
+            return response
+        except httpx.TimeoutException:
+            _response_status.set("timeout")
+            raise
+        except httpx.HTTPError:
+            _response_status.set("connection_error")
+            raise
+        finally:
+            self.requests_in_flight -= 1
+    
+    def stats(self) -> Dict[str, Any]:
+        connections = list(self._pool.connections)
+        idle = sum(1 for conn in connections if conn.is_idle())
+        http2 = sum(1 for conn in connections if "HTTP/2" in repr(conn))
+        return {
+            "connections": len(connections),
+            "in_use": len(connections) - idle,
+            "idle": idle,
+            "http2_connections": http2,
+            "requests_total": self.requests_total,
+            "requests_in_flight": self.requests_in_flight,
+            "tcp_connects": self.tcp_connects,
+            "tls_handshakes": self.tls_handshakes
+        }
+
 class TavusService:
     def __init__(self):
         self.api_key = settings.TAVUS_API_KEY
@@ -18,28 +115,231 @@ class TavusService:
             "Content-Type": "application/json",
             "x-api-key": self.api_key
         }
+        
+        self._client: Optional[httpx.AsyncClient] = None
+        self._transport: Optional[_PoolStatsTransport] = None
+        self._transport_http2 = False
+        
+        # One breaker per Tavus operation, so a failing endpoint does not
+        # take the healthy ones down with it
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[str, LatencyTracker] = {}
+        self._retries = 0
+    
+    async def start(self):
+        """Open the shared, pooled HTTP client used for all Tavus calls"""
+        if self._client is None:
+            self._client = self._build_client()
+            logger.info(
+                f"Tavus HTTP client started (max_connections={settings.TAVUS_HTTP_MAX_CONNECTIONS}, "
+                f"http2={self._transport_http2})"
+            )
+    
+    async def close(self):
+        """Close the shared HTTP client and its connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._transport = None
+    
+    def _build_client(self) -> httpx.AsyncClient:
+        """Build an HTTP client with configured pool limits and keep-alive"""
+        http2 = settings.TAVUS_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 requested for Tavus client but 'h2' is not installed, using HTTP/1.1")
+                http2 = False
+        
+        limits = httpx.Limits(
+            max_connections=settings.TAVUS_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.TAVUS_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.TAVUS_HTTP_KEEPALIVE_EXPIRY
+        )
+        self._transport = _PoolStatsTransport(http2=http2, limits=limits)
+        self._transport_http2 = http2
+        
+        return httpx.AsyncClient(
+            headers=self.headers,
+            transport=self._transport,
+            timeout=httpx.Timeout(30.0, connect=settings.TAVUS_HTTP_CONNECT_TIMEOUT)
+        )
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared client, creating it lazily outside the app lifespan"""
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics for the shared Tavus client"""
+        if self._transport is None:
+            return {"started": False}
+        
+        stats = self._transport.stats()
+        stats.update({
+            "started": True,
+            "http2_enabled": self._transport_http2,
+            "max_connections": settings.TAVUS_HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.TAVUS_HTTP_MAX_KEEPALIVE
+        })
+        return stats
+    
+    def _breaker(self, operation: str) -> CircuitBreaker:
+        breaker = self._breakers.get(operation)
+        if breaker is None:
+            breaker = self._breakers[operation] = CircuitBreaker(
+                f"tavus.{operation}",
+                window=settings.TAVUS_BREAKER_WINDOW,
+                min_calls=settings.TAVUS_BREAKER_MIN_CALLS,
+                failure_rate=settings.TAVUS_BREAKER_FAILURE_RATE,
+                slow_call_seconds=(
+                    settings.TAVUS_BREAKER_MESSAGE_SLOW_CALL_SECONDS if operation == "send_message"
+                    else settings.TAVUS_BREAKER_SLOW_CALL_SECONDS
+                ),
+                reset_timeout=settings.TAVUS_BREAKER_RESET_TIMEOUT,
+                half_open_calls=settings.TAVUS_BREAKER_HALF_OPEN_CALLS
+            )
+        return breaker
+    
+    def _hedge_delay(self, operation: str) -> float:
+        """Delay before a hedged attempt: the configured percentile of recent latencies, clamped"""
+        observed = self._latencies.setdefault(operation, LatencyTracker()).percentile(settings.TAVUS_HEDGE_PERCENTILE)
+        if observed is None:
+            return settings.TAVUS_HEDGE_MAX_DELAY
+        return min(max(observed, settings.TAVUS_HEDGE_MIN_DELAY), settings.TAVUS_HEDGE_MAX_DELAY)
+    
+    async def _request(
+        self,
+        operation: str,
+        method: str,
+        path: str,
+        timeout: float,
+        hedge: bool = False,
+        **kwargs
+    ) -> httpx.Response:
+        """Send a request, retrying transient failures with jittered exponential backoff
+        
+        Connection failures, 429 and 503 are retried for every method;
+        timeouts, 500, 502 and 504 only for idempotent methods, since Tavus
+        may already have acted on a POST. The last response is returned (or error
+        raised) once TAVUS_RETRY_ATTEMPTS are used up.
+        """
+        idempotent = method in _IDEMPOTENT_METHODS
+        attempts = max(1, settings.TAVUS_RETRY_ATTEMPTS)
+        for attempt in range(attempts):
+            retry_after = None
+            try:
+                response = await self._send(operation, method, path, timeout, hedge, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == attempts - 1 or not _retryable_error(e, idempotent):
+                    raise
+                reason = type(e).__name__
+            else:
+                if attempt == attempts - 1 or not _retryable_status(response.status_code, idempotent):
+                    return response
+                reason, retry_after = str(response.status_code), _retry_after(response)
+            
+            delay = backoff_delay(attempt, settings.TAVUS_RETRY_BASE_DELAY, settings.TAVUS_RETRY_MAX_DELAY, retry_after)
+            self._retries += 1
+            logger.warning(f"Retrying Tavus {operation} after {reason} in {delay:.2f}s ({attempt + 1}/{attempts - 1})")
+            await asyncio.sleep(delay)
+    
+    async def _send(
+        self,
+        operation: str,
+        method: str,
+        path: str,
+        timeout: float,
+        hedge: bool = False,
+        **kwargs
+    ) -> httpx.Response:
+        """Send one request through the operation's circuit breaker
+        
+        Raises CircuitOpenError without calling Tavus while the circuit is
+        open. 5xx/429 responses, transport errors and slow calls count as
+        failures; cancelled calls (client disconnects) are not recorded.
+        With ``hedge`` (idempotent GETs only) a second attempt is started
+        when the first is slower than the recent latency percentile.
+        """
+        breaker = self._breaker(operation) if settings.TAVUS_BREAKER_ENABLED else None
+        if breaker is not None:
+            try:
+                breaker.before_call()
+            except CircuitOpenError:
+                _response_status.set("circuit_open")
+                raise
+        
+        client = self._get_client()
+        
+        async def attempt() -> httpx.Response:
+            return await client.request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+        
+        started = time.perf_counter()
+        ok = cancelled = False
+        try:
+            if hedge and settings.TAVUS_HEDGE_ENABLED:
+                response = await hedged(attempt, self._hedge_delay(operation), settings.TAVUS_HEDGE_MAX_ATTEMPTS)
+                # Attempts run in their own tasks, so carry the status over for _timed
+                _response_status.set(str(response.status_code))
+            else:
+                response = await attempt()
+            ok = response.status_code < 500 and response.status_code != 429
+            return response
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            if ok:
+                self._latencies.setdefault(operation, LatencyTracker()).observe(duration)
+            if breaker is not None:
+                if cancelled:
+                    breaker.release()
+                else:
+                    breaker.record(ok, duration)
+    
+    def resilience_stats(self) -> Dict[str, Any]:
+        """Circuit breaker state, retry count and hedging delays for Tavus calls"""
+        return {
+            "breaker_enabled": settings.TAVUS_BREAKER_ENABLED,
+            "hedge_enabled": settings.TAVUS_HEDGE_ENABLED,
+            "retries": self._retries,
+            "circuits": {operation: breaker.stats() for operation, breaker in self._breakers.items()},
+            "hedge_delays": {
+                operation: round(self._hedge_delay(operation), 4)
+                for operation in self._latencies
+            }
+        }
     
+    @_timed("test_connection")
     async def test_connection(self) -> bool:
         """Test connection to Tavus API"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/replicas",
-                    headers=self.headers,
-                    timeout=10.0
-                )
-                return response.status_code == 200
+            client = self._get_client()
+            response = await client.get(
+                f"{self.base_url}/replicas",
+                timeout=10.0
+            )
+            return response.status_code == 200
         except Exception as e:
             logger.error(f"Tavus API connection test failed: {e}")
             return False
     
+    @_timed("create_conversation")
     async def create_conversation(
         self,
         replica_id: str,
         persona_id: str,
-        properties: Optional[Dict[str, Any]] = None
+        properties: Optional[Dict[str, Any]] = None,
+        batch: bool = False
     ) -> Dict[str, Any]:
-        """Create a new conversation with Tavus"""
+        """Create a new conversation with Tavus
+        
+        Batch creates go through their own circuit breaker, so one large
+        failing batch cannot open the circuit for single creates.
+        """
         try:
             payload = {
                 "replica_id": replica_id,
@@ -47,26 +347,29 @@ class TavusService:
                 "properties": properties or {}
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/conversations",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=30.0
-                )
-                
-                if response.status_code != 200:
-                    error_data = response.json() if response.content else {}
-                    raise Exception(f"Tavus API error: {error_data.get('message', response.text)}")
-                
-                return response.json()
-                
+            response = await self._request(
+                "create_conversation_batch" if batch else "create_conversation",
+                "POST",
+                "/conversations",
+                timeout=30.0,
+                json=payload
+            )
+            
+            if response.status_code != 200:
+                error_data = response.json() if response.content else {}
+                raise Exception(f"Tavus API error: {error_data.get('message', response.text)}")
+            
+            return response.json()
+            
         except httpx.TimeoutException:
             raise Exception("Tavus API request timed out")
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error creating conversation: {e}")
             raise
     
+    @_timed("send_message")
     async def send_message(
         self,
         conversation_id: str,
@@ -76,100 +379,104 @@ class TavusService:
         try:
             payload = {"text": text}
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/conversations/{conversation_id}",
-                    headers=self.headers,
-                    json=payload,
-                    timeout=60.0
-                )
-                
-                if response.status_code != 200:
-                    error_data = response.json() if response.content else {}
-                    raise Exception(f"Tavus API error: {error_data.get('message', response.text)}")
-                
-                return response.json()
-                
+            response = await self._request(
+                "send_message",
+                "POST",
+                f"/conversations/{conversation_id}",
+                timeout=60.0,
+                json=payload
+            )
+            
+            if response.status_code != 200:
+                error_data = response.json() if response.content else {}
+                raise Exception(f"Tavus API error: {error_data.get('message', response.text)}")
+            
+            return response.json()
+            
         except httpx.TimeoutException:
             raise Exception("Tavus API request timed out")
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error sending message: {e}")
             raise
     
+    @_timed("get_conversation_status")
     async def get_conversation_status(self, conversation_id: str) -> Dict[str, Any]:
         """Get conversation status from Tavus"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/conversations/{conversation_id}",
-                    headers=self.headers,
-                    timeout=30.0
-                )
-                
-                if response.status_code != 200:
-                    error_data = response.json() if response.content else {}
-                    raise Exception(f"Tavus API error: {error_data.get('message', response.text)}")
-                
-                return response.json()
-                
+            response = await self._request(
+                "get_conversation_status",
+                "GET",
+                f"/conversations/{conversation_id}",
+                timeout=30.0,
+                hedge=True
+            )
+            
+            if response.status_code != 200:
+                error_data = response.json() if response.content else {}
+                raise Exception(f"Tavus API error: {error_data.get('message', response.text)}")
+            
+            return response.json()
+            
         except httpx.TimeoutException:
             raise Exception("Tavus API request timed out")
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error getting conversation status: {e}")
             raise
     
+    @_timed("delete_conversation")
     async def delete_conversation(self, conversation_id: str) -> bool:
-        """Delete a conversation from Tavus"""
+        """Delete a conversation from Tavus; True once it no longer exists there"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(
-                    f"{self.base_url}/conversations/{conversation_id}",
-                    headers=self.headers,
-                    timeout=30.0
-                )
-                
-                return response.status_code == 204
-                
+            response = await self._request(
+                "delete_conversation",
+                "DELETE",
+                f"/conversations/{conversation_id}",
+                timeout=30.0
+            )
+            
+            # Already gone counts as deleted, so retried deletes are safe
+            return response.status_code in (204, 404)
+            
         except Exception as e:
             logger.error(f"Error deleting conversation: {e}")
             return False
     
+    @_timed("list_replicas")
     async def list_replicas(self) -> List[Dict[str, Any]]:
         """List available replicas"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/replicas",
-                    headers=self.headers,
-                    timeout=30.0
-                )
-                
-                if response.status_code != 200:
-                    error_data = response.json() if response.content else {}
-                    raise Exception(f"Tavus API error: {error_data.get('message', response.text)}")
-                
-                return response.json().get("data", [])
-                
+            response = await self._request("list_replicas", "GET", "/replicas", timeout=30.0)
+            
+            if response.status_code != 200:
+                error_data = response.json() if response.content else {}
+                raise Exception(f"Tavus API error: {error_data.get('message', response.text)}")
+            
+            return response.json().get("data", [])
+            
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error listing replicas: {e}")
             raise
     
+    @_timed("list_personas")
     async def list_personas(self) -> List[Dict[str, Any]]:
         """List available personas"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/personas",
-                    headers=self.headers,
-                    timeout=30.0
-                )
-                
-                if response.status_code != 200:
-                    error_data = response.json() if response.content else {}
-                    raise Exception(f"Tavus API error: {error_data.get('message', response.text)}")
-                
-                return response.json().get("data", [])
-                
+            response = await self._request("list_personas", "GET", "/personas", timeout=30.0)
+            
+            if response.status_code != 200:
+                error_data = response.json() if response.content else {}
+                raise Exception(f"Tavus API error: {error_data.get('message', response.text)}")
+            
+            return response.json().get("data", [])
+            
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error listing personas: {e}")
             raise
@@ -0,0 +1,191 @@
+import asyncio
+from collections import Counter
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+import logging
+
+from metrics import timed_task
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ("conversations", "active_conversations", "messages")
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+class UsageStatsService:
+    """Per-user usage counters kept in Redis and updated incrementally
+
+    Conversation, active conversation and message counts live in one hash per
+    user and are adjusted by ConversationService as rows are created, deleted
+    or change status. API calls are counted in-process and flushed to per-day
+    and per-month hashes every ``flush_interval``. A reconciliation job
+    recomputes the conversation counters from the database every
+    ``reconcile_interval`` to repair drift; only one worker runs it per
+    interval.
+    """
+    
+    def __init__(
+        self,
+        redis_client,
+        flush_interval: float,
+        reconcile_interval: float,
+        counts_loader: Optional[Callable[[], Awaitable[Dict[str, Dict[str, int]]]]] = None,
+        prefix: str = "docamy:usage"
+    ):
+        self.redis = redis_client
+        self.flush_interval = flush_interval
+        self.reconcile_interval = reconcile_interval
+        self.counts_loader = counts_loader
+        self.prefix = prefix
+        
+        self._api_calls: Counter = Counter()
+        self._tasks = []
+        self._stats = {"adjustments": 0, "api_call_flushes": 0, "reconciled_users": 0, "errors": 0}
+    
+    async def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._flush_loop())]
+            if self.counts_loader is not None:
+                self._tasks.append(asyncio.create_task(self._reconcile_loop()))
+    
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.flush()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "buffered_api_calls": sum(self._api_calls.values())}
+    
+    def _counters_key(self, user_id: str) -> str:
+        return f"{self.prefix}:{user_id}"
+    
+    def _calls_keys(self, now: datetime):
+        return f"{self.prefix}:calls:{now:%Y%m%d}", f"{self.prefix}:calls:{now:%Y%m}"
+    
+    async def adjust_many(self, deltas: Dict[str, Dict[str, int]]):
+        """Apply counter deltas for several users in one pipeline
+
+        Users whose counters have not been seeded yet are skipped; their first
+        read loads them from the database instead.
+        """
+        deltas = {
+            user_id: {field: value for field, value in fields.items() if value}
+            for user_id, fields in deltas.items()
+        }
+        deltas = {user_id: fields for user_id, fields in deltas.items() if fields}
+        if not deltas:
+            return
+        
+        try:
+            user_ids = list(deltas)
+            pipe = self.redis.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.exists(self._counters_key(user_id))
+            seeded = await pipe.execute()
+            
+            pipe = self.redis.pipeline(transaction=False)
+            for user_id, exists in zip(user_ids, seeded):
+                if not exists:
+                    continue
+                for field, value in deltas[user_id].items():
+                    pipe.hincrby(self._counters_key(user_id), field, value)
+            await pipe.execute()
+            self._stats["adjustments"] += 1
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Error updating usage counters: {e}")
+    
+    async def adjust(self, user_id: str, **deltas: int):
+        await self.adjust_many({str(user_id): deltas})
+    
+    def record_api_call(self, user_id: str):
+        """Count one authenticated API call; written to Redis on the next flush"""
+        self._api_calls[str(user_id)] += 1
+    
+    @timed_task("usage_api_call_flush")
+    async def flush(self) -> int:
+        """Write buffered API call counts to the day and month hashes"""
+        if not self._api_calls:
+            return 0
+        
+        calls, self._api_calls = self._api_calls, Counter()
+        day_key, month_key = self._calls_keys(datetime.utcnow())
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for user_id, count in calls.items():
+                pipe.hincrby(day_key, user_id, count)
+                pipe.hincrby(month_key, user_id, count)
+            pipe.expire(day_key, 2 * 86400)
+            pipe.expire(month_key, 32 * 86400)
+            await pipe.execute()
+            self._stats["api_call_flushes"] += 1
+            return len(calls)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Error flushing API call counts: {e}")
+            self._api_calls.update(calls)
+            return 0
+    
+    async def get(self, user_id: str) -> Optional[Dict[str, int]]:
+        """Current counters for a user, or None if they have not been seeded"""
+        user_id = str(user_id)
+        day_key, month_key = self._calls_keys(datetime.utcnow())
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hgetall(self._counters_key(user_id))
+        pipe.hget(day_key, user_id)
+        pipe.hget(month_key, user_id)
+        counters, calls_today, calls_month = await pipe.execute()
+        
+        if not counters:
+            return None
+        
+        counters = {_text(key): int(value) for key, value in counters.items()}
+        # Include calls from this worker that have not been flushed yet
+        buffered = self._api_calls.get(user_id, 0)
+        stats = {field: max(0, counters.get(field, 0)) for field in COUNTER_FIELDS}
+        stats["api_calls_today"] = int(calls_today or 0) + buffered
+        stats["api_calls_this_month"] = int(calls_month or 0) + buffered
+        return stats
+    
+    async def seed(self, counts: Dict[str, Dict[str, int]]):
+        """Overwrite the counters of the given users with freshly computed values"""
+        if not counts:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for user_id, fields in counts.items():
+            pipe.hset(
+                self._counters_key(user_id),
+                mapping={field: int(fields.get(field, 0)) for field in COUNTER_FIELDS}
+            )
+        await pipe.execute()
+    
+    @timed_task("usage_reconcile")
+    async def reconcile(self) -> int:
+        """Recompute every user's counters from the database"""
+        counts = await self.counts_loader()
+        await self.seed(counts)
+        self._stats["reconciled_users"] += len(counts)
+        return len(counts)
+    
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+    
+    async def _reconcile_loop(self):
+        lock_key = f"{self.prefix}:reconcile-lock"
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                # Only one worker reconciles per interval
+                if await self.redis.set(lock_key, "1", nx=True, ex=max(1, int(self.reconcile_interval))):
+                    count = await self.reconcile()
+                    logger.info(f"Reconciled usage counters for {count} users")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.error(f"Error reconciling usage counters: {e}")
\ No newline at end of file
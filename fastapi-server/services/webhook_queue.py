@@ -0,0 +1,257 @@
+import asyncio
+import os
+import socket
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+from database import db_session
+from models import WebhookEvent
+from metrics import timed_task
+
+logger = logging.getLogger(__name__)
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+class WebhookQueue:
+    """Durable webhook ingestion backed by a Redis stream
+
+    The webhook endpoint acknowledges Tavus once the event is appended to the
+    stream. A consumer-group reader drains it in batches, deduplicates by event
+    id and applies each batch in a single transaction before XACK-ing it.
+    Entries left unacknowledged by a crashed worker are reclaimed after
+    ``claim_idle_ms``.
+
+    When a batch fails its entries are retried one at a time, with backoff,
+    so one bad event cannot hold back the others. An entry that has failed
+    ``max_attempts`` times is moved to the ``<stream>:dead`` stream, with
+    the error, and acknowledged.
+    """
+    
+    def __init__(
+        self,
+        redis_client,
+        conversation_service,
+        on_processed: Optional[Callable[[List[WebhookEvent]], None]] = None,
+        stream: str = "docamy:webhooks:tavus",
+        group: str = "webhook-consumers",
+        batch_size: int = 100,
+        block_ms: int = 1000,
+        claim_idle_ms: int = 60000,
+        maxlen: int = 100000,
+        max_attempts: int = 10
+    ):
+        self.redis = redis_client
+        self.conversation_service = conversation_service
+        self.on_processed = on_processed
+        self.stream = stream
+        self.group = group
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self.maxlen = maxlen
+        self.max_attempts = max_attempts
+        self.dead_letter_stream = f"{stream}:dead"
+        # Failed attempts per entry id, shared by the workers of the group
+        self.attempts_key = f"{stream}:attempts"
+        
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "enqueued": 0,
+            "processed": 0,
+            "duplicates": 0,
+            "invalid": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "failed_entries": 0,
+            "dead_lettered": 0,
+            "last_drain_lag_seconds": 0.0,
+            "max_drain_lag_seconds": 0.0
+        }
+    
+    async def enqueue(self, event_id: str, payload: str) -> str:
+        """Durably append an event; raises if Redis is unavailable"""
+        entry_id = await self.redis.xadd(
+            self.stream,
+            {"event_id": event_id, "payload": payload},
+            maxlen=self.maxlen,
+            approximate=True
+        )
+        self._stats["enqueued"] += 1
+        return _text(entry_id)
+    
+    async def start(self):
+        if self._task is None:
+            await self._ensure_group()
+            self._task = asyncio.create_task(self._consume())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def stats(self) -> Dict[str, Any]:
+        """Queue depth, pending entries and drain lag"""
+        stats = dict(self._stats)
+        try:
+            stats["stream_length"] = await self.redis.xlen(self.stream)
+            stats["dead_letter_length"] = await self.redis.xlen(self.dead_letter_stream)
+            for group in await self.redis.xinfo_groups(self.stream):
+                if _text(group.get("name")) == self.group:
+                    stats["pending"] = group.get("pending")
+                    stats["lag"] = group.get("lag")
+        except Exception as e:
+            stats["error"] = str(e)
+        return stats
+    
+    async def _ensure_group(self):
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+    
+    async def _consume(self):
+        # Re-deliver our own unacknowledged entries first
+        read_from = "0"
+        last_claim = 0.0
+        failures = 0
+        while True:
+            try:
+                entries: List[Tuple[Any, Dict]] = []
+                
+                if time.monotonic() - last_claim > self.claim_idle_ms / 1000:
+                    last_claim = time.monotonic()
+                    claimed = await self.redis.xautoclaim(
+                        self.stream,
+                        self.group,
+                        self.consumer,
+                        min_idle_time=self.claim_idle_ms,
+                        start_id="0-0",
+                        count=self.batch_size
+                    )
+                    entries.extend(claimed[1])
+                
+                if not entries:
+                    response = await self.redis.xreadgroup(
+                        self.group,
+                        self.consumer,
+                        {self.stream: read_from},
+                        count=self.batch_size,
+                        block=None if read_from == "0" else self.block_ms
+                    )
+                    for _, stream_entries in response:
+                        entries.extend(stream_entries)
+                
+                if not entries:
+                    # Own backlog drained, switch to new entries
+                    read_from = ">"
+                    continue
+                
+                if await self._apply(entries):
+                    failures = 0
+                else:
+                    # Retry the entries left pending after a backoff
+                    read_from = "0"
+                    await asyncio.sleep(min(2 ** failures, 30))
+                    failures += 1
+                
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["failed_batches"] += 1
+                logger.error(f"Error draining webhook queue: {e}")
+                read_from = "0"
+                await asyncio.sleep(1)
+    
+    async def _apply(self, entries: List[Tuple[Any, Dict]]) -> bool:
+        """Process a batch; False if some of its entries failed and are still pending"""
+        try:
+            await self._process(entries)
+            return True
+        except Exception as e:
+            self._stats["failed_batches"] += 1
+            logger.error(f"Error applying webhook batch of {len(entries)}: {e}")
+            if len(entries) == 1:
+                await self._record_failure(entries[0], e)
+                return False
+        
+        # Apply the entries one at a time, so only the bad ones stay pending
+        ok = True
+        for entry in entries:
+            try:
+                await self._process([entry])
+            except Exception as e:
+                ok = False
+                await self._record_failure(entry, e)
+        return ok
+    
+    async def _record_failure(self, entry: Tuple[Any, Dict], error: Exception):
+        """Count a failed attempt; dead-letter the entry once it used up max_attempts"""
+        entry_id, fields = entry
+        self._stats["failed_entries"] += 1
+        attempts = await self.redis.hincrby(self.attempts_key, entry_id, 1)
+        if attempts < self.max_attempts:
+            return
+        
+        await self.redis.xadd(
+            self.dead_letter_stream,
+            {**fields, "entry_id": entry_id, "attempts": attempts, "error": str(error)[:1000]},
+            maxlen=self.maxlen,
+            approximate=True
+        )
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xack(self.stream, self.group, entry_id)
+        pipe.hdel(self.attempts_key, entry_id)
+        await pipe.execute()
+        self._stats["dead_lettered"] += 1
+        logger.error(
+            f"Moved webhook entry {_text(entry_id)} to {self.dead_letter_stream} "
+            f"after {attempts} failed attempts: {error}"
+        )
+    
+    @timed_task("webhook_batch")
+    async def _process(self, entries: List[Tuple[Any, Dict]]):
+        events: List[Tuple[str, WebhookEvent]] = []
+        entry_ids = []
+        for entry_id, fields in entries:
+            entry_ids.append(entry_id)
+            # Deleted entries come back from XAUTOCLAIM/XREADGROUP as empty
+            if not fields:
+                continue
+            fields = {_text(key): value for key, value in fields.items()}
+            try:
+                event = WebhookEvent.parse_raw(fields["payload"])
+                events.append((_text(fields["event_id"]), event))
+            except Exception as e:
+                self._stats["invalid"] += 1
+                logger.error(f"Dropping invalid webhook entry {_text(entry_id)}: {e}")
+        
+        applied: List[WebhookEvent] = []
+        if events:
+            async with db_session() as db:
+                applied = await self.conversation_service.handle_webhook_events(db, events)
+        
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xack(self.stream, self.group, *entry_ids)
+        pipe.hdel(self.attempts_key, *entry_ids)
+        await pipe.execute()
+        
+        self._stats["batches"] += 1
+        self._stats["processed"] += len(applied)
+        self._stats["duplicates"] += len(events) - len(applied)
+        
+        # Stream ids start with the enqueue time in milliseconds
+        enqueued_ms = int(_text(entry_ids[0]).split("-")[0])
+        lag = max(0.0, time.time() - enqueued_ms / 1000)
+        self._stats["last_drain_lag_seconds"] = round(lag, 3)
+        self._stats["max_drain_lag_seconds"] = max(self._stats["max_drain_lag_seconds"], round(lag, 3))
+        
+        if applied and self.on_processed:
+            self.on_processed(applied)
\ No newline at end of file
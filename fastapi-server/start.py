@@ -6,6 +6,8 @@ Ensures Python 3 compatibility and proper initialization
 
 import sys
 import os
+import argparse
+import importlib.util
 import subprocess
 from pathlib import Path
 
@@ -42,8 +44,121 @@ def setup_environment():
     os.environ.setdefault("HOST", "0.0.0.0")
     os.environ.setdefault("PORT", "8001")
 
+def available_cpus():
+    """CPUs this process may use, honouring affinity and cgroup (container) quotas"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+def event_loop_implementations():
+    """uvloop and httptools when installed (uvicorn[standard]), else the pure Python ones"""
+    loop = "uvloop" if importlib.util.find_spec("uvloop") and sys.platform != "win32" else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    return loop, http
+
+def run_development(host, port):
+    """Single uvicorn process, reloading on code changes when DEBUG=true"""
+    import uvicorn
+    reload = os.getenv("DEBUG", "false").lower() == "true"
+    uvicorn.run(
+        "main:app",
+        host=host,
+        port=port,
+        reload=reload,
+        log_level="info",
+        access_log=True
+    )
+
+def run_production(host, port, workers, max_requests, max_requests_jitter):
+    """Prefork server: a gunicorn arbiter supervising uvicorn workers
+
+    The arbiter replaces workers that exit, which is what makes recycling
+    after ``max_requests`` safe; workers import the app after the fork, so
+    every process opens its own database, Redis and HTTP connections.
+    """
+    from config import settings
+    loop, http = event_loop_implementations()
+    print(f"⚙️  Production mode: {workers} workers, {loop} event loop, {http} HTTP parser")
+    if max_requests:
+        print(f"♻️  Workers recycle after {max_requests} (+ up to {max_requests_jitter}) requests")
+    
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        # No gunicorn (e.g. on Windows): uvicorn's own supervisor does not
+        # replace exited workers, so recycling is left off
+        print("⚠️  gunicorn is not installed, running uvicorn workers without recycling")
+        import uvicorn
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            workers=workers,
+            loop=loop,
+            http=http,
+            log_level="info",
+            access_log=settings.ACCESS_LOG,
+            timeout_keep_alive=settings.KEEPALIVE_TIMEOUT,
+            timeout_graceful_shutdown=settings.GRACEFUL_TIMEOUT
+        )
+        return
+    
+    class ProductionServer(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+        
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            from main import app
+            return app
+    
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "max_requests": max_requests,
+        "max_requests_jitter": max_requests_jitter,
+        "graceful_timeout": settings.GRACEFUL_TIMEOUT,
+        "timeout": settings.WORKER_TIMEOUT,
+        "keepalive": settings.KEEPALIVE_TIMEOUT,
+        "accesslog": "-" if settings.ACCESS_LOG else None,
+        "errorlog": "-",
+        "loglevel": "info",
+        "preload_app": False
+    }
+    # Heartbeat files on tmpfs, so a slow container disk cannot stall workers
+    if os.path.isdir("/dev/shm"):
+        options["worker_tmp_dir"] = "/dev/shm"
+    ProductionServer(options).run()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Start the DocAmy FastAPI server")
+    parser.add_argument(
+        "--production",
+        action="store_true",
+        default=os.getenv("SERVER_MODE", "").lower() == "production",
+        help="Prefork worker processes without reload (or SERVER_MODE=production)"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: WEB_CONCURRENCY, else one per CPU)")
+    parser.add_argument("--max-requests", type=int, default=None, help="Recycle a worker after this many requests (0 = never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=None)
+    return parser.parse_args()
+
 def main():
     """Main startup function"""
+    args = parse_args()
     print("🚀 Starting DocAmy FastAPI Server...")
     
     # Checks
@@ -54,22 +169,23 @@ def main():
     # Get configuration
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8001))
-    reload = os.getenv("DEBUG", "false").lower() == "true"
     
     print(f"📡 Server will start on http://{host}:{port}")
     print(f"📚 API docs will be available at http://{host}:{port}/docs")
     
     # Start the server
     try:
-        import uvicorn
-        uvicorn.run(
-            "main:app",
-            host=host,
-            port=port,
-            reload=reload,
-            log_level="info",
-            access_log=True
-        )
+        if args.production:
+            from config import settings
+            workers = args.workers or settings.WEB_CONCURRENCY or available_cpus()
+            max_requests = settings.MAX_REQUESTS if args.max_requests is None else args.max_requests
+            jitter = settings.MAX_REQUESTS_JITTER if args.max_requests_jitter is None else args.max_requests_jitter
+            # Forked workers inherit the imported settings, spawned ones read the environment
+            settings.MAX_REQUESTS = max_requests
+            os.environ["MAX_REQUESTS"] = str(max_requests)
+            run_production(host, port, workers, max_requests, jitter)
+        else:
+            run_development(host, port)
     except KeyboardInterrupt:
         print("\n🔄 Server stopped by user")
     except Exception as e:
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class StartupTimer:
+    """Timing report of application startup, broken down by phase
+
+    Created when main.py starts importing, so the report covers module import
+    as well as the lifespan steps. Independent steps run together with
+    ``run_concurrently``: each one is timed, as is the group, so the report
+    shows both what a dependency cost and what it added to the cold start.
+    Steps started with ``defer`` run after the app accepts traffic and are
+    added to the report when they finish.
+    """
+    
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.phases: List[Dict[str, Any]] = []
+        self._deferred: List[asyncio.Task] = []
+    
+    def record(self, name: str, started: float, error: Optional[str] = None, deferred: bool = False):
+        self.phases.append({
+            "phase": name,
+            "offset_ms": round((started - self.started_at) * 1000, 1),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "ok": error is None,
+            "error": error,
+            "deferred": deferred
+        })
+    
+    @asynccontextmanager
+    async def phase(self, name: str, deferred: bool = False):
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(name, started, str(e) or type(e).__name__, deferred)
+            raise
+        self.record(name, started, deferred=deferred)
+    
+    async def _timed(self, name: str, step: Awaitable, deferred: bool = False) -> Any:
+        async with self.phase(name, deferred):
+            return await step
+    
+    async def run_concurrently(self, group: str, steps: Dict[str, Awaitable]) -> Dict[str, Any]:
+        """Run ``steps`` at the same time and return their results by name
+
+        All steps are awaited even if one fails; the first error is then raised.
+        """
+        async with self.phase(group):
+            names = list(steps)
+            results = await asyncio.gather(
+                *(self._timed(name, steps[name]) for name in names),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        return dict(zip(names, results))
+    
+    def defer(self, name: str, step: Awaitable):
+        """Run ``step`` in the background, after startup"""
+        async def run():
+            try:
+                await self._timed(name, step, deferred=True)
+            except Exception as e:
+                logger.warning(f"Deferred startup step '{name}' failed: {e}")
+        self._deferred.append(asyncio.create_task(run()))
+    
+    def finish(self):
+        self.finished_at = time.perf_counter()
+        breakdown = ", ".join(
+            f"{phase['phase']} {phase['duration_ms']:.0f}ms" for phase in self.phases if not phase["deferred"]
+        )
+        logger.info(f"Startup finished in {self.total_ms():.0f}ms ({breakdown})")
+    
+    def total_ms(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return round((self.finished_at - self.started_at) * 1000, 1)
+    
+    async def stop(self):
+        tasks, self._deferred = self._deferred, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def report(self) -> Dict[str, Any]:
+        return {
+            "total_ms": self.total_ms(),
+            "phases": sorted(self.phases, key=lambda phase: phase["offset_ms"]),
+            "deferred_pending": sum(1 for task in self._deferred if not task.done())
+        }
\ No newline at end of file
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Settings are read at import time; the units under test need no real services
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("TAVUS_API_KEY", "test-tavus-key")
+os.environ.setdefault("TAVUS_WEBHOOK_SECRET", "test-webhook-secret")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DATABASE_MODE", "threadpool")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
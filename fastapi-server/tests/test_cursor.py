@@ -0,0 +1,33 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from services.conversation_service import decode_cursor, encode_cursor
+
+def test_round_trip():
+    timestamp = datetime(2024, 5, 17, 10, 30, 12, 345678)
+    row_id = uuid.uuid4()
+    cursor = encode_cursor(timestamp, row_id)
+    assert decode_cursor(cursor) == (timestamp, row_id)
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor(datetime(2024, 1, 1), uuid.uuid4())
+    assert "=" not in cursor
+    assert "+" not in cursor and "/" not in cursor
+
+def test_cursors_order_like_their_keys():
+    row_id = uuid.uuid4()
+    earlier = decode_cursor(encode_cursor(datetime(2024, 1, 1), row_id))
+    later = decode_cursor(encode_cursor(datetime(2024, 1, 2), row_id))
+    assert earlier < later
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not-a-cursor",
+    "e30",  # {}
+    encode_cursor(datetime(2024, 1, 1), uuid.uuid4())[:-6],
+])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
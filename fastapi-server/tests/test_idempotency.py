@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from fakeredis import aioredis
+
+from services.idempotency import IdempotencyInProgress, IdempotencyKeyMismatch, IdempotencyStore
+
+@pytest.fixture
+def store():
+    return IdempotencyStore(aioredis.FakeRedis(), wait_timeout=0.5, poll_interval=0.01)
+
+async def test_first_request_claims_the_key(store):
+    claim = await store.claim("user-1", "key-1", "fp")
+    assert claim.owner is not None
+    assert claim.replay is None
+    assert not claim.completed
+
+async def test_completed_response_is_replayed(store):
+    claim = await store.claim("user-1", "key-1", "fp")
+    await store.complete(claim, 201, {"id": "abc"})
+    
+    replay = await store.claim("user-1", "key-1", "fp")
+    assert replay.owner is None
+    assert replay.completed
+    assert replay.replay["status_code"] == 201
+    assert replay.replay["body"] == {"id": "abc"}
+    assert store.stats()["replayed"] == 1
+
+async def test_keys_are_scoped_per_user(store):
+    claim = await store.claim("user-1", "key-1", "fp")
+    await store.complete(claim, 201, {"id": "abc"})
+    other = await store.claim("user-2", "key-1", "fp")
+    assert other.replay is None
+
+async def test_different_payload_is_rejected(store):
+    await store.claim("user-1", "key-1", "fp")
+    with pytest.raises(IdempotencyKeyMismatch):
+        await store.claim("user-1", "key-1", "other-fp")
+
+async def test_duplicate_waits_for_the_first_request(store):
+    claim = await store.claim("user-1", "key-1", "fp")
+    
+    async def finish():
+        await asyncio.sleep(0.05)
+        await store.complete(claim, 200, {"ok": True})
+    
+    finisher = asyncio.create_task(finish())
+    replay = await store.claim("user-1", "key-1", "fp")
+    await finisher
+    assert replay.replay["body"] == {"ok": True}
+    assert store.stats()["waited"] == 1
+
+async def test_duplicate_gives_up_after_wait_timeout(store):
+    store.wait_timeout = 0.05
+    await store.claim("user-1", "key-1", "fp")
+    with pytest.raises(IdempotencyInProgress):
+        await store.claim("user-1", "key-1", "fp")
+
+async def test_release_lets_a_retry_run_again(store):
+    claim = await store.claim("user-1", "key-1", "fp")
+    await store.release(claim)
+    retry = await store.claim("user-1", "key-1", "fp")
+    assert retry.owner is not None and retry.owner != claim.owner
+
+async def test_release_keeps_a_claim_taken_over_by_another_request(store):
+    stale = await store.claim("user-1", "key-1", "fp")
+    # The lock expired and another request claimed the key
+    await store.redis.delete(stale.key)
+    current = await store.claim("user-1", "key-1", "fp")
+    
+    await store.release(stale)
+    assert await store.redis.get(current.key) is not None
+
+class _UnavailableRedis:
+    async def set(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+    
+    async def get(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+
+async def test_requests_run_without_deduplication_when_redis_is_down():
+    store = IdempotencyStore(_UnavailableRedis())
+    assert await store.claim("user-1", "key-1", "fp") is None
+    assert store.stats()["errors"] == 1
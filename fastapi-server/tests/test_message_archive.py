@@ -0,0 +1,92 @@
+import gzip
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.message_archive import ArchivedMessage, MessageArchive
+
+CONVERSATION_ID = uuid.uuid4()
+USER_ID = uuid.uuid4()
+
+def _rows(count: int, start: datetime = datetime(2024, 3, 1, 12, 0), conversation_id=CONVERSATION_ID):
+    return [
+        ArchivedMessage(
+            id=uuid.uuid4(),
+            conversation_id=conversation_id,
+            content=f"message {i}",
+            message_type="user",
+            video_url=None,
+            stream_url=None,
+            created_at=start + timedelta(seconds=i)
+        )
+        for i in range(count)
+    ]
+
+@pytest.fixture
+def archive(tmp_path):
+    # reload_interval=0 so reads see the manifest as soon as it is written
+    return MessageArchive(str(tmp_path), reload_interval=0)
+
+async def test_write_then_read_round_trips(archive):
+    rows = _rows(3)
+    entry = archive.write(CONVERSATION_ID, USER_ID, rows)
+    assert entry["messages"] == 3
+    assert entry["user_id"] == str(USER_ID)
+    assert os.path.exists(os.path.join(archive.root, entry["file"]))
+    
+    assert await archive.read(str(CONVERSATION_ID)) == rows
+
+async def test_read_checks_the_owner(archive):
+    archive.write(CONVERSATION_ID, USER_ID, _rows(2))
+    assert await archive.read(str(CONVERSATION_ID), user_id=str(uuid.uuid4())) == []
+    assert len(await archive.read(str(CONVERSATION_ID), user_id=str(USER_ID))) == 2
+    assert await archive.read(str(uuid.uuid4())) == []
+
+async def test_rewrite_merges_with_the_existing_archive(archive):
+    older = _rows(2)
+    newer = _rows(2, start=datetime(2024, 3, 2))
+    archive.write(CONVERSATION_ID, USER_ID, newer)
+    # Rows written twice are kept once
+    entry = archive.write(CONVERSATION_ID, USER_ID, older + newer[:1])
+    
+    assert entry["messages"] == 4
+    assert await archive.read(str(CONVERSATION_ID)) == older + newer
+
+async def test_reads_are_cached_until_the_archive_changes(archive):
+    archive.write(CONVERSATION_ID, USER_ID, _rows(1))
+    await archive.read(str(CONVERSATION_ID))
+    await archive.read(str(CONVERSATION_ID))
+    assert (await archive.stats())["cache_hits"] == 1
+    
+    archive.write(CONVERSATION_ID, USER_ID, _rows(1, start=datetime(2024, 4, 1)))
+    assert len(await archive.read(str(CONVERSATION_ID))) == 2
+
+async def test_manifest_survives_a_truncated_line(archive):
+    archive.write(CONVERSATION_ID, USER_ID, _rows(2))
+    with open(archive.manifest_path, "ab") as f:
+        f.write(b'{"conversation_id": "cut sh')
+    
+    reader = MessageArchive(archive.root, reload_interval=0)
+    assert len(await reader.read(str(CONVERSATION_ID))) == 2
+    
+    # The next entry starts on a line of its own
+    other_id = uuid.uuid4()
+    rows = _rows(3, conversation_id=other_id)
+    archive.write(other_id, USER_ID, rows)
+    reader = MessageArchive(archive.root, reload_interval=0)
+    assert await reader.read(str(other_id)) == rows
+    assert len(await reader.read(str(CONVERSATION_ID))) == 2
+
+async def test_remove_drops_the_archive(archive):
+    entry = archive.write(CONVERSATION_ID, USER_ID, _rows(2))
+    assert archive.remove(CONVERSATION_ID) == 2
+    assert not os.path.exists(os.path.join(archive.root, entry["file"]))
+    assert await archive.read(str(CONVERSATION_ID)) == []
+    assert archive.remove(CONVERSATION_ID) == 0
+
+def test_archive_file_is_gzipped_jsonl(archive):
+    entry = archive.write(CONVERSATION_ID, USER_ID, _rows(2))
+    with gzip.open(os.path.join(archive.root, entry["file"]), "rb") as f:
+        assert len([line for line in f if line.strip()]) == 2
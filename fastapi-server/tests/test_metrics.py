@@ -0,0 +1,59 @@
+from fakeredis import aioredis
+
+from metrics import MetricsPublisher, MetricsRegistry
+
+def _worker(redis_client):
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_duration_seconds", "Test durations", ("route",), buckets=(0.1, 1.0))
+    return histogram, MetricsPublisher(registry, redis_client)
+
+def _line(text: str, prefix: str) -> str:
+    return next(line for line in text.splitlines() if line.startswith(prefix))
+
+async def test_collect_totals_all_workers():
+    redis_client = aioredis.FakeRedis()
+    first, first_publisher = _worker(redis_client)
+    second, second_publisher = _worker(redis_client)
+    first.observe(0.05, "/a")
+    first.observe(0.5, "/a")
+    second.observe(2.0, "/a")
+    second.observe(0.05, "/b")
+    await second_publisher.publish()
+    
+    text = await first_publisher.collect()
+    assert _line(text, 'test_duration_seconds_bucket{route="/a",le="0.1"}').endswith(" 1")
+    assert _line(text, 'test_duration_seconds_bucket{route="/a",le="1.0"}').endswith(" 2")
+    assert _line(text, 'test_duration_seconds_count{route="/a"}').endswith(" 3")
+    assert float(_line(text, 'test_duration_seconds_sum{route="/a"}').split()[-1]) == 2.55
+    assert _line(text, 'test_duration_seconds_count{route="/b"}').endswith(" 1")
+
+async def test_publish_only_adds_new_observations():
+    redis_client = aioredis.FakeRedis()
+    histogram, publisher = _worker(redis_client)
+    histogram.observe(0.05, "/a")
+    await publisher.publish()
+    await publisher.publish()
+    histogram.observe(0.05, "/a")
+    
+    text = await publisher.collect()
+    assert _line(text, 'test_duration_seconds_count{route="/a"}').endswith(" 2")
+
+async def test_totals_survive_a_stopped_worker():
+    redis_client = aioredis.FakeRedis()
+    retired, retired_publisher = _worker(redis_client)
+    retired.observe(0.05, "/a")
+    await retired_publisher.stop()
+    
+    _, publisher = _worker(redis_client)
+    text = await publisher.collect()
+    assert _line(text, 'test_duration_seconds_count{route="/a"}').endswith(" 1")
+
+class _UnavailableRedis:
+    def pipeline(self, *args, **kwargs):
+        raise ConnectionError("redis down")
+
+async def test_collect_falls_back_to_this_worker():
+    histogram, publisher = _worker(_UnavailableRedis())
+    histogram.observe(0.05, "/a")
+    text = await publisher.collect()
+    assert _line(text, 'test_duration_seconds_count{route="/a"}').endswith(" 1")
@@ -0,0 +1,37 @@
+import asyncio
+import uuid
+
+from fakeredis import aioredis
+
+from auth import PrincipalCache
+
+async def _wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+async def test_revoke_drops_the_key_on_every_worker():
+    redis_client = aioredis.FakeRedis()
+    workers = [PrincipalCache(ttl=60), PrincipalCache(ttl=60)]
+    for cache in workers:
+        await cache.start(redis_client)
+        cache.set("hash-1", uuid.uuid4(), {"id": "user-1"})
+        cache.set("hash-2", uuid.uuid4(), {"id": "user-1"})
+    # Let the listeners subscribe
+    await _wait_for(lambda: all(cache._listener is not None for cache in workers))
+    await asyncio.sleep(0.1)
+    
+    await workers[0].revoke("hash-1")
+    assert workers[0].get("hash-1") is None
+    await _wait_for(lambda: workers[1].get("hash-1") is None)
+    assert workers[1].get("hash-2") is not None
+    
+    for cache in workers:
+        await cache.stop()
+
+async def test_revoke_without_redis_is_local():
+    cache = PrincipalCache(ttl=60)
+    cache.set("hash-1", uuid.uuid4(), {"id": "user-1"})
+    await cache.revoke("hash-1")
+    assert cache.get("hash-1") is None
@@ -0,0 +1,78 @@
+import fakeredis
+import pytest
+
+from services import rate_limit_storage
+from services.rate_limit_storage import HybridRedisStorage
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+@pytest.fixture
+def make_storage(server, monkeypatch):
+    monkeypatch.setattr(
+        rate_limit_storage.redis,
+        "from_url",
+        lambda url, **options: fakeredis.FakeStrictRedis(server=server)
+    )
+    storages = []
+    
+    def make():
+        # No background syncs; the tests call sync() themselves
+        storage = HybridRedisStorage("hybrid+redis://localhost:6379", sync_interval=3600)
+        storages.append(storage)
+        return storage
+    
+    yield make
+    for storage in storages:
+        storage._stop.set()
+
+def test_hits_are_counted_locally_until_synced(make_storage):
+    storage = make_storage()
+    assert storage.incr("limit/user-1", 60) == 1
+    assert storage.incr("limit/user-1", 60) == 2
+    assert storage.get("limit/user-1") == 2
+    assert storage.redis.get("limit/user-1") is None
+    
+    storage.sync()
+    assert int(storage.redis.get("limit/user-1")) == 2
+    assert storage.get("limit/user-1") == 2
+    assert storage.stats()["pending_hits"] == 0
+
+def test_sync_shares_counts_between_workers(make_storage):
+    first, second = make_storage(), make_storage()
+    for _ in range(3):
+        first.incr("limit/user-1", 60)
+    second.incr("limit/user-1", 60)
+    
+    first.sync()
+    second.sync()
+    assert second.get("limit/user-1") == 4
+    # Hits made since the last sync are added on top of the global count
+    assert first.incr("limit/user-1", 60) == 4
+    first.sync()
+    assert first.get("limit/user-1") == 5
+
+def test_sync_sets_the_window_expiry(make_storage):
+    storage = make_storage()
+    storage.incr("limit/user-1", 60)
+    storage.sync()
+    assert 0 < storage.redis.pttl("limit/user-1") <= 60000
+
+def test_sync_repairs_a_window_without_ttl(make_storage):
+    storage = make_storage()
+    storage.redis.set("limit/user-1", 7)
+    assert storage.redis.pttl("limit/user-1") == -1
+    
+    storage.incr("limit/user-1", 30)
+    storage.sync()
+    assert storage.get("limit/user-1") == 8
+    assert 0 < storage.redis.pttl("limit/user-1") <= 30000
+
+def test_clear_drops_local_and_shared_counts(make_storage):
+    storage = make_storage()
+    storage.incr("limit/user-1", 60)
+    storage.sync()
+    storage.clear("limit/user-1")
+    assert storage.get("limit/user-1") == 0
+    assert storage.redis.get("limit/user-1") is None
@@ -0,0 +1,81 @@
+import pytest
+
+from services.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, backoff_delay
+
+def _call(breaker: CircuitBreaker, ok: bool, duration: float = 0.0):
+    breaker.before_call()
+    breaker.record(ok, duration)
+
+def test_stays_closed_below_min_calls():
+    breaker = CircuitBreaker("tavus", window=10, min_calls=5)
+    for _ in range(4):
+        _call(breaker, False)
+    assert breaker.state == CLOSED
+
+def test_opens_at_failure_rate_and_rejects():
+    breaker = CircuitBreaker("tavus", window=10, min_calls=4, failure_rate=0.5, reset_timeout=60)
+    _call(breaker, True)
+    _call(breaker, True)
+    _call(breaker, False)
+    assert breaker.state == CLOSED
+    _call(breaker, False)
+    assert breaker.state == OPEN
+    
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.name == "tavus"
+    assert 0 < excinfo.value.retry_after <= 60
+    assert breaker.stats()["rejected"] == 1
+    assert breaker.stats()["opened"] == 1
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker("tavus", window=4, min_calls=2, failure_rate=1.0, slow_call_seconds=1.0)
+    _call(breaker, True, duration=2.0)
+    _call(breaker, True, duration=5.0)
+    assert breaker.state == OPEN
+    assert breaker.stats()["slow_calls"] == 2
+
+def _opened(half_open_calls: int = 2) -> CircuitBreaker:
+    breaker = CircuitBreaker("tavus", window=2, min_calls=1, reset_timeout=0.0, half_open_calls=half_open_calls)
+    _call(breaker, False)
+    assert breaker.state == OPEN
+    return breaker
+
+def test_half_open_probes_close_the_circuit():
+    breaker = _opened(half_open_calls=2)
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    # Only half_open_calls probes at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    
+    breaker.record(True)
+    assert breaker.state == HALF_OPEN
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["window_calls"] == 0
+
+def test_half_open_failure_reopens():
+    breaker = _opened()
+    breaker.before_call()
+    breaker.record(False)
+    assert breaker.state == OPEN
+    assert breaker.stats()["opened"] == 2
+
+def test_release_frees_a_probe():
+    breaker = _opened(half_open_calls=1)
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    # A cancelled probe records nothing and lets the next one through
+    breaker.release()
+    breaker.before_call()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+
+def test_backoff_delay_is_capped_and_honours_retry_after():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, 1.0, 8.0) <= 8.0
+    assert backoff_delay(0, 0.001, 30.0, retry_after=5.0) >= 5.0
+    assert backoff_delay(0, 0.001, 30.0, retry_after=120.0) == 30.0
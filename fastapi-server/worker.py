@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import socket
+import sys
+import time
+from typing import Any, Dict, List, Optional
+import logging
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size, or the peak where /proc is not available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class WorkerStats:
+    """Request counters of this worker process, published to Redis for the fleet view
+
+    Every worker counts the requests it has served and has in flight. When a
+    Redis client is given, a snapshot is written to a shared hash every
+    ``interval`` seconds so any worker can report on all of them; snapshots
+    not refreshed for three intervals are treated as gone (recycled or dead
+    workers) and pruned.
+    """
+    
+    def __init__(self, redis_client=None, interval: float = 10.0, max_requests: int = 0, key: str = "docamy:workers"):
+        self.redis = redis_client
+        self.interval = interval
+        self.max_requests = max_requests
+        self.key = key
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.started_at = time.time()
+        self.requests_total = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._task: Optional[asyncio.Task] = None
+    
+    def request_started(self):
+        self.requests_total += 1
+        self.in_flight += 1
+        if self.in_flight > self.max_in_flight:
+            self.max_in_flight = self.in_flight
+    
+    def request_finished(self):
+        self.in_flight -= 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        uptime = now - self.started_at
+        try:
+            loop = type(asyncio.get_running_loop()).__module__.split(".")[0]
+        except RuntimeError:
+            loop = None
+        return {
+            "worker_id": self.worker_id,
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "uptime_s": round(uptime, 1),
+            "requests_total": self.requests_total,
+            "requests_in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "requests_per_s": round(self.requests_total / uptime, 2) if uptime > 0 else 0.0,
+            "max_requests": self.max_requests,
+            "rss_bytes": _rss_bytes(),
+            "event_loop": loop,
+            "updated_at": now
+        }
+    
+    async def start(self):
+        if self.redis is not None and self._task is None:
+            self._task = asyncio.create_task(self._publish_loop())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.redis is not None:
+            try:
+                await self.redis.hdel(self.key, self.worker_id)
+            except Exception as e:
+                logger.warning(f"Error removing worker stats: {e}")
+    
+    async def publish(self):
+        await self.redis.hset(self.key, self.worker_id, json.dumps(self.snapshot()))
+    
+    async def _publish_loop(self):
+        while True:
+            try:
+                await self.publish()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Error publishing worker stats: {e}")
+            await asyncio.sleep(self.interval)
+    
+    async def fleet(self) -> List[Dict[str, Any]]:
+        """Latest snapshots of all live workers sharing the Redis instance"""
+        if self.redis is None:
+            return [self.snapshot()]
+        await self.publish()
+        entries = await self.redis.hgetall(self.key)
+        cutoff = time.time() - 3 * self.interval
+        workers, stale = [], []
+        for worker_id, raw in entries.items():
+            snapshot = json.loads(raw)
+            if snapshot["updated_at"] < cutoff:
+                stale.append(worker_id)
+            else:
+                workers.append(snapshot)
+        if stale:
+            await self.redis.hdel(self.key, *stale)
+        return sorted(workers, key=lambda snapshot: snapshot["worker_id"])
+
+class WorkerStatsMiddleware:
+    """ASGI middleware counting the HTTP requests served by this worker"""
+    
+    def __init__(self, app, stats: WorkerStats):
+        self.app = app
+        self.stats = stats
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.stats.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.stats.request_finished()
\ No newline at end of file